@@ -1,10 +1,343 @@
+import queue
+import threading
+import time
 import pygame
 import os
 from settings import *
 
+def apply_mixer_profile(profile):
+    """
+    Make the next mixer start (pygame.init() or pygame.mixer.init()) use a
+    profile from MIXER_PROFILES. Has no effect on a mixer already running.
+    """
+    pygame.mixer.pre_init(**MIXER_PROFILES[profile])
+
+# Set before anything calls pygame.init(), which would start the mixer with defaults
+apply_mixer_profile(MIXER_PROFILE)
+
+class MusicPlayer:
+    """
+    Music tracks decoded into memory and crossfaded on reserved channels.
+
+    Each track is split once into short segments that play back to back
+    through the channel queue, which the mixer follows without a gap, so
+    looping never ends. Switching tracks starts a fade-in on one channel
+    and fades the other out by lowering its volume every update(), which
+    keeps queuing the outgoing track's segments until the fade is over (a
+    mixer fade-out would stop at the end of the playing segment). The
+    fade-in is applied by the mixer; the fade-out steps once per update()
+    along the wall clock, so it is only as smooth as the frame rate and
+    holds its last volume while update() is late. Nothing is read or
+    decoded on the main thread. A track that is left remembers its segment
+    and resumes there instead of restarting.
+    """
+    
+    def __init__(self, channels=MUSIC_CHANNELS, segment_seconds=MUSIC_SEGMENT_SECONDS):
+        pygame.mixer.set_reserved(channels)
+        self.channels = [pygame.mixer.Channel(index) for index in range(channels)]
+        frequency, size, mix_channels = pygame.mixer.get_init()
+        self.frame_bytes = mix_channels * (abs(size) // 8)
+        self.segment_bytes = int(frequency * segment_seconds) * self.frame_bytes
+        self.tracks = {}  # name -> list of segment Sounds
+        self.positions = {}  # name -> segment to resume from
+        self.fading = {}  # Channel -> [track, next segment, loops, volume, fade start, fade seconds]
+        self.current = None
+        self.channel = None
+        self.segment = 0  # Segment queued after the playing one
+        self.loops = -1
+        
+        # Statistics
+        self.switches = 0
+        self.resumes = 0
+        
+    def decode(self, filepath):
+        """Segments of a music file (touches no player state, so any thread may call it)"""
+        raw = pygame.mixer.Sound(filepath).get_raw()
+        return [pygame.mixer.Sound(buffer=raw[start:start + self.segment_bytes])
+                for start in range(0, len(raw), self.segment_bytes)]
+        
+    def load(self, name, filepath):
+        """Decode a music file into memory, split into segments"""
+        self.tracks[name] = self.decode(filepath)
+        
+    def playing_segment(self):
+        """Index of the segment the current channel is playing"""
+        sound = self.channel.get_sound()
+        segments = self.tracks[self.current]
+        return segments.index(sound) if sound in segments else 0
+        
+    def leave(self, fade_ms):
+        """Fade out the current track and remember where it was"""
+        if fade_ms == 0:
+            for channel in self.fading:
+                channel.stop()
+            self.fading.clear()
+        if self.current is None:
+            return
+        self.positions[self.current] = self.playing_segment()
+        if fade_ms:
+            self.fading[self.channel] = [self.current, self.segment, self.loops, self.channel.get_volume(),
+                                         time.perf_counter(), fade_ms / 1000]
+        else:
+            self.channel.stop()
+        self.current = None
+        
+    def play(self, name, loops=-1, volume=1.0, fade_ms=MUSIC_CROSSFADE_MS):
+        """Crossfade to a preloaded track; returns False if it is not loaded"""
+        if name not in self.tracks:
+            return False
+        if name == self.current:
+            self.channel.set_volume(volume)
+            return True
+        self.leave(fade_ms)
+        
+        # The channel that is not fading out takes the new track
+        channel = self.channels[1] if self.channel is self.channels[0] else self.channels[0]
+        segment = self.positions.get(name, 0) if loops == -1 else 0
+        if segment:
+            self.resumes += 1
+        self.fading.pop(channel, None)
+        channel.stop()
+        channel.set_volume(volume)
+        channel.play(self.tracks[name][segment], fade_ms=fade_ms)
+        self.channel = channel
+        self.current = name
+        self.loops = loops
+        self.segment = segment + 1
+        self.switches += 1
+        self.update()
+        return True
+        
+    def update(self):
+        """Queue the next segments and advance fade-outs (call every frame)"""
+        now = time.perf_counter()
+        for channel, fade in list(self.fading.items()):
+            name, segment, loops, volume, start, seconds = fade
+            left = 1 - (now - start) / seconds
+            if left <= 0:
+                channel.stop()
+                del self.fading[channel]
+                continue
+            channel.set_volume(volume * left)
+            fade[1], fade[2] = self.queue_next(channel, name, segment, loops)
+        if self.current is not None:
+            self.segment, self.loops = self.queue_next(self.channel, self.current, self.segment, self.loops)
+            
+    def queue_next(self, channel, name, segment, loops):
+        """
+        Queue a track's next segment once the previous one started.
+        Returns the updated (next segment, loops left).
+        """
+        if channel.get_queue() is not None:
+            return segment, loops
+        segments = self.tracks[name]
+        if segment >= len(segments):
+            if loops == 0:
+                return segment, loops
+            if loops > 0:
+                loops -= 1
+            segment = 0
+        channel.queue(segments[segment])
+        return segment + 1, loops
+        
+    def set_volume(self, volume):
+        if self.channel is not None:
+            self.channel.set_volume(volume)
+            
+    def stop(self):
+        self.leave(0)
+        
+    def fadeout(self, duration):
+        self.leave(duration)
+
+class ChannelPool:
+    """
+    Sound effect voices on a fixed set of channels.
+
+    Each sound may play at most its voice limit at once (the oldest copy is
+    restarted beyond that), the same sound triggered twice in one frame
+    plays once, and when every channel is busy a sound steals the oldest
+    voice of equal or lower priority or is dropped. Volume is set on the
+    channel, so the shared Sound objects are never modified.
+    """
+    
+    def __init__(self, first_channel, count=SFX_CHANNELS):
+        self.channels = [pygame.mixer.Channel(index) for index in range(first_channel, first_channel + count)]
+        self.voices = {}  # Channel index -> (sound name, priority, play serial)
+        self.frame_triggers = set()  # Sounds already played this frame
+        self.serial = 0
+        
+        # Statistics
+        self.played = 0
+        self.dropped = 0
+        self.stolen = 0
+        self.deduplicated = 0
+        
+    def begin_frame(self):
+        """Allow every sound to trigger again (call once per frame)"""
+        self.frame_triggers.clear()
+        
+    def active_voices(self):
+        """(index, name, priority, serial) of the channels still playing"""
+        return [(index, *self.voices[index]) for index, channel in enumerate(self.channels)
+                if index in self.voices and channel.get_busy()]
+        
+    def pick_channel(self, name, priority):
+        """Index of the channel a new voice should use, or None to drop it"""
+        active = self.active_voices()
+        same = [voice for voice in active if voice[1] == name]
+        if len(same) >= SFX_VOICE_LIMITS.get(name, SFX_MAX_VOICES):
+            return min(same, key=lambda voice: voice[3])[0]
+        busy = {voice[0] for voice in active}
+        for index in range(len(self.channels)):
+            if index not in busy:
+                return index
+        weaker = [voice for voice in active if voice[2] <= priority]
+        if weaker:
+            return min(weaker, key=lambda voice: (voice[2], voice[3]))[0]
+        return None
+        
+    def play(self, name, sound, volume):
+        """Play a sound on a pooled channel; returns the channel or None"""
+        if name in self.frame_triggers:
+            self.deduplicated += 1
+            return None
+        self.frame_triggers.add(name)
+        priority = SFX_PRIORITIES.get(name, 1)
+        index = self.pick_channel(name, priority)
+        if index is None:
+            self.dropped += 1
+            return None
+        channel = self.channels[index]
+        if channel.get_busy():
+            self.stolen += 1
+            channel.stop()
+        channel.set_volume(volume)
+        channel.play(sound)
+        self.serial += 1
+        self.voices[index] = (name, priority, self.serial)
+        self.played += 1
+        return channel
+
+class AudioSynthesizer:
+    """
+    Makes sound files that are missing from the assets folder.
+
+    A background thread synthesizes them from the specs in generate_sounds
+    and writes them as WAV (PCM) files under AUDIO_CACHE_DIR, named after
+    the hash of their spec. Later launches find the cached file and only
+    read it back. Once the mixer runs (set_decoder()), the same thread also
+    decodes each file, and results() hands over ready-to-play objects.
+    """
+    
+    def __init__(self, cache_dir=AUDIO_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.requested = set()
+        self.finished = queue.Queue()
+        self.decoder = None
+        self.decoder_ready = threading.Event()
+        
+        # Statistics
+        self.synthesized = 0
+        self.cache_hits = 0
+        self.failed = 0
+        
+    def set_decoder(self, decoder):
+        """Decode finished files with decoder(filename, path) from now on (needs the mixer)"""
+        self.decoder = decoder
+        self.decoder_ready.set()
+        
+    def start(self, filenames):
+        """Produce the given asset files in the background"""
+        filenames = [filename for filename in filenames if filename not in self.requested]
+        if filenames:
+            self.requested.update(filenames)
+            threading.Thread(target=self.worker, args=(filenames,), daemon=True).start()
+            
+    def worker(self, filenames):
+        # NumPy and the synthesis code are only needed when something is missing
+        import generate_sounds
+        produced = []
+        for filename in filenames:
+            try:
+                path = self.produce(generate_sounds, filename)
+            except (OSError, ValueError) as error:
+                # One unwritable file must not silence all the others
+                print(f"Could not synthesize {filename}: {error}")
+                self.failed += 1
+                continue
+            if path:
+                produced.append((filename, path))
+            if self.decoder_ready.is_set():
+                self.decode(produced)
+                produced = []
+        self.decoder_ready.wait()
+        self.decode(produced)
+        
+    def produce(self, generate_sounds, filename):
+        """Cached WAV of an asset file, synthesized if needed; None without a spec"""
+        spec = generate_sounds.ASSET_SPECS.get(filename)
+        if spec is None:
+            return None
+        name, extension = os.path.splitext(filename)
+        path = os.path.join(self.cache_dir, f"{name}-{generate_sounds.spec_hash(spec)[:12]}{extension}")
+        if os.path.exists(path):
+            self.cache_hits += 1
+        else:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            generate_sounds.save_wav_file(path, generate_sounds.synthesize(spec))
+            self.synthesized += 1
+        return path
+        
+    def decode(self, produced):
+        """Decode produced files and hand them to results()"""
+        for filename, path in produced:
+            try:
+                self.finished.put((filename, path, self.decoder(filename, path)))
+            except pygame.error as error:
+                print(f"Could not load synthesized {filename}: {error}")
+                self.failed += 1
+            
+    def results(self, limit=1):
+        """Up to `limit` (asset filename, cached path, decoded audio) finished since the last call"""
+        results = []
+        while len(results) < limit and not self.finished.empty():
+            results.append(self.finished.get_nowait())
+        return results
+
 class AudioManager:
-    def __init__(self):
-        pygame.mixer.init()
+    """
+    Sound effects and music. The mixer is started and the sounds are loaded
+    on first use, so importing this module or opening the menus stays cheap.
+    Files missing from the sounds folder are synthesized in the background
+    (see AudioSynthesizer) and swapped in as they become available.
+    """
+    
+    # Sound effects and the file each one plays
+    SOUND_FILES = {
+        'button_click': 'button_click.wav',
+        'enemy_death': 'enemy_death.wav',
+        'player_hit': 'player_hit.wav',
+        'hunt_mode_start': 'hunt_mode_start.wav',
+        'hunt_mode_end': 'hunt_mode_start.wav',  # Reuse existing sound
+        'level_complete': 'level_complete.wav',
+        'game_over': 'boss_spawn.wav',  # Reuse existing sound
+        'boss_spawn': 'boss_spawn.wav',
+        'power_up': 'button_click.wav',  # Reuse existing sound
+        'footstep': 'button_click.wav'  # Reuse existing sound
+    }
+    
+    # Music tracks
+    MUSIC_FILES = {
+        'lobby_music': 'lobby_music.wav',
+        'level_music': 'level_music.wav',
+        'hunt_music': 'hunt_music.wav',
+        'boss_music': 'boss_music.wav'
+    }
+    
+    def __init__(self, sounds_path="assets/Sounds", profile=MIXER_PROFILE):
+        self.sounds_path = sounds_path
+        self.profile = profile
         
         # Volume settings
         self.master_volume = MASTER_VOLUME
@@ -14,99 +347,146 @@ class AudioManager:
         # Sound effects dictionary
         self.sounds = {}
         self.music = {}
+        self.music_player = None
+        self.channel_pool = None
+        self.synthesizer = AudioSynthesizer()
+        
+        # Current playing music, and the track asked for (it may still be
+        # synthesizing) with the loops and volume it was asked for
+        self.current_music = None
+        self.wanted_music = None
+        self.wanted_options = (-1, 1.0)
+        self.ready = False  # Mixer started and sounds loaded
+        self.silent = False  # The mixer could not start; every call is a no-op
         
-        # Load sounds
+    def ensure_ready(self):
+        """Start the mixer and load the sounds the first time audio is needed"""
+        if self.ready or self.silent:
+            return
+        try:
+            if not pygame.mixer.get_init():
+                pygame.mixer.init(**MIXER_PROFILES[self.profile])
+        except pygame.error as error:
+            # No audio device: play on without sound instead of failing every frame
+            print(f"Audio disabled: {error}")
+            self.silent = True
+            return
+        pygame.mixer.set_num_channels(MUSIC_CHANNELS + SFX_CHANNELS)
+        self.music_player = MusicPlayer()
+        self.channel_pool = ChannelPool(MUSIC_CHANNELS)
         self.load_sounds()
+        self.synthesizer.set_decoder(self.decode_synthesized)
+        self.ready = True
+        self.prepare()
         
-        # Current playing music
-        self.current_music = None
+    def set_profile(self, profile):
+        """Choose the mixer profile; applies when the mixer starts"""
+        self.profile = profile
+        apply_mixer_profile(profile)
+        
+    def missing_files(self):
+        """Asset files that are not in the sounds folder, music first"""
+        filenames = dict.fromkeys(list(self.MUSIC_FILES.values()) + list(self.SOUND_FILES.values()))
+        return [filename for filename in filenames
+                if not os.path.exists(os.path.join(self.sounds_path, filename))]
+        
+    def prepare(self):
+        """Start synthesizing missing files in the background (cheap; call at startup)"""
+        self.synthesizer.start(self.missing_files())
         
     def load_sounds(self):
         """Load all sound effects and music"""
-        sounds_path = "assets/Sounds"
+        sounds_path = self.sounds_path
         
         # Create sounds directory if it doesn't exist
         if not os.path.exists(sounds_path):
             os.makedirs(sounds_path)
             
-        # Define sound files to load
-        sound_files = {
-            'button_click': 'button_click.wav',
-            'enemy_death': 'enemy_death.wav',
-            'player_hit': 'player_hit.wav',
-            'hunt_mode_start': 'hunt_mode_start.wav',
-            'hunt_mode_end': 'hunt_mode_start.wav',  # Reuse existing sound
-            'level_complete': 'level_complete.wav',
-            'game_over': 'boss_spawn.wav',  # Reuse existing sound
-            'boss_spawn': 'boss_spawn.wav',
-            'power_up': 'button_click.wav',  # Reuse existing sound
-            'footstep': 'button_click.wav'  # Reuse existing sound
-        }
-        
         # Load sound effects
-        for sound_name, filename in sound_files.items():
+        for sound_name, filename in self.SOUND_FILES.items():
             filepath = os.path.join(sounds_path, filename)
             if os.path.exists(filepath):
                 self.sounds[sound_name] = pygame.mixer.Sound(filepath)
-                self.sounds[sound_name].set_volume(self.sfx_volume * self.master_volume)
             else:
-                # Create placeholder sound if file doesn't exist
+                # Silent until the synthesized version is ready
                 self.sounds[sound_name] = self.create_placeholder_sound()
                 
-        # Define music files to load
-        music_files = {
-            'lobby_music': 'lobby_music.wav',
-            'level_music': 'level_music.wav',
-            'hunt_music': 'hunt_music.wav',
-            'boss_music': 'boss_music.wav'
-        }
-        
         # Load music
-        for music_name, filename in music_files.items():
+        for music_name, filename in self.MUSIC_FILES.items():
             filepath = os.path.join(sounds_path, filename)
             if os.path.exists(filepath):
                 self.music[music_name] = filepath
+                # Decoded up front so switching tracks never touches the disk
+                self.music_player.load(music_name, filepath)
             else:
-                # Create placeholder music if file doesn't exist
+                # No music until the synthesized version is ready
                 self.music[music_name] = None
                 
     def create_placeholder_sound(self):
         """Create a simple placeholder sound"""
-        # Create a very short, quiet sound as placeholder
-        try:
-            import numpy as np
-            # Create a 2D array for stereo sound
-            sound_data = np.zeros((1000, 2), dtype=np.int16)
-            sound_array = pygame.sndarray.make_sound(sound_data)
-            return sound_array
-        except (ImportError, NotImplementedError):
-            # Fallback: create a silent sound using pygame's built-in functionality
-            silent_sound = pygame.mixer.Sound(buffer=bytes([0] * 4000))  # 1000 samples * 2 channels * 2 bytes per sample
-            return silent_sound
+        # 1000 silent samples in the mixer's own format (no NumPy needed)
+        _, size, channels = pygame.mixer.get_init()
+        return pygame.mixer.Sound(buffer=bytes(1000 * channels * (abs(size) // 8)))
+        
+    def update(self):
+        """Keep the music playing and start a new sound frame (call once per frame)"""
+        if self.ready:
+            self.install_synthesized()
+            self.music_player.update()
+            self.channel_pool.begin_frame()
+            
+    def decode_synthesized(self, filename, path):
+        """Sound or music segments of a synthesized file (runs on the synthesizer thread)"""
+        if filename in self.MUSIC_FILES.values():
+            return self.music_player.decode(path)
+        return pygame.mixer.Sound(path)
         
+    def install_synthesized(self):
+        """Swap in a sound or track the synthesizer has decoded (one per frame)"""
+        for filename, path, decoded in self.synthesizer.results():
+            for sound_name, sound_file in self.SOUND_FILES.items():
+                if sound_file == filename:
+                    self.sounds[sound_name] = decoded
+            for music_name, music_file in self.MUSIC_FILES.items():
+                if music_file == filename:
+                    self.music[music_name] = path
+                    self.music_player.tracks[music_name] = decoded
+                    if music_name == self.wanted_music:
+                        self.play_music(music_name, *self.wanted_options)
+            
     def play_sound(self, sound_name, volume=1.0):
         """Play a sound effect"""
-        if sound_name in self.sounds:
-            sound = self.sounds[sound_name]
-            sound.set_volume(self.sfx_volume * self.master_volume * volume)
-            sound.play()
+        self.ensure_ready()
+        if self.ready and sound_name in self.sounds:
+            self.channel_pool.play(sound_name, self.sounds[sound_name], self.sfx_volume * self.master_volume * volume)
             
-    def play_music(self, music_name, loops=-1, volume=1.0):
-        """Play background music"""
-        if music_name in self.music and self.music[music_name]:
-            pygame.mixer.music.load(self.music[music_name])
-            pygame.mixer.music.set_volume(self.music_volume * self.master_volume * volume)
-            pygame.mixer.music.play(loops)
+    def play_music(self, music_name, loops=-1, volume=1.0, fade_ms=MUSIC_CROSSFADE_MS):
+        """Crossfade to background music, resuming a looping track where it was left"""
+        self.ensure_ready()
+        if not self.ready:
+            return
+        self.wanted_music = music_name
+        self.wanted_options = (loops, volume)
+        if self.music_player.play(music_name, loops, self.music_volume * self.master_volume * volume, fade_ms):
             self.current_music = music_name
+        elif self.current_music:
+            # The wanted track is not ready yet; don't keep playing the old one
+            self.music_player.fadeout(fade_ms)
+            self.current_music = None
             
     def stop_music(self):
         """Stop background music"""
-        pygame.mixer.music.stop()
+        if self.ready:
+            self.music_player.stop()
         self.current_music = None
+        self.wanted_music = None
         
     def fade_out_music(self, duration=1000):
         """Fade out background music"""
-        pygame.mixer.music.fadeout(duration)
+        if self.ready:
+            self.music_player.fadeout(duration)
+        self.current_music = None
+        self.wanted_music = None
         
     def set_master_volume(self, volume):
         """Set master volume (0.0 to 1.0)"""
@@ -117,23 +497,17 @@ class AudioManager:
         """Set music volume (0.0 to 1.0)"""
         self.music_volume = max(0.0, min(1.0, volume))
         if self.current_music:
-            pygame.mixer.music.set_volume(self.music_volume * self.master_volume)
+            self.music_player.set_volume(self.music_volume * self.master_volume)
             
     def set_sfx_volume(self, volume):
-        """Set sound effects volume (0.0 to 1.0)"""
+        """Set sound effects volume (0.0 to 1.0), used by the next sounds played"""
         self.sfx_volume = max(0.0, min(1.0, volume))
-        for sound in self.sounds.values():
-            sound.set_volume(self.sfx_volume * self.master_volume)
             
     def update_all_volumes(self):
         """Update all sound and music volumes"""
-        # Update sound effects
-        for sound in self.sounds.values():
-            sound.set_volume(self.sfx_volume * self.master_volume)
-            
-        # Update music
+        # Sound effects take their volume when played, so only music changes here
         if self.current_music:
-            pygame.mixer.music.set_volume(self.music_volume * self.master_volume)
+            self.music_player.set_volume(self.music_volume * self.master_volume)
             
     def get_volume_settings(self):
         """Get current volume settings"""
@@ -152,5 +526,5 @@ class AudioManager:
         if 'sfx' in settings:
             self.set_sfx_volume(settings['sfx'])
 
-# Global audio manager instance
+# Global audio manager instance (cheap: nothing is loaded until first use)
 audio_manager = AudioManager()
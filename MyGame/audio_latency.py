@@ -0,0 +1,173 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import subprocess
+
+from settings import *
+
+# Each profile runs in its own process: the SDL audio driver and the mixer
+# format can only be chosen before the mixer starts. The parent watches the
+# disk driver's output grow, so its timestamps do not compete with the game
+# loop for the child's interpreter; perf_counter is a system-wide monotonic
+# clock, so both processes' times can be compared.
+
+def watch_stream(path, process):
+    """Record (time, bytes written) whenever the disk driver's output grows, until process exits"""
+    events = []
+    size = 0
+    while process.poll() is None:
+        try:
+            new_size = os.path.getsize(path)
+        except OSError:
+            new_size = 0
+        if new_size != size:
+            size = new_size
+            events.append((time.perf_counter(), size))
+        time.sleep(0.0002)
+    return events
+
+def written_at(events, position):
+    """
+    When the stream had reached a byte position. Writes are seen in file
+    sized steps, so positions inside a step are interpolated.
+    """
+    previous = (events[0][0], 0)
+    for event in events:
+        if event[1] >= position:
+            span = event[1] - previous[1]
+            return previous[0] + (event[0] - previous[0]) * (position - previous[1]) / span
+        previous = event
+    return None
+
+def play_clicks(profile, output, trials, load_ms, seed=0):
+    """
+    Trigger a click `trials` times into the disk driver's `output` while the
+    main thread simulates game frames that hold the interpreter for load_ms.
+    Returns the trigger times and the mixer format.
+    """
+    os.environ["SDL_AUDIODRIVER"] = "disk"
+    os.environ["SDL_DISKAUDIOFILE"] = output
+    import numpy as np
+    import pygame
+    from audio import apply_mixer_profile
+
+    apply_mixer_profile(profile)
+    pygame.mixer.init()
+    frequency, size, channels = pygame.mixer.get_init()
+    frame_bytes = channels * abs(size) // 8
+
+    # 5 ms full-scale burst on an otherwise silent stream
+    click = pygame.mixer.Sound(buffer=np.full(frequency // 200 * channels, 20000, dtype=np.int16).tobytes())
+    # Short voices also exercise pygame's channel-finished callback, which needs the GIL
+    blip = pygame.mixer.Sound(buffer=bytes(frame_bytes * 64))
+    time.sleep(0.3)
+
+    rng = random.Random(seed)
+    triggers = []
+    for _ in range(trials):
+        for _ in range(rng.randint(3, 6)):
+            # One simulated frame: game code holding the GIL, then waiting for vsync
+            frame_start = time.perf_counter()
+            while time.perf_counter() - frame_start < load_ms / 1000:
+                pass
+            blip.play()
+            time.sleep(max(0.0, 1 / FPS - (time.perf_counter() - frame_start)))
+        triggers.append(time.perf_counter())
+        click.play()
+    time.sleep(0.3)
+    pygame.mixer.quit()
+    return {"triggers": triggers, "frequency": frequency, "size": size, "channels": channels}
+
+def measure_profile(profile, trials, load_ms):
+    """Run play_clicks for one profile in a child process and time its output stream"""
+    output = tempfile.NamedTemporaryFile(suffix=".raw", delete=False).name
+    command = [sys.executable, os.path.abspath(__file__), "--child", profile, "--output", output,
+               "--trials", str(trials), "--load-ms", str(load_ms)]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+                               cwd=os.path.dirname(os.path.abspath(__file__)))
+    try:
+        events = watch_stream(output, process)
+        stdout, stderr = process.communicate()
+        lines = [line for line in stdout.splitlines() if line.startswith("{")]
+        if process.returncode or not lines or not events:
+            raise RuntimeError(stderr.strip().splitlines()[-1:] or "no output")
+        played = json.loads(lines[-1])
+        import numpy as np
+        channels = played["channels"]
+        samples = np.abs(np.fromfile(output, dtype=np.int16).reshape(-1, channels)[:, 0].astype(np.int32))
+    finally:
+        os.remove(output)
+
+    frequency = played["frequency"]
+    frame_bytes = channels * abs(played["size"]) // 8
+    rate = frequency * frame_bytes
+    buffer_frames = MIXER_PROFILES[profile]['buffer']
+    loud = samples > 10000
+    onsets = np.flatnonzero(loud[1:] & ~loud[:-1]) + 1
+    onsets = onsets * frame_bytes
+
+    # A click is heard once the buffer holding it has been handed to the
+    # device and the samples before it in that buffer have played
+    buffer_bytes = buffer_frames * frame_bytes
+    latencies = []
+    for when in played["triggers"]:
+        for onset in onsets:
+            buffer_start = onset - onset % buffer_bytes
+            handed_over = written_at(events, buffer_start + buffer_bytes)
+            if handed_over is not None and handed_over >= when:
+                latencies.append((handed_over + (onset - buffer_start) / rate - when) * 1000)
+                break
+
+    # A write arriving much later than the audio it carries lasts is a buffer
+    # the device would have run dry on (an underrun on real hardware)
+    underruns = 0
+    for (ta, sa), (tb, sb) in zip(events, events[1:]):
+        if tb - ta > (sb - sa) / rate * 1.5 + buffer_frames / frequency:
+            underruns += 1
+
+    latencies.sort()
+    return {
+        "profile": profile,
+        "buffer": buffer_frames,
+        "buffer_ms": buffer_frames / frequency * 1000,
+        "clicks": len(latencies),
+        "mean_ms": sum(latencies) / len(latencies),
+        "p95_ms": latencies[int(len(latencies) * 0.95)],
+        "max_ms": latencies[-1],
+        "underruns": underruns,
+        "seconds": events[-1][0] - events[0][0],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure trigger-to-output audio latency per mixer profile")
+    parser.add_argument("--profile", action="append", choices=list(MIXER_PROFILES),
+                        help="profile to measure (repeatable, default: all)")
+    parser.add_argument("--trials", type=int, default=40, help="clicks per profile")
+    parser.add_argument("--load-ms", type=float, default=10.0, help="simulated game work per frame")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--output", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(play_clicks(args.child, args.output, args.trials, args.load_ms)))
+        return 0
+
+    print(f"SDL disk audio driver, {args.trials} clicks, {args.load_ms:g} ms of game work per frame")
+    print(f"{'profile':>13} {'buffer':>7} {'buffer ms':>10} {'mean ms':>8} {'p95 ms':>7} {'max ms':>7} "
+          f"{'underruns':>10}")
+    for profile in args.profile or list(MIXER_PROFILES):
+        try:
+            result = measure_profile(profile, args.trials, args.load_ms)
+        except RuntimeError as error:
+            print(f"{profile:>13} failed: {error}")
+            continue
+        print(f"{profile:>13} {result['buffer']:>7} {result['buffer_ms']:>10.1f} {result['mean_ms']:>8.1f} "
+              f"{result['p95_ms']:>7.1f} {result['max_ms']:>7.1f} {result['underruns']:>10}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,884 @@
+import os
+import sys
+import math
+import time
+import random
+
+# Benchmarks run headless so they work on machines without a screen
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+from settings import *
+
+def time_call(func, repeat=5):
+    """Return the best wall-clock time of several runs, in milliseconds"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def make_wall_field(count, cell=WALL_THICKNESS * 4):
+    """Scatter one-cell walls over a world whose area grows with the count"""
+    from sprites import Wall
+    side = int((count * 4) ** 0.5) + 1
+    cells = random.sample(range(side * side), count)
+    walls = pygame.sprite.Group()
+    for index in cells:
+        walls.add(Wall((index % side) * cell, (index // side) * cell, cell, cell))
+    return walls, side * cell
+
+def bench_wall_collision():
+    """Collision cost per frame: sprite group scan vs spatial hash"""
+    from spatial_hash import SpatialHash, hits_wall
+    random.seed(1)
+    movers = 50
+    print(f"{'walls':>8} {'group ms/frame':>16} {'grid ms/frame':>15}")
+    for count in (150, 1000, 5000, 20000, 50000):
+        walls, world = make_wall_field(count)
+        grid = SpatialHash(walls)
+        probes = []
+        for _ in range(movers):
+            sprite = pygame.sprite.Sprite()
+            sprite.rect = pygame.Rect(random.randrange(world), random.randrange(world),
+                                      ENEMY_CIRCLE_SIZE, ENEMY_CIRCLE_SIZE)
+            probes.append(sprite)
+
+        def frame(target):
+            # Player does two tests per frame, each enemy one or two
+            for sprite in probes:
+                hits_wall(sprite, target)
+                hits_wall(sprite, target)
+
+        group_ms = time_call(lambda: frame(walls), repeat=3) if count <= 20000 else float("nan")
+        grid_ms = time_call(lambda: frame(grid))
+        print(f"{count:>8} {group_ms:>16.3f} {grid_ms:>15.3f}")
+
+def bench_maze_merge():
+    """Wall counts before/after merging pattern cells, plus a geometry check"""
+    from sprites import Wall
+    from maze_designer import MazeDesigner
+    random.seed(2)
+    print(f"{'pattern':>8} {'cells':>6} {'rects':>6} {'exact':>6} {'probes ok':>10}")
+    for level_num, pattern in MazeDesigner.PATTERNS.items():
+        cell_width = SCREEN_WIDTH // len(pattern[0])
+        cell_height = SCREEN_HEIGHT // len(pattern)
+        cells = MazeDesigner.wall_cells(pattern)
+        rects = MazeDesigner.merge_wall_cells(pattern)
+        exact = MazeDesigner.verify_merged_walls(pattern, rects)
+
+        per_cell = pygame.sprite.Group(
+            Wall(x * cell_width, y * cell_height, cell_width, cell_height) for x, y in cells)
+        merged, _, _ = MazeDesigner.create_maze_from_pattern(level_num)
+
+        # Any probe rect must hit the merged walls exactly when it hits a cell wall
+        probe = pygame.sprite.Sprite()
+        agree = True
+        for _ in range(20000):
+            size = random.randint(1, 40)
+            probe.rect = pygame.Rect(random.randrange(SCREEN_WIDTH), random.randrange(SCREEN_HEIGHT), size, size)
+            if (pygame.sprite.spritecollideany(probe, per_cell) is None) != \
+                    (pygame.sprite.spritecollideany(probe, merged) is None):
+                agree = False
+                break
+        print(f"{level_num:>8} {len(cells):>6} {len(merged):>6} {str(exact):>6} {str(agree):>10}")
+
+def bench_static_layer():
+    """Per-frame maze draw cost: fill + walls.draw vs one cached blit"""
+    from maze_designer import MazeDesigner
+    from game_level import render_static_layer
+    screen = pygame.display.get_surface()
+    frames = 200
+    print(f"{'level':>6} {'walls':>6} {'redraw ms/frame':>16} {'cached ms/frame':>16}")
+    for level_num in (7, 8, 9):
+        walls, _, _ = MazeDesigner.create_spiral_maze(level_num)
+        layer = render_static_layer(walls)
+
+        def redraw():
+            for _ in range(frames):
+                screen.fill(BLACK)
+                walls.draw(screen)
+
+        def cached():
+            for _ in range(frames):
+                screen.blit(layer, (0, 0))
+
+        redraw_ms = time_call(redraw) / frames
+        cached_ms = time_call(cached) / frames
+        print(f"{level_num:>6} {len(walls):>6} {redraw_ms:>16.4f} {cached_ms:>16.4f}")
+
+def bench_enemy_engine():
+    """Sprite-loop enemies vs the vectorized NumPy engine"""
+    from sprites import Enemy
+    from maze_designer import MazeDesigner
+    from enemy_engine import EnemyEngine
+    random.seed(3)
+    gather_point = (SCREEN_WIDTH - 100, SCREEN_HEIGHT - 100)
+
+    # Parity: with no re-rolls pending both implementations follow the same path
+    for hunt_mode, ticks in ((False, 50), (True, 200)):
+        enemies = [Enemy(random.randint(50, 900), random.randint(50, 700), "circle") for _ in range(200)]
+        engine = EnemyEngine(enemies)
+        for _ in range(ticks):
+            for enemy in enemies:
+                enemy.update(None, [], hunt_mode, gather_point)
+            engine.step(hunt_mode, gather_point)
+        error = max(abs(engine.pos[i, 0] - e.pos.x) + abs(engine.pos[i, 1] - e.pos.y) for i, e in enumerate(enemies))
+        print(f"parity {'hunt' if hunt_mode else 'wander'} over {ticks} ticks: max error {error:.2e}px")
+
+    walls, _, _ = MazeDesigner.create_spiral_maze(7)
+    print(f"{'enemies':>8} {'sprites ms/tick':>16} {'numpy ms/tick':>14} {'fits 60 Hz':>11}")
+    for count in (100, 1000, 10000, 50000):
+        engine = EnemyEngine.spawn(count, walls, seed=count, boss_ratio=0.05)
+        numpy_ms = time_call(lambda: [engine.step(False) for _ in range(10)], repeat=3) / 10
+        sprite_ms = float("nan")
+        if count <= 1000:
+            enemies = [Enemy(random.randint(0, SCREEN_WIDTH), random.randint(0, SCREEN_HEIGHT), "circle")
+                       for _ in range(count)]
+            sprite_ms = time_call(lambda: [e.update(None, walls, False) for e in enemies], repeat=3)
+        print(f"{count:>8} {sprite_ms:>16.3f} {numpy_ms:>14.3f} {str(numpy_ms < 1000 / 60):>11}")
+
+def bench_flow_field():
+    """Hunt-mode gathering with and without the BFS flow field"""
+    from sprites import Enemy
+    from maze_designer import MazeDesigner
+    from flow_field import FlowField
+    from spatial_hash import SpatialHash
+    from enemy_engine import EnemyEngine
+    gather_point = (SCREEN_WIDTH - 100, SCREEN_HEIGHT - 100)
+    ticks = SIMULATION_HZ * 60  # long enough to cross any of these mazes
+    print(f"{'maze':>10} {'BFS ms':>7} {'cached ms':>10} {'reachable':>10} {'gathered straight':>18} "
+          f"{'gathered flow':>14} {'engine parity':>14}")
+    mazes = [("pattern 2", MazeDesigner.create_maze_from_pattern(2)),
+             ("custom 2", MazeDesigner.create_custom_maze(2)),
+             ("spiral", MazeDesigner.create_spiral_maze(7))]
+    for name, (walls, _, _) in mazes:
+        flow_field = FlowField(walls)
+        grid = SpatialHash(walls)
+        bfs_ms = time_call(lambda: flow_field.compute(flow_field.cell_of(*gather_point)), repeat=3)
+        flow_field.field(gather_point)
+        cached_ms = time_call(lambda: flow_field.field(gather_point))
+
+        # Scatter enemies on free cells and run a full hunt mode
+        random.seed(4)
+        free = [i for i, blocked in enumerate(flow_field.blocked) if not blocked]
+        starts = []
+        for index in random.sample(free, 60):
+            x = (index % flow_field.cols) * flow_field.cell_size
+            y = (index // flow_field.cols) * flow_field.cell_size
+            starts.append((x, y))
+        directions = flow_field.field(gather_point)
+        reachable = sum(1 for x, y in starts
+                        if directions[flow_field.cell_of(x + ENEMY_CIRCLE_SIZE // 2, y + ENEMY_CIRCLE_SIZE // 2)])
+        gathered = []
+        for field in (None, flow_field):
+            enemies = [Enemy(x, y, "circle") for x, y in starts]
+            for _ in range(ticks):
+                for enemy in enemies:
+                    enemy.update(None, grid, True, gather_point, field)
+            close = sum(1 for e in enemies if math.dist(e.rect.center, gather_point) < 60)
+            gathered.append(close)
+
+        # The vectorized engine must land on the same positions
+        engine = EnemyEngine([Enemy(x, y, "circle") for x, y in starts], walls)
+        for _ in range(ticks):
+            engine.step(True, gather_point, flow_field)
+        parity = max(abs(engine.pos[i, 0] - e.pos.x) + abs(engine.pos[i, 1] - e.pos.y)
+                     for i, e in enumerate(enemies))
+        print(f"{name:>10} {bfs_ms:>7.2f} {cached_ms:>10.4f} {reachable:>7}/60 {gathered[0]:>15}/60 "
+              f"{gathered[1]:>11}/60 {parity:>11.1e}px")
+
+    # Levels build the gather point's field up front, not on the first hunt-mode step
+    from sprites import Level
+    level = Level(2)
+    first_ms = time_call(lambda: level.flow_field.field(level.gather_point), repeat=1)
+    print(f"level 2 first hunt-mode field lookup: {first_ms:.4f} ms")
+
+def bench_navigation():
+    """Navigation graph size, A* cost with and without the path cache, budget"""
+    from maze_designer import MazeDesigner
+    from navigation import NavGraph, PathService
+    random.seed(5)
+    layouts = [(f"pattern {n}", MazeDesigner.create_maze_from_pattern(n)[0]) for n in (1, 2, 3)]
+    layouts += [(f"custom {n}", MazeDesigner.create_custom_maze(n)[0]) for n in (1, 2, 3)]
+    layouts.append(("spiral", MazeDesigner.create_spiral_maze(7)[0]))
+    print(f"{'layout':>10} {'kind':>6} {'nodes':>6} {'build ms':>9} {'A* ms':>7} {'cached ms':>10} "
+          f"{'frame ms (500 req)':>19} {'searched':>9} {'deferred':>9} {'frames':>7} {'max expanded':>13}")
+    for name, walls in layouts:
+        build_ms = time_call(lambda: NavGraph(walls), repeat=3)
+        graph = NavGraph(walls)
+        pairs = [(graph.nodes[random.randrange(len(graph))].center,
+                  graph.nodes[random.randrange(len(graph))].center) for _ in range(200)]
+
+        service = PathService(graph, budget=10 ** 9)
+        cold_ms = time_call(lambda: [service.node_path(graph.node_at(*a), graph.node_at(*b)) for a, b in pairs],
+                            repeat=1) / len(pairs)
+        for a, b in pairs:
+            service.find_path(a, b)
+        cached_ms = time_call(lambda: [service.find_path(a, b) for a, b in pairs]) / len(pairs)
+
+        # One frame in which 500 enemies ask for a path at once
+        service = PathService(graph)
+        requests = [(graph.nodes[random.randrange(len(graph))].center, service.random_goal()) for _ in range(500)]
+        service.begin_frame()
+        start = time.perf_counter()
+        for a, b in requests:
+            service.find_path(a, b)
+        frame_ms = (time.perf_counter() - start) * 1000
+        searched, deferred = service.searches, service.deferred
+
+        # Deferred requests are asked again every frame until they all resolve
+        waiting = [(a, b) for a, b in requests if service.find_path(a, b) is None]
+        frames = 1
+        while waiting:
+            service.begin_frame()
+            frames += 1
+            waiting = [(a, b) for a, b in waiting if service.find_path(a, b) is None]
+        service.begin_frame()
+        assert service.max_frame_expansions <= service.budget, "a frame expanded more nodes than its budget"
+        print(f"{name:>10} {graph.kind:>6} {len(graph):>6} {build_ms:>9.2f} {cold_ms:>7.3f} {cached_ms:>10.4f} "
+              f"{frame_ms:>19.2f} {searched:>9} {deferred:>9} {frames:>7} {service.max_frame_expansions:>13}")
+
+def bench_scene_switch():
+    """Scene switch + first frame: fresh scene objects vs the warm scene manager"""
+    from lobby import Lobby
+    from levels import LevelSelection
+    from options import Options
+    from game_level import GameLevel
+    from main import Game
+    screen = pygame.display.get_surface()
+    clock = pygame.time.Clock()
+    budget_ms = 1000 / FPS
+    factories = {
+        "lobby": lambda: Lobby(),
+        "levels": lambda: LevelSelection(),
+        "options": lambda: Options(),
+        "level_1": lambda: GameLevel(1),
+    }
+    game = Game.__new__(Game)
+    game.screen, game.clock = screen, clock
+    game.current_state = "lobby"
+    game.scenes = {"lobby": Lobby(screen, clock), "levels": LevelSelection(screen, clock),
+                   "options": Options(screen, clock)}
+    print(f"{'scene':>8} {'recreate ms':>12} {'manager ms':>11} {'within frame':>13}")
+    for state, factory in factories.items():
+        def recreate():
+            scene = factory()
+            scene.enter()
+            scene.render()
+
+        def switch():
+            game.switch(state)
+            game.scene.render()
+
+        recreate_ms = time_call(recreate, repeat=3)
+        switch_ms = time_call(switch, repeat=3)
+        print(f"{state:>8} {recreate_ms:>12.2f} {switch_ms:>11.2f} {str(switch_ms < budget_ms):>13}")
+
+def bench_level_load():
+    """Level load time: full rebuild vs cached template vs GameLevel.reset()"""
+    from sprites import Level
+    from game_level import GameLevel
+    from headless import ScriptedKeys
+    screen = pygame.display.get_surface()
+    print(f"{'level':>6} {'rebuild ms':>11} {'template ms':>12} {'reset ms':>9} {'same start':>11}")
+    for level_num in range(1, 10):
+        def rebuild():
+            Level.templates.clear()
+            GameLevel(level_num, screen=screen)
+
+        rebuild_ms = time_call(rebuild, repeat=3)
+        template_ms = time_call(lambda: GameLevel(level_num, screen=screen))
+
+        # Play until something changed, then check reset restores the start
+        game = GameLevel(level_num, screen=screen)
+        start = [enemy.rect.topleft for enemy in game.level.enemies] + [game.player.rect.topleft]
+        game.try_activate_hunt_mode()
+        for _ in range(SIMULATION_HZ * 3):
+            game.step(ScriptedKeys([pygame.K_RIGHT]))
+        reset_ms = time_call(game.reset)
+        same = start == [enemy.rect.topleft for enemy in game.level.enemies] + [game.player.rect.topleft]
+        print(f"{level_num:>6} {rebuild_ms:>11.2f} {template_ms:>12.2f} {reset_ms:>9.3f} {str(same):>11}")
+
+def bench_level_file():
+    """Building levels from code/patterns vs memory-mapped level files"""
+    from sprites import Level
+    from maze_designer import MazeDesigner
+    from level_format import level_path, load_level_file, compile_pattern
+    print(f"{'source':>10} {'build ms':>9} {'file ms':>8} {'decode ms':>10}")
+    for level_num in (1, 3, 9):
+        build_ms = time_call(lambda: Level(level_num, use_level_file=False))
+        file_ms = time_call(lambda: Level(level_num))
+        decode_ms = time_call(lambda: load_level_file(level_path(level_num)))
+        print(f"{f'level {level_num}':>10} {build_ms:>9.2f} {file_ms:>8.2f} {decode_ms:>10.3f}")
+    for level_num, pattern in MazeDesigner.PATTERNS.items():
+        path = os.path.join(LEVEL_DATA_DIR, f"pattern_{level_num}.mzl")
+        parse_ms = time_call(lambda: (compile_pattern(pattern), MazeDesigner.merge_wall_cells(pattern)))
+        decode_ms = time_call(lambda: load_level_file(path))
+        build_ms = time_call(lambda: MazeDesigner.create_maze_from_pattern(level_num))
+        print(f"{f'pattern {level_num}':>10} {build_ms:>9.2f} {'':>8} {decode_ms:>10.3f}  (text parse {parse_ms:.3f} ms)")
+
+def bench_maze_generator():
+    """Procedural maze generation time and peak memory by grid size"""
+    import tracemalloc
+    from maze_designer import MazeDesigner
+    from level_format import compile_pattern
+    print(f"{'grid':>10} {'generate ms':>12} {'per Mcell ms':>13} {'compile+merge ms':>17} "
+          f"{'wall rects':>11} {'peak MB':>8} {'Level ms':>9}")
+    for cols, rows in ((19, 13), (101, 101), (501, 501), (1001, 1001), (2000, 2000)):
+        repeat = 3 if cols <= 501 else 1
+        generate_ms = time_call(lambda: MazeDesigner.generate_pattern(cols, rows, seed=1, enemies=20), repeat)
+        pattern = MazeDesigner.generate_pattern(cols, rows, seed=1, enemies=20)
+        start = time.perf_counter()
+        compile_pattern(pattern)
+        rects = MazeDesigner.merge_wall_cells(pattern)
+        merge_ms = (time.perf_counter() - start) * 1000
+
+        del pattern
+        tracemalloc.start()
+        MazeDesigner.generate_pattern(cols, rows, seed=1, enemies=20)
+        peak_mb = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        tracemalloc.stop()
+
+        # Full walls/enemies/player structure, for grids that still fit the screen
+        level_ms = float("nan")
+        if cols <= 101:
+            level_ms = time_call(lambda: MazeDesigner.create_generated_maze(9, cols, rows, cell_size=16), repeat=1)
+        per_mcell = generate_ms / (cols * rows / 1e6)
+        print(f"{f'{cols}x{rows}':>10} {generate_ms:>12.1f} {per_mcell:>13.0f} {merge_ms:>17.1f} "
+              f"{len(rects):>11} {peak_mb:>8.1f} {level_ms:>9.1f}")
+
+def bench_camera():
+    """Scrolling a large maze: drawing every wall vs cached visible chunks"""
+    from maze_designer import MazeDesigner
+    from camera import Camera, ChunkedLayer
+    screen = pygame.display.get_surface()
+    frames = 600
+    print(f"{'world px':>9} {'walls':>6} {'all walls ms':>13} {'chunks ms':>10} {'misses':>7} "
+          f"{'cache MB':>9} {'max MB':>7}")
+    for cols in (41, 101, 201):
+        walls, enemies, player = MazeDesigner.create_generated_maze(9, cols, cols, cell_size=48)
+        world = pygame.Rect(0, 0, SCREEN_WIDTH, SCREEN_HEIGHT).unionall([wall.rect for wall in walls])
+        camera = Camera(world)
+        layer = ChunkedLayer(walls, world)
+
+        # The camera pans diagonally, then back, like a player crossing the maze
+        path = [pygame.Rect(i * 8, i * 6, 1, 1) for i in range(frames // 2)]
+        path += path[::-1]
+
+        def all_walls():
+            for target in path:
+                camera.follow(target)
+                screen.fill(BLACK)
+                for wall in walls:
+                    screen.blit(wall.image, camera.apply(wall.rect))
+
+        def chunks():
+            for target in path:
+                camera.follow(target)
+                layer.draw(screen, camera.view)
+
+        all_ms = time_call(all_walls, repeat=1) / frames
+        layer.misses = 0
+        chunk_ms = time_call(chunks, repeat=1) / frames
+        max_mb = CHUNK_CACHE_SIZE * CHUNK_SIZE * CHUNK_SIZE * screen.get_bytesize() / 2 ** 20
+        print(f"{world.width:>9} {len(walls):>6} {all_ms:>13.3f} {chunk_ms:>10.3f} {layer.misses:>7} "
+              f"{layer.cache_bytes() / 2 ** 20:>9.1f} {max_mb:>7.1f}")
+
+def streaming_child(mode, world_path, ticks=6000):
+    """One measured run in a fresh process (so peak RSS is per mode)"""
+    import resource
+    from sprites import Level
+    from game_level import GameLevel
+    if mode == "streamed":
+        from chunk_stream import StreamedLevel
+        level = StreamedLevel(world_path, seed=1)
+    else:
+        from maze_designer import MazeDesigner
+        pattern = MazeDesigner.generate_pattern(1000, 1000, seed=6, enemies=5000)
+        level = Level(0, layout=MazeDesigner.create_maze_from_pattern(7, pattern, cell_size=48))
+        del pattern
+    game = GameLevel(7, level=level)
+    frames = []
+    for tick in range(ticks):
+        # The player crosses the maze diagonally (walls ignored) at twice its speed
+        level.player.set_position(100 + tick * PLAYER_SPEED * 1.4, 100 + tick * PLAYER_SPEED * 1.4)
+        start = time.perf_counter()
+        game.step()
+        game.draw()
+        frames.append((time.perf_counter() - start) * 1000)
+    frames.sort()
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    stats = [len(level.walls), len(level.enemies), level.enemies_left(), peak_mb,
+             frames[len(frames) // 2], frames[int(len(frames) * 0.99)], frames[-1],
+             sum(1 for frame in frames if frame > 1000 / FPS)]
+    if mode == "streamed":
+        stats += [level.streamer.loads, level.streamer.evictions, level.streamer.frozen_bytes()]
+    game.close()
+    print(" ".join(f"{value:.2f}" if isinstance(value, float) else str(value) for value in stats))
+
+def bench_streaming():
+    """1000x1000 maze: streamed chunks vs everything resident (peak RSS, hitches)"""
+    import subprocess
+    import tempfile
+    from maze_designer import MazeDesigner
+    from level_format import encode_world, write_level_file
+    with tempfile.TemporaryDirectory() as directory:
+        world_path = os.path.join(directory, "world_7.mzw")
+        pattern = MazeDesigner.generate_pattern(1000, 1000, seed=6, enemies=5000)
+        write_level_file(world_path, encode_world(7, pattern, 48))
+        del pattern
+        print(f"world file: {os.path.getsize(world_path) / 2 ** 20:.1f} MB")
+        print(f"{'mode':>9} {'walls':>7} {'enemies':>8} {'alive':>6} {'peak MB':>8} {'p50 ms':>7} {'p99 ms':>7} "
+              f"{'max ms':>7} {'>16.7ms':>8} {'loads':>6} {'evicted':>8} {'frozen B':>9}")
+        for mode in ("streamed", "resident"):
+            code = f"import benchmarks; benchmarks.streaming_child({mode!r}, {world_path!r})"
+            output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                                    cwd=os.path.dirname(os.path.abspath(__file__))).stdout.split()
+            values = output[-11:] if mode == "streamed" else output[-8:] + ["-"] * 3
+            walls, enemies, alive, peak, p50, p99, worst, hitches, loads, evicted, frozen = values
+            print(f"{mode:>9} {walls:>7} {enemies:>8} {alive:>6} {peak:>8} {p50:>7} {p99:>7} {worst:>7} "
+                  f"{hitches:>8} {loads:>6} {evicted:>8} {frozen:>9}")
+
+def bench_sprite_blit():
+    """Sprite startup (decode + scale vs cached atlas) and blits per frame"""
+    import contextlib
+    import io
+    import tempfile
+    from sprite_loader import SpriteLoader
+    screen = pygame.display.get_surface()
+    with tempfile.TemporaryDirectory() as images_path:
+        # Synthetic full-size artwork, like sprites exported from an editor
+        rng = random.Random(1)
+        names = {"player": True, "enemy_circle": True, "enemy_square": True, "enemy_triangle": True,
+                 "boss_circle": True, "boss_square": True, "boss_triangle": True,
+                 "wall": False, "background": False}
+        for name, alpha in names.items():
+            size = (SCREEN_WIDTH, SCREEN_HEIGHT) if name == "background" else (512, 512)
+            image = pygame.Surface(size, pygame.SRCALPHA if alpha else 0)
+            for _ in range(200):
+                color = [rng.randrange(256) for _ in range(4)]
+                pygame.draw.circle(image, color, (rng.randrange(size[0]), rng.randrange(size[1])), rng.randrange(8, 64))
+            pygame.image.save(image, os.path.join(images_path, f"{name}.png"))
+        cache_path = os.path.join(images_path, "cache", "sprite_atlas.bin")
+
+        def load():
+            with contextlib.redirect_stdout(io.StringIO()):
+                loader = SpriteLoader(images_path, cache_path)
+                loader.load_sprites()
+                return loader
+
+        cold_ms = time_call(lambda: (os.path.exists(cache_path) and os.remove(cache_path), load()), repeat=3)
+        load()
+        warm_ms = time_call(load, repeat=3)
+        print(f"startup: decode + scale {cold_ms:.1f} ms, cached atlas {warm_ms:.1f} ms")
+
+        # Blit cost: images as pygame.image.load leaves them vs display-format atlas
+        loader = load()
+        raw = {name: loader.sprites[name].copy() for name in names if name != "background"}
+        atlas = {name: loader.get_sprite(name) for name in raw}
+        positions = [(rng.randrange(SCREEN_WIDTH), rng.randrange(SCREEN_HEIGHT)) for _ in range(2000)]
+        frames = 60
+
+        def blit_all(sprites):
+            images = list(sprites.values())
+            for _ in range(frames):
+                for index, position in enumerate(positions):
+                    screen.blit(images[index % len(images)], position)
+
+        raw_ms = time_call(lambda: blit_all(raw), repeat=3) / frames
+        atlas_ms = time_call(lambda: blit_all(atlas), repeat=3) / frames
+        print(f"{len(positions)} blits/frame: unconverted {raw_ms:.2f} ms, atlas {atlas_ms:.2f} ms "
+              f"({raw_ms / atlas_ms:.1f}x)")
+
+def bench_wall_variants():
+    """Wall construction: one scaled surface per wall vs the shared variant cache"""
+    from sprites import Wall
+    from maze_designer import MazeDesigner
+    from sprite_loader import sprite_loader, surface_bytes
+    rects = []
+    for level_num in range(1, 10):
+        walls = MazeDesigner.create_maze_from_pattern(level_num)[0]
+        rects.extend(tuple(wall.rect) for wall in walls)
+
+    def per_wall():
+        images = []
+        for x, y, w, h in rects:
+            images.append(pygame.transform.scale(sprite_loader.get_wall_sprite(), (w, h)))
+        return images
+
+    def shared():
+        return [Wall(*rect).image for rect in rects]
+
+    variants = sprite_loader.variants
+    variants.clear()
+    variants.hits = variants.misses = 0
+    per_wall_ms = time_call(per_wall)
+    shared_ms = time_call(shared)
+    old_images = per_wall()
+    new_images = shared()
+    unique = {id(image): image for image in new_images}
+    print(f"{len(rects)} walls (levels 1-9)")
+    print(f"per wall: {per_wall_ms:.2f} ms, {len(old_images)} surfaces, "
+          f"{sum(map(surface_bytes, old_images)) / 1024:.0f} KB")
+    print(f"shared:   {shared_ms:.2f} ms, {len(unique)} surfaces, "
+          f"{sum(map(surface_bytes, unique.values())) / 1024:.0f} KB")
+    print(f"variant cache: hit rate {variants.hit_rate():.1%}, {variants.bytes / 1024:.0f} KB "
+          f"of {variants.budget / 2 ** 20:.0f} MB budget, {variants.evictions} evictions")
+
+def bench_sprite_lookup():
+    """get_sprite cost: eager fallback argument vs the memoized registry"""
+    import contextlib
+    import io
+    import tempfile
+    from sprite_loader import SpriteLoader
+    names = list(SpriteLoader.SPRITE_FILES)
+    lookups = 100000
+    with tempfile.TemporaryDirectory() as images_path, contextlib.redirect_stdout(io.StringIO()):
+        loader = SpriteLoader(images_path, os.path.join(images_path, "atlas.bin"))
+
+        def eager():
+            # What get_sprite used to do: build a default surface on every call
+            for index in range(lookups):
+                name = names[index % len(names)]
+                loader.sprites.get(name, loader.create_default_sprite(name))
+
+        def registry():
+            for index in range(lookups):
+                loader.get_sprite(names[index % len(names)])
+
+        registry_ms = time_call(registry, repeat=3)
+        eager_ms = time_call(eager, repeat=3)
+    print(f"{lookups} lookups: eager default {eager_ms:.1f} ms, registry {registry_ms:.1f} ms "
+          f"({eager_ms / registry_ms:.0f}x)")
+    print(f"registry: {loader.loads} loads, {loader.misses} misses, {loader.placeholders} placeholders")
+
+# Runs in a fresh interpreter that has imported nothing but time
+STARTUP_CHILD = """
+import time
+start = time.perf_counter()
+import sys
+import main
+imported = time.perf_counter()
+game = main.Game()
+game.scene.enter()
+game.scene.advance(0.0)
+game.scene.render()
+done = time.perf_counter()
+print(f"{(imported - start) * 1000:.1f} {(done - imported) * 1000:.1f} {(done - start) * 1000:.1f} "
+      f"{'numpy' in sys.modules} {main.pygame.mixer.get_init() is not None}")
+"""
+
+def bench_startup():
+    """Cold start: process launch to first lobby frame (fresh interpreter each run)"""
+    import subprocess
+    runs = []
+    for _ in range(5):
+        start = time.perf_counter()
+        output = subprocess.run([sys.executable, "-c", STARTUP_CHILD], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.split()
+        runs.append(((time.perf_counter() - start) * 1000, output[-5:]))
+    wall, (import_ms, init_ms, total_ms, numpy_loaded, mixer_ready) = min(runs)
+    print(f"process start to first lobby frame: {wall:.1f} ms (best of {len(runs)})")
+    print(f"in process: imports {import_ms} ms, Game() + first frame {init_ms} ms, total {total_ms} ms")
+    print(f"numpy imported: {numpy_loaded}, mixer initialized: {mixer_ready}")
+
+def bench_music_switch():
+    """Hunt-mode music switch: mixer.music.load from disk vs preloaded crossfade"""
+    import array
+    import tempfile
+    import wave
+    from audio import AudioManager
+    with tempfile.TemporaryDirectory() as sounds_path:
+        # 20 s stereo tracks, distinct so a resumed position can be checked
+        frequency = 44100
+        for index, name in enumerate(("lobby_music", "level_music", "hunt_music", "boss_music")):
+            samples = array.array("h", [(frame * (index + 1)) % 3000 for frame in range(frequency * 20)
+                                        for _ in range(2)])
+            with wave.open(os.path.join(sounds_path, f"{name}.wav"), "wb") as file:
+                file.setnchannels(2)
+                file.setsampwidth(2)
+                file.setframerate(frequency)
+                file.writeframes(samples.tobytes())
+        level_path = os.path.join(sounds_path, "level_music.wav")
+        hunt_path = os.path.join(sounds_path, "hunt_music.wav")
+
+        def streamed_switch(path):
+            pygame.mixer.music.load(path)
+            pygame.mixer.music.play(-1)
+
+        manager = AudioManager(sounds_path)
+        start = time.perf_counter()
+        manager.ensure_ready()
+        preload_ms = (time.perf_counter() - start) * 1000
+        switches = 8
+        streamed, preloaded = [], []
+        for index in range(switches):
+            path = hunt_path if index % 2 == 0 else level_path
+            start = time.perf_counter()
+            streamed_switch(path)
+            streamed.append((time.perf_counter() - start) * 1000)
+        pygame.mixer.music.stop()
+        for index in range(switches):
+            name = "hunt_music" if index % 2 == 0 else "level_music"
+            for _ in range(80):  # Frames of play between switches
+                time.sleep(1 / FPS)
+                manager.update()
+            start = time.perf_counter()
+            manager.play_music(name)
+            preloaded.append((time.perf_counter() - start) * 1000)
+        player = manager.music_player
+        print(f"preload at first use: {preload_ms:.1f} ms for {len(player.tracks)} tracks")
+        print(f"mixer.music.load + play: mean {sum(streamed) / switches:.3f} ms, max {max(streamed):.3f} ms")
+        print(f"preloaded crossfade:     mean {sum(preloaded) / switches:.3f} ms, max {max(preloaded):.3f} ms")
+        print(f"{player.switches} switches, {player.resumes} resumed mid-track, "
+              f"level_music left at segment {player.positions['level_music']}")
+
+        # Switching late in a segment must still let the old track fade for the whole crossfade
+        fades = []
+        for offset in (0.3, 0.6, 0.7, 0.8, 0.85, 0.95):
+            manager.play_music("level_music")
+            manager.update()
+            channel = player.channel
+            sound = channel.get_sound()
+            while channel.get_sound() is sound:
+                time.sleep(0.001)
+                manager.update()
+            time.sleep(offset * MUSIC_SEGMENT_SECONDS)
+            start = time.perf_counter()
+            manager.play_music("hunt_music")
+            level_segments = player.tracks["level_music"]
+            audible = 0.0
+            while time.perf_counter() - start < MUSIC_CROSSFADE_MS / 1000 * 2:
+                manager.update()
+                if channel.get_busy() and channel.get_sound() in level_segments and channel.get_volume() > 0:
+                    audible = time.perf_counter() - start
+                time.sleep(1 / FPS)
+            fades.append(audible * 1000)
+            manager.stop_music()
+        print("old track audible after a switch at 0.3/0.6/0.7/0.8/0.85/0.95 of a segment: "
+              + "/".join(f"{fade:.0f}" for fade in fades) + f" ms (crossfade {MUSIC_CROSSFADE_MS} ms)")
+        assert min(fades) >= MUSIC_CROSSFADE_MS - 2000 / FPS, "the outgoing track was cut before its fade ended"
+
+        # The fade-out is stepped by update(): how far the old track's volume lags a
+        # sample-accurate linear ramp, at 60 FPS and with one 100 ms frame mid-fade
+        lags = []
+        for stall in (0.0, 0.1):
+            manager.play_music("level_music")
+            time.sleep(0.5)
+            manager.update()
+            channel = player.channel
+            full = channel.get_volume()
+            start = time.perf_counter()
+            manager.play_music("hunt_music")
+            lag = 0.0
+            stalled = False
+            while (elapsed := time.perf_counter() - start) < MUSIC_CROSSFADE_MS / 1000:
+                ideal = full * (1 - elapsed / (MUSIC_CROSSFADE_MS / 1000))
+                if channel.get_busy():
+                    lag = max(lag, (channel.get_volume() - ideal) / full)
+                manager.update()
+                if stall and not stalled and elapsed > 0.1:
+                    time.sleep(stall)
+                    stalled = True
+                else:
+                    time.sleep(1 / FPS)
+            lags.append(lag * 100)
+            manager.stop_music()
+        print(f"fade-out lag behind a linear ramp: {lags[0]:.0f}% of full volume at {FPS} FPS, "
+              f"{lags[1]:.0f}% with one 100 ms frame")
+        manager.stop_music()
+
+def bench_sound_pool():
+    """Hunt-mode kill burst: Sound.play() on any free channel vs the channel pool"""
+    from audio import ChannelPool
+    if not pygame.mixer.get_init():
+        pygame.mixer.init()
+    _, size, channels = pygame.mixer.get_init()
+    names = ("enemy_death", "footstep", "player_hit", "hunt_mode_start", "level_complete")
+    sounds = {name: pygame.mixer.Sound(buffer=bytes(22050 * channels * abs(size) // 8)) for name in names}
+
+    # 60 frames: footsteps throughout, then clusters of 12 kills per frame
+    frames = []
+    for frame in range(60):
+        triggers = ["footstep"]
+        if 10 <= frame < 30:
+            triggers += ["enemy_death"] * 12
+        if frame == 10:
+            triggers.append("hunt_mode_start")
+        if frame in (15, 25):
+            triggers.append("player_hit")
+        if frame == 29:
+            triggers.append("level_complete")
+        frames.append(triggers)
+    important = {"player_hit", "hunt_mode_start", "level_complete"}
+
+    def run(play, begin_frame=lambda: None):
+        pygame.mixer.stop()
+        calls = lost = peak = 0
+        start = time.perf_counter()
+        for triggers in frames:
+            begin_frame()
+            for name in triggers:
+                calls += 1
+                if play(name) is None and name in important:
+                    lost += 1
+            peak = max(peak, sum(pygame.mixer.Channel(index).get_busy() for index in range(SFX_CHANNELS)))
+        elapsed = (time.perf_counter() - start) * 1e6 / calls
+        pygame.mixer.stop()
+        return elapsed, lost, peak
+
+    pygame.mixer.set_num_channels(SFX_CHANNELS)
+    pygame.mixer.set_reserved(0)
+
+    def shared_sound(name):
+        sounds[name].set_volume(0.5)
+        return sounds[name].play()
+
+    naive_us, naive_lost, naive_peak = run(shared_sound)
+    pool = ChannelPool(0)
+    pool_us, pool_lost, pool_peak = run(lambda name: pool.play(name, sounds[name], 0.5), pool.begin_frame)
+    print(f"{'':>12} {'us/call':>8} {'important lost':>15} {'peak voices':>12}")
+    print(f"{'Sound.play':>12} {naive_us:>8.1f} {naive_lost:>15} {naive_peak:>12}")
+    print(f"{'pool':>12} {pool_us:>8.1f} {pool_lost:>15} {pool_peak:>12}")
+    print(f"pool: {pool.played} played, {pool.deduplicated} deduplicated, {pool.stolen} stolen, "
+          f"{pool.dropped} dropped")
+
+def bench_sound_generation():
+    """generate_sounds: per-sample loops (old script) vs vectorized, parallel, hashed"""
+    import struct
+    import tempfile
+    import wave
+    import numpy as np
+    import generate_sounds
+
+    def legacy_generate(spec, filepath):
+        # The original script: a Python loop per sample and per WAV frame
+        frames = int(spec['duration'] * 44100)
+        frequency = spec.get('frequency', spec.get('start', spec.get('notes', [0])[0]))
+        arr = np.zeros((frames, 2))
+        for i in range(frames):
+            arr[i][0] = spec['volume'] * np.sin(2 * np.pi * frequency * i / 44100)
+            arr[i][1] = spec['volume'] * np.sin(2 * np.pi * frequency * i / 44100)
+        data = (arr * 32767).astype(np.int16)
+        with wave.open(filepath, 'w') as wav_file:
+            wav_file.setnchannels(2)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(44100)
+            sound_bytes = b''
+            for frame in data:
+                sound_bytes += struct.pack('<hh', int(frame[0]), int(frame[1]))
+            wav_file.writeframes(sound_bytes)
+
+    specs = generate_sounds.SOUND_SPECS
+    seconds = sum(spec['duration'] for spec in specs.values())
+    with tempfile.TemporaryDirectory() as path:
+        start = time.perf_counter()
+        for filename, spec in specs.items():
+            legacy_generate(spec, os.path.join(path, "legacy_" + filename))
+        legacy_ms = (time.perf_counter() - start) * 1000
+
+        def generate(jobs, force=True):
+            return generate_sounds.generate_all(path, jobs=jobs, force=force)
+
+        serial_ms = time_call(lambda: generate(1), repeat=3)
+        parallel_ms = time_call(lambda: generate(2), repeat=3)
+        cached_ms = time_call(lambda: generate(None, force=False), repeat=3)
+        _, up_to_date = generate(None, force=False)
+
+        # Same total audio, 40x longer, to show where the process pool pays off
+        long_specs = {f"long_{index}_{name}": dict(spec, duration=spec['duration'] * 40)
+                      for index in range(2) for name, spec in specs.items()}
+        long_serial_ms = time_call(lambda: generate_sounds.generate_all(
+            path, long_specs, jobs=1, force=True), repeat=1)
+        workers = max(2, os.cpu_count() or 1)
+        long_parallel_ms = time_call(lambda: generate_sounds.generate_all(
+            path, long_specs, jobs=workers, force=True), repeat=1)
+    print(f"{len(specs)} sounds, {seconds:.1f} s of audio")
+    print(f"old script:            {legacy_ms:8.1f} ms")
+    print(f"vectorized, 1 process: {serial_ms:8.1f} ms")
+    print(f"vectorized, 2 workers: {parallel_ms:8.1f} ms")
+    print(f"unchanged (hash hit):  {cached_ms:8.1f} ms ({up_to_date} up to date)")
+    print(f"{len(long_specs)} long sounds ({seconds * 80:.0f} s): 1 process {long_serial_ms:.1f} ms, "
+          f"{workers} workers {long_parallel_ms:.1f} ms on {os.cpu_count()} CPUs")
+
+def bench_audio_synthesis():
+    """Missing sounds/music: synthesized in the background, then from the PCM cache"""
+    import tempfile
+    from audio import AudioManager, AudioSynthesizer
+    with tempfile.TemporaryDirectory() as cache_dir:
+        print(f"{'run':>6} {'prepare ms':>11} {'all ready ms':>13} {'worst install ms':>17} "
+              f"{'synthesized':>12} {'cached':>7}")
+        for run in ("cold", "warm"):
+            manager = AudioManager()
+            manager.synthesizer = AudioSynthesizer(cache_dir)
+            missing = manager.missing_files()
+            start = time.perf_counter()
+            manager.prepare()
+            prepare_ms = (time.perf_counter() - start) * 1000
+            manager.ensure_ready()
+            installs = []
+            while len(installs) < len(missing):
+                before = manager.synthesizer.finished.qsize()
+                tick = time.perf_counter()
+                manager.update()
+                if before:
+                    installs.append((time.perf_counter() - tick) * 1000)
+                time.sleep(0.001)
+            ready_ms = (time.perf_counter() - start) * 1000
+            synthesizer = manager.synthesizer
+            print(f"{run:>6} {prepare_ms:>11.2f} {ready_ms:>13.1f} {max(installs):>17.2f} "
+                  f"{synthesizer.synthesized:>12} {synthesizer.cache_hits:>7}")
+            manager.stop_music()
+        print(f"missing files: {', '.join(missing)}")
+
+        # A cache folder that cannot be created fails every file, but each one is reported
+        blocker = os.path.join(cache_dir, "not_a_directory")
+        open(blocker, "w").close()
+        synthesizer = AudioSynthesizer(os.path.join(blocker, "audio"))
+        synthesizer.start(missing)
+        deadline = time.perf_counter() + 10
+        while synthesizer.failed < len(missing) and time.perf_counter() < deadline:
+            time.sleep(0.01)
+        print(f"unwritable cache: {synthesizer.failed}/{len(missing)} failures reported")
+
+BENCHMARKS = {
+    "collision": bench_wall_collision,
+    "maze_merge": bench_maze_merge,
+    "static_layer": bench_static_layer,
+    "enemy_engine": bench_enemy_engine,
+    "flow_field": bench_flow_field,
+    "navigation": bench_navigation,
+    "scene_switch": bench_scene_switch,
+    "level_load": bench_level_load,
+    "level_file": bench_level_file,
+    "maze_generator": bench_maze_generator,
+    "camera": bench_camera,
+    "streaming": bench_streaming,
+    "sprite_blit": bench_sprite_blit,
+    "wall_variants": bench_wall_variants,
+    "sprite_lookup": bench_sprite_lookup,
+    "startup": bench_startup,
+    "music_switch": bench_music_switch,
+    "sound_pool": bench_sound_pool,
+    "sound_generation": bench_sound_generation,
+    "audio_synthesis": bench_audio_synthesis,
+}
+
+def main():
+    pygame.init()
+    pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            print(f"Unknown benchmark: {name} (available: {', '.join(BENCHMARKS)})")
+            continue
+        print(f"== {name} ==")
+        BENCHMARKS[name]()
+    pygame.quit()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+from collections import OrderedDict
+import pygame
+from settings import *
+from spatial_hash import SpatialHash
+
+class Camera:
+    """
+    Screen-sized viewport into a world that may be larger than the screen.
+    The view follows a target rect and never leaves the world.
+    """
+
+    def __init__(self, world_rect, width=SCREEN_WIDTH, height=SCREEN_HEIGHT):
+        self.world_rect = pygame.Rect(world_rect)
+        self.view = pygame.Rect(self.world_rect.x, self.world_rect.y, width, height)
+
+    def follow(self, rect):
+        """Center the view on a rect; returns True when the view moved"""
+        old_topleft = self.view.topleft
+        self.view.center = rect.center
+        world = self.world_rect
+        self.view.x = max(world.left, min(self.view.x, world.right - self.view.width))
+        self.view.y = max(world.top, min(self.view.y, world.bottom - self.view.height))
+        if self.view.width >= world.width:
+            self.view.x = world.x
+        if self.view.height >= world.height:
+            self.view.y = world.y
+        return self.view.topleft != old_topleft
+
+    def apply(self, rect):
+        """World rect to screen coordinates"""
+        return rect.move(-self.view.x, -self.view.y)
+
+    def is_visible(self, rect):
+        """True when a world rect overlaps the view"""
+        return self.view.colliderect(rect)
+
+class ChunkedLayer:
+    """
+    Walls and background of a large world, pre-rendered in fixed-size chunks.
+
+    Chunks are rendered the first time they come into view and kept in an
+    LRU cache bounded by cache_size, so a frame only blits the few chunks
+    under the camera and memory stays flat however big the world is.
+    """
+
+    def __init__(self, walls, world_rect, background=None, chunk_size=CHUNK_SIZE, cache_size=CHUNK_CACHE_SIZE):
+        self.world_rect = pygame.Rect(world_rect)
+        self.chunk_size = chunk_size
+        self.cache_size = cache_size
+        self.walls = SpatialHash(walls, cell_size=chunk_size)
+        self.background = None
+        if background is not None:
+            self.background = pygame.transform.scale(background, (SCREEN_WIDTH, SCREEN_HEIGHT))
+        self.chunks = OrderedDict()
+
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+
+    def chunk_keys(self, view):
+        """Chunk coordinates overlapping a world-space view rect"""
+        view = view.clip(self.world_rect)
+        size = self.chunk_size
+        x0, y0 = view.left // size, view.top // size
+        x1, y1 = (view.right - 1) // size, (view.bottom - 1) // size
+        return [(cx, cy) for cy in range(y0, y1 + 1) for cx in range(x0, x1 + 1)]
+
+    def render_chunk(self, key):
+        """Draw the background and walls that fall inside one chunk"""
+        size = self.chunk_size
+        chunk_rect = pygame.Rect(key[0] * size, key[1] * size, size, size)
+        surface = pygame.Surface((size, size)).convert()
+        surface.fill(BLACK)
+
+        # The screen-sized background repeats across the world
+        if self.background is not None:
+            tile_w, tile_h = self.background.get_size()
+            start_x = chunk_rect.x - chunk_rect.x % tile_w
+            start_y = chunk_rect.y - chunk_rect.y % tile_h
+            for tile_y in range(start_y, chunk_rect.bottom, tile_h):
+                for tile_x in range(start_x, chunk_rect.right, tile_w):
+                    surface.blit(self.background, (tile_x - chunk_rect.x, tile_y - chunk_rect.y))
+
+        for wall in self.walls.query(chunk_rect):
+            surface.blit(wall.image, wall.rect.move(-chunk_rect.x, -chunk_rect.y))
+        return surface
+
+    def get_chunk(self, key):
+        """Cached chunk surface, rendering it on a miss"""
+        surface = self.chunks.get(key)
+        if surface is not None:
+            self.chunks.move_to_end(key)
+            self.hits += 1
+            return surface
+        self.misses += 1
+        surface = self.render_chunk(key)
+        self.chunks[key] = surface
+        if len(self.chunks) > self.cache_size:
+            self.chunks.popitem(last=False)
+        return surface
+
+    def draw(self, surface, view):
+        """Blit the chunks under the view"""
+        size = self.chunk_size
+        for key in self.chunk_keys(view):
+            surface.blit(self.get_chunk(key), (key[0] * size - view.x, key[1] * size - view.y))
+
+    def invalidate(self):
+        """Drop every cached chunk (call when the walls change)"""
+        self.chunks.clear()
+
+    def update_walls(self, added=(), removed=()):
+        """Apply streamed wall changes, dropping only the chunks they touch"""
+        stale = set()
+        for wall in removed:
+            self.walls.remove(wall)
+            x0, y0, x1, y1 = self.walls.cell_range(wall.rect)
+            stale.update((cx, cy) for cx in range(x0, x1 + 1) for cy in range(y0, y1 + 1))
+        for wall in added:
+            self.walls.insert(wall)
+            x0, y0, x1, y1 = self.walls.cell_range(wall.rect)
+            stale.update((cx, cy) for cx in range(x0, x1 + 1) for cy in range(y0, y1 + 1))
+        for key in stale:
+            self.chunks.pop(key, None)
+
+    def cache_bytes(self):
+        """Memory held by the cached chunk surfaces"""
+        return sum(chunk.get_bytesize() * chunk.get_width() * chunk.get_height() for chunk in self.chunks.values())
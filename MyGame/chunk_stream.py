@@ -0,0 +1,264 @@
+import queue
+import random
+import struct
+import threading
+import pygame
+from settings import *
+from level_format import WorldFile, TILE_WALL, ENEMY_TYPES, RANDOM_TYPE, SPAWN_BOSS
+from maze_designer import MazeDesigner
+from sprites import Level, Wall, Enemy, Player
+
+# Frozen enemy: position, enemy type index, boss flag and direction
+FROZEN_ENEMY = struct.Struct("<ffBBf")
+
+# Tile bytes to the '#'/'.' text merge_wall_cells works on
+WALL_TEXT = bytes.maketrans(bytes(range(256)), b'.' * TILE_WALL + b'#' + b'.' * (255 - TILE_WALL))
+
+def chunk_wall_rects(world, key, tiles):
+    """Merged wall rects of one chunk, in world pixels"""
+    size = world.chunk_tiles
+    cell = world.cell_size
+    text = tiles.translate(WALL_TEXT).decode('ascii')
+    rows = [text[y * size:(y + 1) * size] for y in range(size)]
+    x0 = key[0] * world.chunk_pixels
+    y0 = key[1] * world.chunk_pixels
+    return [(x0 + x * cell, y0 + y * cell, w * cell, h * cell) for x, y, w, h in MazeDesigner.merge_wall_cells(rows)]
+
+class StreamedChunk:
+    """Sprites that belong to one resident chunk"""
+
+    def __init__(self, walls):
+        self.walls = walls
+
+class ChunkStreamer:
+    """
+    Keeps only the chunks around the player resident.
+
+    Chunks within `radius` of the player's chunk are requested from a
+    background thread, which reads them from the memory-mapped world file
+    and turns their tiles into merged wall rects. The main thread turns at
+    most `max_integrations` finished chunks per step into sprites, so
+    loading never stalls a frame. Chunks further than radius + 1 are
+    evicted: their walls are dropped and their enemies frozen into compact
+    FROZEN_ENEMY records until the chunk comes back.
+    """
+
+    def __init__(self, world, level, radius=STREAM_RADIUS, max_integrations=STREAM_MAX_INTEGRATIONS):
+        self.world = world
+        self.level = level
+        self.radius = radius
+        self.max_integrations = max_integrations
+        self.resident = {}  # key -> StreamedChunk
+        self.pending = set()
+        self.frozen = {}  # key -> packed FROZEN_ENEMY records
+        self.visited = set()  # chunks whose spawn table was used already
+        self.unvisited_spawns = sum(count for _, count in world.index)
+        self.frozen_count = 0
+        self.generation = 0  # bumped by reset() to drop in-flight loads
+
+        # Statistics
+        self.loads = 0
+        self.evictions = 0
+        self.freezes = 0
+
+        self.requests = queue.Queue()
+        self.results = queue.Queue()
+        self.thread = threading.Thread(target=self.worker, daemon=True)
+        self.thread.start()
+
+    def worker(self):
+        """Background loader: read and decode requested chunks"""
+        while True:
+            request = self.requests.get()
+            if request is None:
+                return
+            generation, key = request
+            tiles, spawns = self.world.read_chunk(key)
+            self.results.put((generation, key, chunk_wall_rects(self.world, key, tiles), spawns))
+
+    def chunk_of(self, x, y):
+        """Chunk coordinates of a world pixel position"""
+        return int(x) // self.world.chunk_pixels, int(y) // self.world.chunk_pixels
+
+    def update(self, position):
+        """
+        Request, integrate and evict chunks around a world position.
+        Returns the (added, removed) wall sprites for the renderer.
+        """
+        center = self.chunk_of(*position)
+        wanted = {(center[0] + dx, center[1] + dy)
+                  for dx in range(-self.radius, self.radius + 1)
+                  for dy in range(-self.radius, self.radius + 1)}
+        for key in wanted:
+            if self.world.contains(key) and key not in self.resident and key not in self.pending:
+                self.pending.add(key)
+                self.requests.put((self.generation, key))
+
+        added = []
+        for _ in range(self.max_integrations):
+            try:
+                result = self.results.get_nowait()
+            except queue.Empty:
+                break
+            added.extend(self.accept(*result))
+
+        # One eviction per step is enough to keep up and spreads the work
+        removed = []
+        for key in self.resident:
+            if max(abs(key[0] - center[0]), abs(key[1] - center[1])) > self.radius + 1:
+                removed = self.evict(key)
+                break
+
+        # Enemies that wandered off the resident area wait in their new chunk
+        for enemy in list(self.level.enemies):
+            key = self.chunk_of(*enemy.rect.center)
+            if key not in self.resident:
+                self.freeze(key, [enemy])
+        return added, removed
+
+    def prime(self, position):
+        """Load the chunks around a position before play starts (blocking)"""
+        added, _ = self.update(position)
+        while self.pending:
+            added.extend(self.accept(*self.results.get()))
+        return added
+
+    def accept(self, generation, key, rects, spawns):
+        """Integrate a finished load unless reset() made it stale"""
+        if generation != self.generation:
+            return []
+        self.pending.discard(key)
+        return self.integrate(key, rects, spawns)
+
+    def integrate(self, key, rects, spawns):
+        """Create the sprites of a loaded chunk"""
+        walls = [Wall(*rect) for rect in rects]
+        for wall in walls:
+            self.level.walls.add(wall)
+            self.level.wall_grid.insert(wall)
+
+        # Frozen enemies come back; the spawn table is only used once
+        enemies = self.thaw(key) if key in self.frozen else []
+        if key not in self.visited:
+            enemies += [self.spawn(*record) for record in spawns]
+            self.visited.add(key)
+            self.unvisited_spawns -= len(spawns)
+        for enemy in enemies:
+            enemy.bounds = self.level.world_rect
+            self.level.enemies.add(enemy)
+
+        self.resident[key] = StreamedChunk(walls)
+        self.loads += 1
+        return walls
+
+    def spawn(self, kind, enemy_type, x, y):
+        """Enemy from a spawn record of the world file"""
+        if enemy_type == RANDOM_TYPE:
+            enemy_type = self.level.rng.randrange(len(ENEMY_TYPES))
+        return self.make_enemy(x, y, enemy_type, kind == SPAWN_BOSS)
+
+    def make_enemy(self, x, y, enemy_type, is_boss):
+        enemy = Enemy(x, y, ENEMY_TYPES[enemy_type])
+        if is_boss:
+            enemy.make_boss()
+            enemy.set_position(x, y)
+        return enemy
+
+    def evict(self, key):
+        """Drop a chunk's walls and freeze the enemies standing in it"""
+        chunk = self.resident.pop(key)
+        for wall in chunk.walls:
+            self.level.walls.remove(wall)
+            self.level.wall_grid.remove(wall)
+        self.freeze(key, [enemy for enemy in self.level.enemies if self.chunk_of(*enemy.rect.center) == key])
+        self.evictions += 1
+        return chunk.walls
+
+    def freeze(self, key, enemies):
+        """Pack enemies into compact records and remove their sprites"""
+        if not enemies:
+            return
+        records = [FROZEN_ENEMY.pack(enemy.pos.x, enemy.pos.y, ENEMY_TYPES.index(enemy.enemy_type),
+                                     enemy.is_boss, enemy.direction) for enemy in enemies]
+        self.frozen[key] = self.frozen.get(key, b"") + b"".join(records)
+        self.freezes += len(enemies)
+        self.frozen_count += len(enemies)
+        self.level.enemies.remove(*enemies)
+
+    def thaw(self, key):
+        """Enemies back from a chunk's frozen records"""
+        enemies = []
+        records = self.frozen.pop(key)
+        self.frozen_count -= len(records) // FROZEN_ENEMY.size
+        for x, y, enemy_type, is_boss, direction in FROZEN_ENEMY.iter_unpack(records):
+            enemy = self.make_enemy(x, y, enemy_type, is_boss)
+            enemy.direction = direction
+            enemies.append(enemy)
+        return enemies
+
+    def dormant_enemies(self):
+        """Enemies alive but not resident: frozen plus never-loaded spawns"""
+        return self.frozen_count + self.unvisited_spawns
+
+    def frozen_bytes(self):
+        """Memory held by frozen enemy records"""
+        return sum(len(records) for records in self.frozen.values())
+
+    def reset(self):
+        """Forget every chunk, frozen enemy and in-flight load"""
+        for key in list(self.resident):
+            chunk = self.resident.pop(key)
+            for wall in chunk.walls:
+                self.level.walls.remove(wall)
+                self.level.wall_grid.remove(wall)
+        self.level.enemies.empty()
+        self.frozen.clear()
+        self.visited.clear()
+        self.unvisited_spawns = sum(count for _, count in self.world.index)
+        self.frozen_count = 0
+        self.pending.clear()
+        self.generation += 1
+
+    def close(self):
+        """Stop the loader thread and unmap the world file"""
+        self.requests.put(None)
+        self.thread.join()
+        self.world.close()
+
+class StreamedLevel(Level):
+    """
+    Level whose walls and enemies are streamed from a chunked world file
+    around the player instead of being built all at once. Flow fields and
+    the navigation graph need the whole layout, so they are left out.
+    """
+
+    def __init__(self, path, seed=None, radius=STREAM_RADIUS):
+        self.world = WorldFile(path)
+        self.rng = random.Random(seed)
+        super().__init__(self.world.level_num)
+        self.streamer = ChunkStreamer(self.world, self, radius)
+        self.streamer.prime(self.player.rect.center)
+
+    def create_level_layout(self):
+        """Only the player: walls and enemies arrive with their chunks"""
+        self.player = Player(*self.world.player_spawn)
+
+    def world_bounds(self):
+        return pygame.Rect(0, 0, self.world.cols * self.world.cell_size, self.world.rows * self.world.cell_size)
+
+    def build_navigation(self):
+        self.flow_field = None
+        self.nav_graph = None
+
+    def mark_layout_changed(self):
+        """Walls are indexed incrementally while streaming"""
+        self.layout_version += 1
+
+    def reset(self):
+        """Back to the start: empty world around the player's spawn"""
+        self.streamer.reset()
+        self.player.restore(self.initial_player)
+        self.streamer.prime(self.player.rect.center)
+
+    def close(self):
+        self.streamer.close()
@@ -0,0 +1,60 @@
+import pygame
+from settings import *
+
+class DirtyRectRenderer:
+    """
+    Opt-in dirty-rectangle presenter for the scenes.
+
+    Scenes keep drawing to the screen surface as usual, mark the regions
+    that changed this frame and call present() instead of
+    pygame.display.flip(). Only the marked regions are pushed with
+    pygame.display.update(); when the dirty area grows past the threshold
+    (or a full redraw was requested) it falls back to a full flip.
+    """
+
+    def __init__(self, enabled=DIRTY_RECT_RENDERING, max_area=DIRTY_RECT_MAX_AREA):
+        self.enabled = enabled
+        self.max_area = max_area
+        self.screen_rect = pygame.Rect(0, 0, SCREEN_WIDTH, SCREEN_HEIGHT)
+        self.dirty = []
+        self.moving = []
+        self.last_moving = []
+        self.full_redraw = True
+
+        # Statistics
+        self.partial_updates = 0
+        self.full_flips = 0
+
+    def invalidate(self):
+        """Request a full-screen flip on the next present()"""
+        self.full_redraw = True
+
+    def mark(self, rect, moving=False):
+        """
+        Mark a changed region. Moving regions (sprites) are pushed again
+        on the next frame as well so their old position gets cleared.
+        """
+        rect = pygame.Rect(rect).clip(self.screen_rect)
+        if rect.width and rect.height:
+            if moving:
+                self.moving.append(rect)
+            else:
+                self.dirty.append(rect)
+
+    def present(self):
+        """Push the changed regions (or the whole screen) to the display"""
+        rects = self.dirty + self.moving + self.last_moving
+        area = sum(rect.width * rect.height for rect in rects)
+        limit = self.max_area * self.screen_rect.width * self.screen_rect.height
+
+        if not self.enabled or self.full_redraw or area > limit:
+            pygame.display.flip()
+            self.full_flips += 1
+        elif rects:
+            pygame.display.update(rects)
+            self.partial_updates += 1
+
+        self.last_moving = self.moving
+        self.moving = []
+        self.dirty = []
+        self.full_redraw = False
@@ -0,0 +1,191 @@
+import math
+import numpy as np
+from settings import *
+
+class EnemyEngine:
+    """
+    Struct-of-arrays enemy simulation.
+
+    Keeps every enemy's position, direction, speeds, timers and boss flag in
+    NumPy arrays and advances them all in one vectorized step, following the
+    same rules as Enemy.update (random wander with direction re-rolls, bounce
+    on walls, hunt-mode gathering along the flow field and screen clamping).
+    The Enemy sprites are kept for drawing and player collisions and are
+    refreshed by sync_sprites().
+    """
+
+    def __init__(self, enemies=(), walls=(), seed=None, chunk_size=4096, world_size=(SCREEN_WIDTH, SCREEN_HEIGHT)):
+        self.rng = np.random.default_rng(seed)
+        self.chunk_size = chunk_size
+        self.world_width, self.world_height = world_size
+        self.sprites = list(enemies)
+        self.index = {id(sprite): i for i, sprite in enumerate(self.sprites)}
+        count = len(self.sprites)
+
+        self.pos = np.zeros((count, 2))
+        self.size = np.zeros((count, 2), dtype=np.int64)
+        self.direction = np.zeros(count)
+        self.speed = np.zeros(count)
+        self.hunt_speed = np.zeros(count)
+        self.timer = np.zeros(count, dtype=np.int64)
+        self.interval = np.zeros(count, dtype=np.int64)
+        self.is_boss = np.zeros(count, dtype=bool)
+        self.active = np.ones(count, dtype=bool)
+
+        for i, sprite in enumerate(self.sprites):
+            self.pos[i] = sprite.pos
+            self.size[i] = sprite.rect.size
+            self.direction[i] = sprite.direction
+            self.speed[i] = sprite.speed
+            self.hunt_speed[i] = sprite.hunt_mode_speed
+            self.timer[i] = sprite.change_direction_timer
+            self.interval[i] = sprite.change_direction_interval
+            self.is_boss[i] = sprite.is_boss
+
+        self.set_walls(walls)
+        self.flow_list = None
+        self.flow_array = None
+
+    @classmethod
+    def spawn(cls, count, walls=(), seed=None, boss_ratio=0.0):
+        """Create an engine with enemies at random free positions (no sprites)"""
+        engine = cls(walls=walls, seed=seed)
+        rng = engine.rng
+        engine.is_boss = rng.random(count) < boss_ratio
+        size = np.where(engine.is_boss, BOSS_SIZE, ENEMY_CIRCLE_SIZE)
+        engine.size = np.stack([size, size], axis=1).astype(np.int64)
+        engine.pos = np.stack([rng.uniform(0, SCREEN_WIDTH - size), rng.uniform(0, SCREEN_HEIGHT - size)], axis=1)
+        engine.direction = rng.uniform(0, 2 * math.pi, count)
+        engine.speed = np.where(engine.is_boss, BOSS_SPEED, ENEMY_SPEED).astype(float)
+        engine.hunt_speed = engine.speed * HUNT_MODE_ENEMY_SPEED_MULTIPLIER
+        engine.timer = np.zeros(count, dtype=np.int64)
+        engine.interval = rng.integers(60, 181, count)
+        engine.active = np.ones(count, dtype=bool)
+        return engine
+
+    def set_walls(self, walls):
+        """Store wall rects as arrays of left, top, right and bottom edges"""
+        rects = np.array([tuple(wall.rect) for wall in walls], dtype=np.int64).reshape(-1, 4)
+        self.wall_left = rects[:, 0]
+        self.wall_top = rects[:, 1]
+        self.wall_right = rects[:, 0] + rects[:, 2]
+        self.wall_bottom = rects[:, 1] + rects[:, 3]
+
+    def __len__(self):
+        return int(self.active.sum())
+
+    def rects(self, pos):
+        """Integer rect corners for float positions (same rounding as Mover)"""
+        return np.round(pos).astype(np.int64)
+
+    def hits_walls(self, pos):
+        """Boolean mask of enemies whose rect overlaps any wall"""
+        hits = np.zeros(len(pos), dtype=bool)
+        if len(self.wall_left) == 0:
+            return hits
+        corner = self.rects(pos)
+        for start in range(0, len(pos), self.chunk_size):
+            end = start + self.chunk_size
+            left = corner[start:end, 0:1]
+            top = corner[start:end, 1:2]
+            right = left + self.size[start:end, 0:1]
+            bottom = top + self.size[start:end, 1:2]
+            overlap = ((left < self.wall_right) & (self.wall_left < right) &
+                       (top < self.wall_bottom) & (self.wall_top < bottom))
+            hits[start:end] = overlap.any(axis=1)
+        return hits
+
+    def flow_directions(self, flow_field, target):
+        """Flow field towards the target as an (cells, 2) array, NaN where unset"""
+        directions = flow_field.field(target)
+        if directions is None:
+            return None
+        if directions is not self.flow_list:
+            array = np.full((len(directions), 2), np.nan)
+            for index, direction in enumerate(directions):
+                if direction:
+                    array[index] = direction
+            self.flow_list = directions
+            self.flow_array = array
+        return self.flow_array
+
+    def step(self, hunt_mode, gather_point=None, flow_field=None):
+        """Advance every active enemy by one simulation tick"""
+        active = self.active
+        if hunt_mode:
+            if gather_point is None:
+                return
+            # Move towards the gather point from the rect center
+            center = self.rects(self.pos) + self.size // 2
+            delta = np.asarray(gather_point, dtype=float) - center
+            distance = np.hypot(delta[:, 0], delta[:, 1])
+            moving = active & (distance > 0)
+
+            # Enemies on the flow field follow it, sliding along walls
+            following = np.zeros(len(self.pos), dtype=bool)
+            flow = self.flow_directions(flow_field, gather_point) if flow_field else None
+            if flow is not None:
+                cell = center // flow_field.cell_size
+                on_grid = ((cell[:, 0] >= 0) & (cell[:, 0] < flow_field.cols) &
+                           (cell[:, 1] >= 0) & (cell[:, 1] < flow_field.rows))
+                index = np.where(on_grid, cell[:, 1] * flow_field.cols + cell[:, 0], 0)
+                heading = flow[index]
+                following = moving & on_grid & ~np.isnan(heading[:, 0])
+                for axis in (0, 1):
+                    new_pos = self.pos.copy()
+                    new_pos[following, axis] += heading[following, axis] * self.hunt_speed[following]
+                    blocked = self.hits_walls(new_pos)
+                    keep = following & ~blocked
+                    self.pos[keep, axis] = new_pos[keep, axis]
+
+            # The rest move straight and stop on wall contact
+            straight = moving & ~following
+            step = np.zeros_like(self.pos)
+            step[straight] = delta[straight] / distance[straight, None] * self.hunt_speed[straight, None]
+            new_pos = self.pos + step
+            blocked = self.hits_walls(new_pos)
+            self.pos = np.where((straight & ~blocked)[:, None], new_pos, self.pos)
+            return
+
+        # Re-roll direction when the timer runs out
+        self.timer[active] += 1
+        reroll = active & (self.timer >= self.interval)
+        rerolls = int(reroll.sum())
+        if rerolls:
+            self.direction[reroll] = self.rng.uniform(0, 2 * math.pi, rerolls)
+            self.timer[reroll] = 0
+            self.interval[reroll] = self.rng.integers(60, 181, rerolls)
+
+        # Move in the current direction, bouncing off walls
+        step = np.stack([np.cos(self.direction), np.sin(self.direction)], axis=1) * self.speed[:, None]
+        step[~active] = 0
+        new_pos = self.pos + step
+        blocked = active & self.hits_walls(new_pos)
+        bounces = int(blocked.sum())
+        if bounces:
+            self.direction[blocked] = self.rng.uniform(0, 2 * math.pi, bounces)
+        new_pos[blocked] = self.pos[blocked]
+
+        # Keep enemies inside the world
+        np.clip(new_pos[:, 0], 0, self.world_width - self.size[:, 0], out=new_pos[:, 0])
+        np.clip(new_pos[:, 1], 0, self.world_height - self.size[:, 1], out=new_pos[:, 1])
+        self.pos = new_pos
+
+    def remove(self, sprites):
+        """Deactivate enemies that were killed"""
+        for sprite in sprites:
+            i = self.index.get(id(sprite))
+            if i is not None:
+                self.active[i] = False
+
+    def sync_sprites(self, hunt_mode=False):
+        """Copy array state back into the Enemy sprites"""
+        for i, sprite in enumerate(self.sprites):
+            if not self.active[i]:
+                continue
+            sprite.pos.update(self.pos[i, 0], self.pos[i, 1])
+            sprite.sync_rect()
+            sprite.direction = float(self.direction[i])
+            sprite.change_direction_timer = int(self.timer[i])
+            sprite.change_direction_interval = int(self.interval[i])
+            sprite.is_in_hunt_mode = hunt_mode
@@ -0,0 +1,172 @@
+from collections import OrderedDict, deque
+import math
+from settings import *
+
+# Neighbour offsets: orthogonal first, then diagonal
+NEIGHBOURS = [(1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (1, -1), (-1, 1), (-1, -1)]
+
+def rasterize_walls(walls, cell_width, cell_height, cols, rows, clearance=0):
+    """
+    Return a bytearray with 1 for every grid cell a wall overlaps. Walls are
+    grown by the clearance first, so a mover whose center is in a free cell
+    does not touch any wall.
+    """
+    blocked = bytearray(cols * rows)
+    for wall in walls:
+        rect = wall.rect.inflate(clearance * 2, clearance * 2)
+        x0 = max(0, rect.left // cell_width)
+        y0 = max(0, rect.top // cell_height)
+        x1 = min(cols - 1, (rect.right - 1) // cell_width)
+        y1 = min(rows - 1, (rect.bottom - 1) // cell_height)
+        for cy in range(y0, y1 + 1):
+            row = cy * cols
+            for cx in range(x0, x1 + 1):
+                blocked[row + cx] = 1
+    return blocked
+
+class FlowField:
+    """
+    BFS flow fields over a grid rasterized from the level walls.
+
+    A field is computed once per target cell and cached (LRU), so any
+    number of enemies can steer towards the target with an O(1) lookup of
+    their current cell. When the target moves to another cell the new field
+    is computed once (or fetched from the cache) instead of running
+    pathfinding per enemy.
+    """
+
+    def __init__(self, walls, cell_size=NAV_CELL_SIZE, width=SCREEN_WIDTH, height=SCREEN_HEIGHT,
+                 cache_size=FLOW_FIELD_CACHE_SIZE, clearance=ENEMY_CIRCLE_SIZE // 2 + 1):
+        self.cell_size = cell_size
+        self.clearance = clearance
+        self.cols = (width + cell_size - 1) // cell_size
+        self.rows = (height + cell_size - 1) // cell_size
+        self.cache_size = cache_size
+        self.fields = OrderedDict()
+        self.rebuild(walls)
+
+    def rebuild(self, walls):
+        """Rasterize the walls and drop every cached field"""
+        self.blocked = rasterize_walls(walls, self.cell_size, self.cell_size, self.cols, self.rows, self.clearance)
+        self.fields.clear()
+
+    def cell_of(self, x, y):
+        """Grid index of a pixel position, or None when off the grid"""
+        cx = int(x) // self.cell_size
+        cy = int(y) // self.cell_size
+        if 0 <= cx < self.cols and 0 <= cy < self.rows:
+            return cy * self.cols + cx
+        return None
+
+    def nearest_free_cell(self, cell):
+        """Closest free cell to the given one (targets inside walls move out)"""
+        cols, rows = self.cols, self.rows
+        seen = {cell}
+        queue = deque([cell])
+        while queue:
+            index = queue.popleft()
+            if not self.blocked[index]:
+                return index
+            cx, cy = index % cols, index // cols
+            for ox, oy in NEIGHBOURS[:4]:
+                nx, ny = cx + ox, cy + oy
+                neighbour = ny * cols + nx
+                if 0 <= nx < cols and 0 <= ny < rows and neighbour not in seen:
+                    seen.add(neighbour)
+                    queue.append(neighbour)
+        return None
+
+    def compute(self, target_cell):
+        """
+        Run a BFS from the target cell and return a list with, for every
+        cell, the unit (dx, dy) towards the next cell on a shortest path,
+        or None for the target cell and cells that cannot reach it.
+        """
+        cols, rows = self.cols, self.rows
+        blocked = self.blocked
+        unreached = cols * rows
+        distance = [unreached] * (cols * rows)
+        target_cell = self.nearest_free_cell(target_cell)
+        if target_cell is None:
+            return [None] * (cols * rows)
+        distance[target_cell] = 0
+        queue = deque([target_cell])
+
+        # Shortest paths through the free cells
+        while queue:
+            index = queue.popleft()
+            cx, cy = index % cols, index // cols
+            next_distance = distance[index] + 1
+            for ox, oy in NEIGHBOURS[:4]:
+                nx, ny = cx + ox, cy + oy
+                if 0 <= nx < cols and 0 <= ny < rows:
+                    neighbour = ny * cols + nx
+                    if not blocked[neighbour] and distance[neighbour] > next_distance:
+                        distance[neighbour] = next_distance
+                        queue.append(neighbour)
+
+        # Give blocked cells a gradient back to the reached cells, so a mover
+        # pushed into the wall clearance is led back out of it
+        queue = deque(sorted((index for index, dist in enumerate(distance) if dist < unreached),
+                             key=distance.__getitem__))
+        while queue:
+            index = queue.popleft()
+            cx, cy = index % cols, index // cols
+            for ox, oy in NEIGHBOURS[:4]:
+                nx, ny = cx + ox, cy + oy
+                if 0 <= nx < cols and 0 <= ny < rows:
+                    neighbour = ny * cols + nx
+                    if blocked[neighbour] and distance[neighbour] == unreached:
+                        distance[neighbour] = distance[index] + 1
+                        queue.append(neighbour)
+
+        # Point every cell at its lowest neighbour. Free cells only step to
+        # free cells and never cut a blocked corner.
+        directions = [None] * (cols * rows)
+        for index, dist in enumerate(distance):
+            if dist == 0 or dist == unreached:
+                continue
+            cx, cy = index % cols, index // cols
+            free = not blocked[index]
+            best = dist
+            best_offset = None
+            for ox, oy in NEIGHBOURS:
+                nx, ny = cx + ox, cy + oy
+                if not (0 <= nx < cols and 0 <= ny < rows):
+                    continue
+                neighbour = ny * cols + nx
+                if free and (blocked[neighbour] or
+                             (ox and oy and (blocked[cy * cols + nx] or blocked[ny * cols + cx]))):
+                    continue
+                if distance[neighbour] < best:
+                    best = distance[neighbour]
+                    best_offset = (ox, oy)
+            if best_offset:
+                length = math.hypot(*best_offset)
+                directions[index] = (best_offset[0] / length, best_offset[1] / length)
+        return directions
+
+    def field(self, target):
+        """Cached flow field towards a pixel target"""
+        target_cell = self.cell_of(*target)
+        if target_cell is None:
+            return None
+        directions = self.fields.get(target_cell)
+        if directions is None:
+            directions = self.compute(target_cell)
+            self.fields[target_cell] = directions
+            if len(self.fields) > self.cache_size:
+                self.fields.popitem(last=False)
+        else:
+            self.fields.move_to_end(target_cell)
+        return directions
+
+    def direction(self, position, target):
+        """Unit step direction from a pixel position towards the target, or None"""
+        directions = self.field(target)
+        if directions is None:
+            return None
+        cell = self.cell_of(*position)
+        if cell is None:
+            return None
+        return directions[cell]
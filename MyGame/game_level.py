@@ -1,44 +1,85 @@
 import pygame
 import sys
 import math
+import time
 import random
 from sprites import *
 from settings import *
 from audio import audio_manager
+from dirty_rect import DirtyRectRenderer
+from text_cache import text_cache
+from navigation import PathService
+from camera import Camera, ChunkedLayer
+try:
+    from enemy_engine import EnemyEngine
+except ImportError:
+    EnemyEngine = None
+
+def render_static_layer(walls, background=None):
+    """Bake the background and walls into one display-format surface"""
+    layer = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT)).convert()
+    layer.fill(BLACK)
+    if background is not None:
+        layer.blit(pygame.transform.scale(background, (SCREEN_WIDTH, SCREEN_HEIGHT)), (0, 0))
+    walls.draw(layer)
+    return layer
 
 class GameLevel:
-    def __init__(self, level_num):
-        pygame.init()
-        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-        pygame.display.set_caption(f"MAZE HUNT - Level {level_num}")
-        self.clock = pygame.time.Clock()
-        
-        # Level data
+    def __init__(self, level_num, headless=False, screen=None, clock=None, level=None):
+        # Run standalone with its own window, or share the scene manager's
+        if screen is None:
+            pygame.init()
+            screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+        self.screen = screen
+        self.clock = clock or pygame.time.Clock()
+        
+        # Game logic advances in fixed steps; headless mode never draws
+        self.headless = headless
+        self.time_step = 1.0 / SIMULATION_HZ
+        self.renderer = DirtyRectRenderer()
+        
+        # Level data (cached template, reset to its start, unless one is given)
         self.level_num = level_num
-        self.level = Level(level_num)
+        self.level = level or Level.load(level_num)
+        
+        # Worlds larger than the screen scroll with the player
+        self.world_rect = self.level.world_rect
+        self.camera = Camera(self.world_rect)
+        self.scrolling = self.world_rect.size != (SCREEN_WIDTH, SCREEN_HEIGHT)
         
         # Game state
         self.running = True
-        self.game_time = 0  # Total game time in seconds
-        self.hunt_mode_active = False
-        self.hunt_mode_start_time = 0
         self.hunt_mode_duration = HUNT_MODE_DURATION
         self.hunt_mode_cooldown = HUNT_MODE_COOLDOWN
-        self.last_hunt_mode_time = -HUNT_MODE_COOLDOWN  # Allow first hunt mode immediately
         
         # Game objects
         self.all_sprites = pygame.sprite.Group()
         self.walls = self.level.walls
+        self.wall_grid = self.level.wall_grid
+        self.flow_field = self.level.flow_field
         self.enemies = self.level.enemies
         self.player = self.level.player
         
-        # Add to sprite groups
-        self.all_sprites.add(self.player)
-        self.all_sprites.add(self.enemies)
+        # Patrolling enemies share one A* service over the level's graph.
+        # Streamed levels have no graph and add and remove enemies as the
+        # player moves, so they keep the per-sprite wander AI.
+        self.navigator = None
+        self.streamed = self.level.streamer is not None
+        if self.streamed and (ENEMY_AI != "wander" or ENEMY_ENGINE != "sprites"):
+            print(f"Streamed level: ENEMY_AI={ENEMY_AI!r} and ENEMY_ENGINE={ENEMY_ENGINE!r} "
+                  "are not supported, using wandering sprites")
+        if ENEMY_AI == "patrol" and not self.streamed:
+            self.navigator = PathService(self.level.nav_graph)
+        
+        self.enemy_engine = None
         
         # UI elements
         self.font = pygame.font.Font(None, 36)
         self.small_font = pygame.font.Font(None, 24)
+        self.title_font = pygame.font.Font(None, 72)
+        
+        # Cached HUD panel and game over screen
+        self.hud_panel = None
         
         # Colors
         self.BLACK = (0, 0, 0)
@@ -48,12 +89,63 @@ class GameLevel:
         self.YELLOW = (255, 255, 0)
         self.BLUE = (0, 0, 255)
         
-        # Gather point for hunt mode
-        self.gather_point = (SCREEN_WIDTH - 100, SCREEN_HEIGHT - 100)
+        # Pre-rendered walls and background (walls never move): one layer
+        # for single-screen levels, cached chunks for scrolling ones
+        self.static_layer = None
+        self.chunk_layer = None
+        self.static_layer_version = None
+        self.build_static_layer()
+        
+        # Gather point for hunt mode (its flow field is built with the level)
+        self.gather_point = self.level.gather_point
+        
+        self.start()
+        
+    def start(self):
+        """Set the per-attempt game state to its initial values"""
+        self.sim_ticks = 0
+        self.accumulator = 0.0
+        self.alpha = 1.0
+        self.game_time = 0  # Total game time in seconds
+        self.hunt_mode_active = False
+        self.hunt_mode_start_time = 0
+        self.last_hunt_mode_time = -HUNT_MODE_COOLDOWN  # Allow first hunt mode immediately
+        
+        # Optional vectorized enemy simulation (needs NumPy, wander AI only)
+        if ENEMY_ENGINE == "numpy" and EnemyEngine and not self.navigator and not self.streamed:
+            self.enemy_engine = EnemyEngine(self.enemies, self.walls, world_size=self.world_rect.size)
+        
+        # Add to sprite groups
+        self.all_sprites.empty()
+        self.all_sprites.add(self.player)
+        self.all_sprites.add(self.enemies)
+        
+        # HUD and game over screen are rebuilt on the next draw
+        self.hud_key = None
+        self.game_over_overlay = None
+        self.game_over_texts = []
         
         # Game over state
         self.game_over = False
         self.victory = False
+        self.game_over_drawn = False
+        
+    def reset(self):
+        """Restart the level from its template without rebuilding it"""
+        self.level.reset()
+        self.start()
+        if self.streamed:
+            self.build_static_layer()
+        self.renderer.invalidate()
+        
+    def close(self):
+        """Release the level's resources when leaving it for good"""
+        self.level.close()
+        
+    def enter(self):
+        """Prepare the level to be shown (caption, music, full redraw)"""
+        pygame.display.set_caption(f"MAZE HUNT - Level {self.level_num}")
+        self.renderer.invalidate()
         
         # Play level music
         audio_manager.play_music('level_music', loops=-1)
@@ -67,18 +159,29 @@ class GameLevel:
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE:
                     return "lobby"
-                elif event.key == pygame.K_SPACE and not self.hunt_mode_active:
-                    # Try to activate hunt mode
-                    current_time = pygame.time.get_ticks() / 1000
-                    if current_time - self.last_hunt_mode_time >= self.hunt_mode_cooldown:
-                        self.activate_hunt_mode()
+                elif event.key == pygame.K_r and self.game_over:
+                    self.reset()
+                    self.enter()
+                elif event.key == pygame.K_SPACE:
+                    self.try_activate_hunt_mode()
                         
         return True
         
+    def current_time(self):
+        """Game clock in seconds of simulated time"""
+        return self.sim_ticks * self.time_step
+        
+    def try_activate_hunt_mode(self):
+        """Activate hunt mode if it is not active and the cooldown is over"""
+        if not self.hunt_mode_active:
+            current_time = self.current_time()
+            if current_time - self.last_hunt_mode_time >= self.hunt_mode_cooldown:
+                self.activate_hunt_mode()
+        
     def activate_hunt_mode(self):
         """Activate hunt mode"""
         self.hunt_mode_active = True
-        self.hunt_mode_start_time = pygame.time.get_ticks() / 1000
+        self.hunt_mode_start_time = self.current_time()
         self.last_hunt_mode_time = self.hunt_mode_start_time
         
         # Play hunt mode sound
@@ -97,12 +200,38 @@ class GameLevel:
         # Return to level music
         audio_manager.play_music('level_music', loops=-1)
         
-    def update(self):
+    def build_static_layer(self):
+        """Render the cached maze layer for the current level layout"""
+        background = None
+        if sprite_loader and sprite_loader.has_sprite('background'):
+            background = sprite_loader.get_background_sprite()
+        if self.scrolling:
+            self.chunk_layer = ChunkedLayer(self.walls, self.world_rect, background)
+        else:
+            self.static_layer = render_static_layer(self.walls, background)
+        self.static_layer_version = self.level.layout_version
+        self.renderer.invalidate()
+        
+    def step(self, keys=None):
+        """Advance the simulation by one fixed time step"""
+        self.sim_ticks += 1
+        if self.navigator:
+            self.navigator.begin_frame()
+        self.player.save_position()
+        for enemy in self.enemies:
+            enemy.save_position()
+        if self.streamed:
+            added, removed = self.level.streamer.update(self.player.rect.center)
+            if self.chunk_layer and (added or removed):
+                self.chunk_layer.update_walls(added, removed)
+        self.update(keys)
+        
+    def update(self, keys=None):
         """Update game logic"""
         if self.game_over:
             return
             
-        current_time = pygame.time.get_ticks() / 1000
+        current_time = self.current_time()
         
         # Update game time (only when not in hunt mode)
         if not self.hunt_mode_active:
@@ -115,17 +244,25 @@ class GameLevel:
                 self.deactivate_hunt_mode()
                 
         # Update player
-        keys = pygame.key.get_pressed()
-        self.player.update(keys, self.walls)
+        if keys is None:
+            keys = pygame.key.get_pressed()
+        self.player.update(keys, self.wall_grid)
         
         # Update enemies
-        for enemy in self.enemies:
-            enemy.update(self.player, self.walls, self.hunt_mode_active, self.gather_point)
+        if self.enemy_engine:
+            self.enemy_engine.step(self.hunt_mode_active, self.gather_point, self.flow_field)
+            self.enemy_engine.sync_sprites(self.hunt_mode_active)
+        else:
+            for enemy in self.enemies:
+                enemy.update(self.player, self.wall_grid, self.hunt_mode_active, self.gather_point,
+                             self.flow_field, self.navigator)
             
         # Check collisions between player and enemies
         if self.hunt_mode_active:
             # Player can kill enemies in hunt mode
             enemies_hit = pygame.sprite.spritecollide(self.player, self.enemies, True)
+            if self.enemy_engine:
+                self.enemy_engine.remove(enemies_hit)
             for enemy in enemies_hit:
                 audio_manager.play_sound('enemy_death')
         else:
@@ -135,7 +272,7 @@ class GameLevel:
                 audio_manager.play_sound('player_hit')
                 
         # Check victory condition
-        if len(self.enemies) == 0:
+        if self.level.enemies_left() == 0:
             self.victory = True
             self.game_over = True
             audio_manager.play_sound('level_complete')
@@ -144,17 +281,26 @@ class GameLevel:
         if self.game_time >= GAME_TIME_LIMIT:
             self.game_over = True
             
-    def draw(self):
-        """Draw everything"""
-        # Clear screen
-        self.screen.fill(self.BLACK)
-        
-        # Draw walls
-        self.walls.draw(self.screen)
+    def draw(self, alpha=1.0):
+        """Draw everything, interpolating movers between the last two steps"""
+        # Background and walls in one blit
+        if self.static_layer_version != self.level.layout_version:
+            self.build_static_layer()
+        player_rect = self.player.interpolated_rect(alpha)
+        if self.chunk_layer:
+            if self.camera.follow(player_rect):
+                self.renderer.invalidate()
+            self.chunk_layer.draw(self.screen, self.camera.view)
+        else:
+            self.screen.blit(self.static_layer, (0, 0))
         
-        # Draw enemies
+        # Draw enemies (only those in view)
         for enemy in self.enemies:
             enemy_type = enemy.enemy_type
+            rect = enemy.interpolated_rect(alpha)
+            if not self.camera.is_visible(rect):
+                continue
+            rect = self.camera.apply(rect)
             if enemy.is_boss:
                 size = BOSS_SIZE
             else:
@@ -167,64 +313,55 @@ class GameLevel:
                     
             # Draw enemy shape
             if enemy_type == "circle":
-                pygame.draw.circle(self.screen, enemy.color, enemy.rect.center, size // 2)
+                pygame.draw.circle(self.screen, enemy.color, rect.center, size // 2)
             elif enemy_type == "square":
-                pygame.draw.rect(self.screen, enemy.color, enemy.rect)
+                pygame.draw.rect(self.screen, enemy.color, rect)
             elif enemy_type == "triangle":
                 # Draw triangle
                 points = [
-                    (enemy.rect.centerx, enemy.rect.top),
-                    (enemy.rect.left, enemy.rect.bottom),
-                    (enemy.rect.right, enemy.rect.bottom)
+                    (rect.centerx, rect.top),
+                    (rect.left, rect.bottom),
+                    (rect.right, rect.bottom)
                 ]
                 pygame.draw.polygon(self.screen, enemy.color, points)
+            self.renderer.mark(rect.inflate(2, 2), moving=True)
                 
         # Draw player
-        pygame.draw.rect(self.screen, PLAYER_COLOR, self.player.rect)
+        player_rect = self.camera.apply(player_rect)
+        pygame.draw.rect(self.screen, PLAYER_COLOR, player_rect)
+        self.renderer.mark(player_rect.inflate(2, 2), moving=True)
         
         # Draw UI
         self.draw_ui()
         
         # Draw game over screen
         if self.game_over:
+            if not self.game_over_drawn:
+                self.renderer.invalidate()
+                self.game_over_drawn = True
             self.draw_game_over()
             
-        pygame.display.flip()
-        
-    def draw_ui(self):
-        """Draw user interface"""
-        # Game time
-        time_text = f"Time: {int(self.game_time)}/{GAME_TIME_LIMIT}s"
-        time_surface = self.font.render(time_text, True, self.WHITE)
-        self.screen.blit(time_surface, (10, 10))
-        
-        # Enemies remaining
-        enemies_text = f"Enemies: {len(self.enemies)}"
-        enemies_surface = self.font.render(enemies_text, True, self.WHITE)
-        self.screen.blit(enemies_surface, (10, 50))
-        
-        # Level number
-        level_text = f"Level: {self.level_num}"
-        level_surface = self.font.render(level_text, True, self.WHITE)
-        self.screen.blit(level_surface, (10, 90))
+        self.renderer.present()
+        
+    def hud_items(self):
+        """Return the (font, text, color, position) entries shown on the HUD"""
+        items = [
+            (self.font, f"Time: {int(self.game_time)}/{GAME_TIME_LIMIT}s", self.WHITE, (10, 10)),
+            (self.font, f"Enemies: {self.level.enemies_left()}", self.WHITE, (10, 50)),
+            (self.font, f"Level: {self.level_num}", self.WHITE, (10, 90)),
+        ]
         
         # Hunt mode indicator
         if self.hunt_mode_active:
-            hunt_time_left = self.hunt_mode_duration - (pygame.time.get_ticks() / 1000 - self.hunt_mode_start_time)
-            hunt_text = f"HUNT MODE: {int(hunt_time_left)}s"
-            hunt_surface = self.font.render(hunt_text, True, self.RED)
-            self.screen.blit(hunt_surface, (SCREEN_WIDTH // 2 - 100, 10))
+            hunt_time_left = self.hunt_mode_duration - (self.current_time() - self.hunt_mode_start_time)
+            items.append((self.font, f"HUNT MODE: {int(hunt_time_left)}s", self.RED, (SCREEN_WIDTH // 2 - 100, 10)))
         else:
             # Show hunt mode cooldown
-            cooldown_left = self.hunt_mode_cooldown - (pygame.time.get_ticks() / 1000 - self.last_hunt_mode_time)
+            cooldown_left = self.hunt_mode_cooldown - (self.current_time() - self.last_hunt_mode_time)
             if cooldown_left > 0:
-                cooldown_text = f"Hunt Mode: {int(cooldown_left)}s"
-                cooldown_surface = self.small_font.render(cooldown_text, True, self.YELLOW)
-                self.screen.blit(cooldown_surface, (SCREEN_WIDTH // 2 - 80, 10))
+                items.append((self.small_font, f"Hunt Mode: {int(cooldown_left)}s", self.YELLOW, (SCREEN_WIDTH // 2 - 80, 10)))
             else:
-                space_text = "Press SPACE for Hunt Mode"
-                space_surface = self.small_font.render(space_text, True, self.GREEN)
-                self.screen.blit(space_surface, (SCREEN_WIDTH // 2 - 100, 10))
+                items.append((self.small_font, "Press SPACE for Hunt Mode", self.GREEN, (SCREEN_WIDTH // 2 - 100, 10)))
                 
         # Instructions
         instructions = [
@@ -233,48 +370,76 @@ class GameLevel:
             "ESC: Exit"
         ]
         for i, instruction in enumerate(instructions):
-            inst_surface = self.small_font.render(instruction, True, self.WHITE)
-            self.screen.blit(inst_surface, (SCREEN_WIDTH - 150, 10 + i * 25))
+            items.append((self.small_font, instruction, self.WHITE, (SCREEN_WIDTH - 150, 10 + i * 25)))
+        return items
+        
+    def build_hud_panel(self, items):
+        """Render the HUD text into one transparent panel surface"""
+        self.hud_panel = pygame.Surface((SCREEN_WIDTH, HUD_PANEL_HEIGHT), pygame.SRCALPHA)
+        for font, text, color, position in items:
+            # Texts never overlap, so MAX copies their pixels unchanged
+            self.hud_panel.blit(text_cache.render(font, text, color), position, special_flags=pygame.BLEND_RGBA_MAX)
+        self.renderer.mark(self.hud_panel.get_rect())
+        
+    def draw_ui(self):
+        """Draw user interface"""
+        # The panel is only rebuilt when one of the displayed values changes
+        items = self.hud_items()
+        hud_key = tuple((text, color) for _, text, color, _ in items)
+        if hud_key != self.hud_key:
+            self.build_hud_panel(items)
+            self.hud_key = hud_key
+        self.screen.blit(self.hud_panel, (0, 0))
             
-    def draw_game_over(self):
-        """Draw game over screen"""
+    def build_game_over_screen(self):
+        """Create the game over overlay and texts (once per level)"""
         # Semi-transparent overlay
-        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-        overlay.set_alpha(128)
-        overlay.fill(self.BLACK)
-        self.screen.blit(overlay, (0, 0))
+        self.game_over_overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+        self.game_over_overlay.set_alpha(128)
+        self.game_over_overlay.fill(self.BLACK)
         
         # Game over text
         if self.victory:
             text = "VICTORY!"
             color = self.GREEN
+            inst_text = "All enemies defeated!"
         else:
             text = "GAME OVER"
             color = self.RED
-            
-        game_over_surface = pygame.font.Font(None, 72).render(text, True, color)
-        game_over_rect = game_over_surface.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2 - 50))
-        self.screen.blit(game_over_surface, game_over_rect)
-        
-        # Instructions
-        if self.victory:
-            inst_text = "All enemies defeated!"
-        else:
             inst_text = "You were caught!"
             
-        inst_surface = self.font.render(inst_text, True, self.WHITE)
-        inst_rect = inst_surface.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2))
-        self.screen.blit(inst_surface, inst_rect)
+        lines = [
+            (self.title_font.render(text, True, color), SCREEN_HEIGHT//2 - 50),
+            (self.font.render(inst_text, True, self.WHITE), SCREEN_HEIGHT//2),
+            (self.small_font.render("Press R to retry or ESC to return to lobby", True, self.WHITE), SCREEN_HEIGHT//2 + 50),
+        ]
+        self.game_over_texts = [(surface, surface.get_rect(center=(SCREEN_WIDTH//2, y))) for surface, y in lines]
         
-        # Continue instruction
-        continue_text = "Press ESC to return to lobby"
-        continue_surface = self.small_font.render(continue_text, True, self.WHITE)
-        continue_rect = continue_surface.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2 + 50))
-        self.screen.blit(continue_surface, continue_rect)
+    def draw_game_over(self):
+        """Draw game over screen"""
+        if self.game_over_overlay is None:
+            self.build_game_over_screen()
+        self.screen.blit(self.game_over_overlay, (0, 0))
+        for surface, rect in self.game_over_texts:
+            self.screen.blit(surface, rect)
+        
+    def advance(self, frame_time):
+        """Run the fixed steps covered by this frame's (clamped) duration"""
+        self.accumulator += min(frame_time, MAX_FRAME_TIME)
+        while self.accumulator >= self.time_step:
+            self.step()
+            self.accumulator -= self.time_step
+        self.alpha = self.accumulator / self.time_step
+        
+    def render(self):
+        """Draw everything between the last two simulation states"""
+        self.draw(self.alpha)
         
     def run(self):
         """Main game loop"""
         running = True
+        previous_time = time.perf_counter()
+        self.enter()
         
         while running:
             # Handle events
@@ -285,15 +450,19 @@ class GameLevel:
             elif result == "lobby":
                 return "lobby"
                 
-            # Update game
-            self.update()
+            # Update game in fixed steps, catching up after slow frames
+            now = time.perf_counter()
+            self.advance(now - previous_time)
+            previous_time = now
             
             # Draw everything
-            self.draw()
+            self.render()
+            audio_manager.update()
             
             # Limit FPS
             self.clock.tick(FPS)
             
+        self.close()
         return False
 
 if __name__ == "__main__":
@@ -301,6 +470,7 @@ if __name__ == "__main__":
     game = GameLevel(1)
     result = game.run()
     if result:
+        game.close()
         print(f"Returning to: {result}")
     pygame.quit()
     sys.exit()
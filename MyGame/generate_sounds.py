@@ -1,91 +1,221 @@
-import pygame
-import numpy as np
 import os
+import json
 import wave
-import struct
-
-def generate_sound(frequency, duration, sample_rate=44100, volume=0.3):
-    """Generate a simple sine wave sound"""
-    frames = int(duration * sample_rate)
-    arr = np.zeros((frames, 2))
-    
-    for i in range(frames):
-        arr[i][0] = volume * np.sin(2 * np.pi * frequency * i / sample_rate)
-        arr[i][1] = volume * np.sin(2 * np.pi * frequency * i / sample_rate)
-    
-    return pygame.sndarray.make_sound((arr * 32767).astype(np.int16))
-
-def save_wav_file(filename, sound_data, sample_rate=44100):
-    """Save sound data as WAV file"""
-    with wave.open(filename, 'w') as wav_file:
+import hashlib
+import argparse
+import numpy as np
+
+SAMPLE_RATE = 44100
+SYNTH_VERSION = 1  # Bump when the synthesis changes so every file is regenerated
+SOUNDS_DIR = "assets/Sounds"
+HASH_FILE = "sound_hashes.json"  # Spec hash of each generated file, kept in the sounds folder next to them
+PARALLEL_MIN_SECONDS = 10.0  # Less audio than this is faster to make than to start worker processes
+
+# Every generated sound: kind of synthesis and its parameters (times in seconds)
+SOUND_SPECS = {
+    # Short, high-pitched beep
+    'button_click.wav': {'kind': 'tone', 'frequency': 800, 'duration': 0.1, 'volume': 0.2,
+                         'attack': 0.005, 'release': 0.05},
+    # Lower pitched, longer sound that falls away
+    'enemy_death.wav': {'kind': 'sweep', 'start': 260, 'end': 140, 'duration': 0.3, 'volume': 0.4,
+                        'attack': 0.01, 'release': 0.2},
+    # Rising tone
+    'hunt_mode_start.wav': {'kind': 'sweep', 'start': 400, 'end': 900, 'duration': 0.5, 'volume': 0.3,
+                            'attack': 0.02, 'release': 0.1},
+    # Upward arpeggio
+    'level_complete.wav': {'kind': 'arpeggio', 'notes': [400, 500, 600, 800], 'duration': 0.8, 'volume': 0.5,
+                           'attack': 0.01, 'release': 0.2},
+    # Deep, ominous sound
+    'boss_spawn.wav': {'kind': 'sweep', 'start': 150, 'end': 110, 'duration': 1.0, 'volume': 0.6,
+                       'attack': 0.2, 'release': 0.4},
+    # Quick falling buzz
+    'player_hit.wav': {'kind': 'sweep', 'start': 520, 'end': 180, 'duration': 0.25, 'volume': 0.45,
+                       'attack': 0.005, 'release': 0.12},
+}
+
+# Looping music: MIDI note numbers per step (0 = rest) for a melody and a bass
+# voice. Every step fades in and out, so the loop point falls on silence.
+MUSIC_SPECS = {
+    'lobby_music.wav': {'kind': 'music', 'tempo': 90, 'steps_per_beat': 2, 'repeats': 4, 'volume': 0.25,
+                        'attack': 0.01, 'release': 0.08,
+                        'melody': [69, 72, 76, 72, 67, 71, 74, 71, 65, 69, 72, 69, 64, 68, 71, 68],
+                        'bass': [45] * 4 + [43] * 4 + [41] * 4 + [40] * 4},
+    'level_music.wav': {'kind': 'music', 'tempo': 120, 'steps_per_beat': 2, 'repeats': 4, 'volume': 0.25,
+                        'attack': 0.01, 'release': 0.06,
+                        'melody': [72, 0, 76, 79, 76, 0, 72, 74, 71, 0, 74, 77, 74, 0, 71, 67],
+                        'bass': [48, 48, 55, 55, 45, 45, 52, 52, 43, 43, 50, 50, 47, 47, 43, 43]},
+    'hunt_music.wav': {'kind': 'music', 'tempo': 160, 'steps_per_beat': 2, 'repeats': 6, 'volume': 0.25,
+                       'attack': 0.005, 'release': 0.05,
+                       'melody': [84, 79, 76, 79, 84, 88, 84, 79, 83, 79, 74, 79, 83, 86, 83, 79],
+                       'bass': [40, 52] * 4 + [43, 55] * 4},
+    'boss_music.wav': {'kind': 'music', 'tempo': 100, 'steps_per_beat': 2, 'repeats': 4, 'volume': 0.3,
+                       'attack': 0.02, 'release': 0.1,
+                       'melody': [57, 0, 60, 0, 63, 62, 60, 0, 56, 0, 59, 0, 62, 60, 59, 0],
+                       'bass': [33] * 8 + [32] * 8},
+}
+
+# Everything the game can synthesize when its file is missing
+ASSET_SPECS = {**SOUND_SPECS, **MUSIC_SPECS}
+
+def envelope(frames, attack, release, sample_rate=SAMPLE_RATE):
+    """Linear fade in and out, so sounds start and end without a click"""
+    ramp = np.ones(frames)
+    attack_frames = min(frames, int(attack * sample_rate))
+    release_frames = min(frames, int(release * sample_rate))
+    if attack_frames:
+        ramp[:attack_frames] = np.linspace(0.0, 1.0, attack_frames, endpoint=False)
+    if release_frames:
+        ramp[frames - release_frames:] *= np.linspace(1.0, 0.0, release_frames)
+    return ramp
+
+def midi_to_hz(notes):
+    """Frequencies of MIDI note numbers; 0 (a rest) stays 0"""
+    notes = np.asarray(notes, dtype=float)
+    return np.where(notes > 0, 440.0 * 2 ** ((notes - 69) / 12), 0.0)
+
+def duration(spec):
+    """Length of a spec in seconds"""
+    if spec['kind'] == 'music':
+        return len(spec['melody']) * 60 / spec['tempo'] / spec['steps_per_beat'] * spec['repeats']
+    return spec['duration']
+
+def synthesize_music(spec, sample_rate=SAMPLE_RATE):
+    """Mono float samples of a looping music spec"""
+    step_frames = round(sample_rate * 60 / spec['tempo'] / spec['steps_per_beat'])
+    t = np.arange(step_frames) / sample_rate
+    step_envelope = envelope(step_frames, spec['attack'], spec['release'], sample_rate)
+    melody = midi_to_hz(spec['melody'])[:, None]
+    bass = midi_to_hz(spec['bass'])[:, None]
+    # One row per step; a slight second harmonic gives the bass some body
+    steps = (np.sin(2 * np.pi * melody * t)
+             + 0.5 * (np.sin(2 * np.pi * bass * t) + 0.3 * np.sin(4 * np.pi * bass * t)))
+    loop = (steps * step_envelope).ravel() / 1.65
+    return spec['volume'] * np.tile(loop, spec['repeats'])
+
+def frequencies(spec, frames, sample_rate=SAMPLE_RATE):
+    """Instantaneous frequency of every sample"""
+    if spec['kind'] == 'tone':
+        return np.full(frames, float(spec['frequency']))
+    if spec['kind'] == 'sweep':
+        # Exponential sweep: equal musical steps per unit of time
+        t = np.arange(frames) / frames
+        return spec['start'] * (spec['end'] / spec['start']) ** t
+    if spec['kind'] == 'arpeggio':
+        notes = np.asarray(spec['notes'], dtype=float)
+        return notes[np.arange(frames) * len(notes) // frames]
+    raise ValueError(f"Unknown sound kind: {spec['kind']}")
+
+def synthesize(spec, sample_rate=SAMPLE_RATE):
+    """Stereo int16 samples of a sound spec"""
+    if spec['kind'] == 'music':
+        wave_data = synthesize_music(spec, sample_rate)
+    else:
+        frames = int(spec['duration'] * sample_rate)
+        # Integrating the frequency keeps the phase continuous through sweeps and note changes
+        phase = 2 * np.pi * np.cumsum(frequencies(spec, frames, sample_rate)) / sample_rate
+        wave_data = spec['volume'] * np.sin(phase) * envelope(frames, spec['attack'], spec['release'], sample_rate)
+    mono = (wave_data * 32767).astype(np.int16)
+    return np.column_stack((mono, mono))
+
+def generate_sound(frequency, duration, sample_rate=SAMPLE_RATE, volume=0.3):
+    """Generate a simple sine wave sound (stereo int16 samples)"""
+    return synthesize({'kind': 'tone', 'frequency': frequency, 'duration': duration, 'volume': volume,
+                       'attack': 0, 'release': 0}, sample_rate)
+
+def save_wav_file(filename, sound_data, sample_rate=SAMPLE_RATE):
+    """Save stereo int16 samples as a WAV file, written straight from the array"""
+    temp_name = filename + ".tmp"
+    with wave.open(temp_name, 'wb') as wav_file:
         wav_file.setnchannels(2)  # Stereo
         wav_file.setsampwidth(2)  # 2 bytes per sample
         wav_file.setframerate(sample_rate)
-        
-        # Convert to bytes
-        sound_bytes = b''
-        for frame in sound_data:
-            left = int(frame[0])
-            right = int(frame[1])
-            sound_bytes += struct.pack('<hh', left, right)
-        
-        wav_file.writeframes(sound_bytes)
+        wav_file.writeframes(np.ascontiguousarray(sound_data, dtype='<i2').tobytes())
+    os.replace(temp_name, filename)
 
 def generate_button_click():
     """Generate a button click sound"""
-    # Short, high-pitched beep
-    sound = generate_sound(800, 0.1, volume=0.2)
-    return sound
+    return synthesize(SOUND_SPECS['button_click.wav'])
 
 def generate_enemy_death():
     """Generate an enemy death sound"""
-    # Lower pitched, longer sound
-    sound = generate_sound(200, 0.3, volume=0.4)
-    return sound
+    return synthesize(SOUND_SPECS['enemy_death.wav'])
 
 def generate_hunt_mode_start():
     """Generate hunt mode start sound"""
-    # Rising tone
-    sound = generate_sound(600, 0.5, volume=0.3)
-    return sound
+    return synthesize(SOUND_SPECS['hunt_mode_start.wav'])
 
 def generate_level_complete():
     """Generate level complete sound"""
-    # Upward arpeggio
-    sound = generate_sound(400, 0.8, volume=0.5)
-    return sound
+    return synthesize(SOUND_SPECS['level_complete.wav'])
 
 def generate_boss_spawn():
     """Generate boss spawn sound"""
-    # Deep, ominous sound
-    sound = generate_sound(150, 1.0, volume=0.6)
-    return sound
+    return synthesize(SOUND_SPECS['boss_spawn.wav'])
 
-def main():
-    pygame.mixer.init()
-    
-    # Create sounds directory
-    sounds_dir = "assets/Sounds"
-    if not os.path.exists(sounds_dir):
-        os.makedirs(sounds_dir)
-    
-    # Generate sounds
-    sounds = {
-        'button_click.wav': generate_button_click(),
-        'enemy_death.wav': generate_enemy_death(),
-        'hunt_mode_start.wav': generate_hunt_mode_start(),
-        'level_complete.wav': generate_level_complete(),
-        'boss_spawn.wav': generate_boss_spawn(),
-    }
-    
-    # Save sounds
-    for filename, sound in sounds.items():
+def spec_hash(spec, sample_rate=SAMPLE_RATE):
+    """Content hash of everything that determines a generated file"""
+    key = json.dumps([SYNTH_VERSION, sample_rate, spec], sort_keys=True)
+    return hashlib.sha1(key.encode()).hexdigest()
+
+def build_sound(job):
+    """Synthesize and save one sound (runs in a worker process)"""
+    filepath, spec, sample_rate = job
+    save_wav_file(filepath, synthesize(spec, sample_rate), sample_rate)
+    return filepath
+
+def load_hashes(hash_file):
+    try:
+        with open(hash_file) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+def generate_all(sounds_dir=SOUNDS_DIR, specs=SOUND_SPECS, sample_rate=SAMPLE_RATE, jobs=None, force=False):
+    """
+    Generate every sound whose parameters changed since it was last written.
+    Returns (generated paths, number of files that were up to date).
+    """
+    os.makedirs(sounds_dir, exist_ok=True)
+    hash_file = os.path.join(sounds_dir, HASH_FILE)
+    hashes = {} if force else load_hashes(hash_file)
+    stale = []
+    for filename, spec in specs.items():
         filepath = os.path.join(sounds_dir, filename)
-        # Get sound data and save as WAV
-        sound_array = pygame.sndarray.array(sound)
-        save_wav_file(filepath, sound_array)
+        digest = spec_hash(spec, sample_rate)
+        if hashes.get(filename) != digest or not os.path.exists(filepath):
+            stale.append(((filepath, spec, sample_rate), digest))
+
+    jobs_list = [job for job, _ in stale]
+    if jobs is None:
+        seconds = sum(duration(spec) for _, spec, _ in jobs_list)
+        jobs = (os.cpu_count() or 1) if seconds >= PARALLEL_MIN_SECONDS else 1
+    if len(jobs_list) > 1 and jobs > 1:
+        # Imported here: the game's synthesis thread never needs it, and it
+        # cannot be imported while the interpreter is shutting down
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            generated = list(pool.map(build_sound, jobs_list))
+    else:
+        generated = [build_sound(job) for job in jobs_list]
+
+    if stale:
+        hashes.update({os.path.basename(job[0]): digest for job, digest in stale})
+        with open(hash_file, "w") as file:
+            json.dump(hashes, file, indent=1, sort_keys=True)
+    return generated, len(specs) - len(stale)
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate the game's sound effects")
+    parser.add_argument("--force", action="store_true", help="regenerate even unchanged sounds")
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes (default: one per CPU for long batches)")
+    args = parser.parse_args()
+
+    generated, up_to_date = generate_all(jobs=args.jobs, force=args.force)
+    for filepath in generated:
         print(f"Generated: {filepath}")
-    
+    if up_to_date:
+        print(f"Up to date: {up_to_date} sounds")
+
     print("All sounds generated successfully!")
 
 if __name__ == "__main__":
@@ -0,0 +1,98 @@
+import os
+import sys
+import time
+import random
+import argparse
+
+# Dummy drivers must be selected before pygame and the audio manager start
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+from settings import *
+
+MOVE_KEYS = [pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN]
+
+class ScriptedKeys:
+    """Stand-in for pygame.key.get_pressed() holding a fixed set of keys"""
+
+    def __init__(self, pressed=()):
+        self.pressed = set(pressed)
+
+    def __getitem__(self, key):
+        return key in self.pressed
+
+def random_walk_script(seed=0, hold_ticks=30, hunt_every=SIMULATION_HZ * HUNT_MODE_COOLDOWN):
+    """
+    Build an input script: the player holds a random direction for
+    hold_ticks ticks and presses SPACE whenever hunt mode may be ready.
+    """
+    rng = random.Random(seed)
+    state = {"keys": ScriptedKeys()}
+
+    def script(tick):
+        if tick % hold_ticks == 0:
+            state["keys"] = ScriptedKeys(rng.sample(MOVE_KEYS, rng.randint(0, 2)))
+        keys = state["keys"]
+        if tick % hunt_every == 0:
+            keys = ScriptedKeys(keys.pressed | {pygame.K_SPACE})
+        return keys
+
+    return script
+
+def run_headless(level_num, ticks, script=None, stop_on_game_over=True):
+    """
+    Step a GameLevel's update() as fast as possible for a number of ticks.
+
+    script(tick) returns the pressed keys for that tick. The run stops early
+    when the level ends unless stop_on_game_over is False. Returns a dict
+    with the ticks run, elapsed seconds and ticks per second.
+    """
+    from game_level import GameLevel
+
+    game = GameLevel(level_num, headless=True)
+    if script is None:
+        script = random_walk_script()
+
+    start = time.perf_counter()
+    ran = 0
+    for tick in range(ticks):
+        keys = script(tick)
+        if keys[pygame.K_SPACE]:
+            game.try_activate_hunt_mode()
+        game.step(keys)
+        ran += 1
+        if stop_on_game_over and game.game_over:
+            break
+    elapsed = time.perf_counter() - start
+
+    return {
+        "level": level_num,
+        "ticks": ran,
+        "seconds": elapsed,
+        "ticks_per_second": ran / elapsed if elapsed > 0 else float("inf"),
+        "game_over": game.game_over,
+        "victory": game.victory,
+        "enemies_left": game.level.enemies_left(),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Run MAZE HUNT levels headless and uncapped")
+    parser.add_argument("--level", type=int, action="append", help="level to run (repeatable, default: all)")
+    parser.add_argument("--ticks", type=int, default=SIMULATION_HZ * 60, help="simulation ticks per level")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the scripted input")
+    args = parser.parse_args()
+
+    levels = args.level or list(range(1, 10))
+    for level_num in levels:
+        random.seed(args.seed)
+        result = run_headless(level_num, args.ticks, random_walk_script(args.seed))
+        ending = ""
+        if result["game_over"]:
+            ending = ", victory" if result["victory"] else ", game over"
+        print(f"Level {result['level']}: {result['ticks']} ticks in {result['seconds']:.3f}s "
+              f"({result['ticks_per_second']:.0f} ticks/s), enemies left: {result['enemies_left']}{ending}")
+    pygame.quit()
+
+if __name__ == "__main__":
+    sys.exit(main())
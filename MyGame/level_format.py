@@ -0,0 +1,293 @@
+import os
+import mmap
+import struct
+from collections import namedtuple
+from settings import *
+
+# File layout (little endian):
+#   header   magic, format version, level number, grid cols/rows, grid cell
+#            width/height, wall count, spawn count
+#   grid     cols * rows tile bytes (empty for levels not built from a grid)
+#   walls    merged wall rects in pixels: x, y, width, height
+#   spawns   kind, enemy type and pixel position of every entity
+LEVEL_MAGIC = b"MZHL"
+LEVEL_FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sHHHHHHII")
+WALL = struct.Struct("<iiii")
+SPAWN = struct.Struct("<BBff")
+
+# Tile codes used in the grid
+TILE_FREE = 0
+TILE_WALL = 1
+TILE_PLAYER = 2
+TILE_ENEMY = 3
+TILE_BOSS = 4
+TILE_CODES = {'.': TILE_FREE, '#': TILE_WALL, 'P': TILE_PLAYER, 'E': TILE_ENEMY, 'B': TILE_BOSS}
+TILE_TABLE = bytes.maketrans(''.join(TILE_CODES).encode('ascii'), bytes(TILE_CODES.values()))
+
+# Spawn kinds and enemy types
+SPAWN_PLAYER = 0
+SPAWN_ENEMY = 1
+SPAWN_BOSS = 2
+ENEMY_TYPES = ("circle", "square", "triangle")
+RANDOM_TYPE = 255  # Enemy type picked when the level is built
+
+LevelData = namedtuple("LevelData", "level_num cols rows cell_width cell_height grid walls spawns")
+
+class LevelFormatError(ValueError):
+    """Raised for malformed patterns and level files"""
+
+def level_path(level_num, directory=LEVEL_DATA_DIR):
+    """Path of the compiled file for a level number"""
+    return os.path.join(directory, f"level_{level_num}.mzl")
+
+def world_path(level_num, directory=LEVEL_DATA_DIR):
+    """Path of the streamed world file that replaces a level when present"""
+    return os.path.join(directory, f"world_{level_num}.mzw")
+
+def compile_pattern(pattern):
+    """
+    Check a text pattern and return it as (cols, rows, tile bytes). Empty
+    patterns, ragged rows, unknown characters and a player count other
+    than one are rejected instead of producing a broken maze.
+    """
+    if not pattern or not pattern[0]:
+        raise LevelFormatError("pattern is empty")
+    cols = len(pattern[0])
+    grid = bytearray()
+    for y, row in enumerate(pattern):
+        if len(row) != cols:
+            raise LevelFormatError(f"row {y} has {len(row)} cells, expected {cols}")
+        if not set(row) <= TILE_CODES.keys():
+            x = next(x for x, cell in enumerate(row) if cell not in TILE_CODES)
+            raise LevelFormatError(f"unknown tile {row[x]!r} at ({x}, {y})")
+        grid += row.encode('ascii').translate(TILE_TABLE)
+    players = grid.count(TILE_PLAYER)
+    if players != 1:
+        raise LevelFormatError(f"pattern needs exactly one player, found {players}")
+    return cols, len(pattern), bytes(grid)
+
+def pattern_spawns(level_num, pattern, cell_width, cell_height):
+    """Spawn table for the entity tiles of a checked pattern"""
+    boss_type = "circle" if level_num == 3 else "square" if level_num == 6 else "triangle"
+    kinds = {'P': (SPAWN_PLAYER, RANDOM_TYPE),
+             'E': (SPAWN_ENEMY, RANDOM_TYPE),
+             'B': (SPAWN_BOSS, ENEMY_TYPES.index(boss_type))}
+    spawns = []
+    for y, row in enumerate(pattern):
+        for x, cell in enumerate(row):
+            if cell in kinds:
+                kind, enemy_type = kinds[cell]
+                spawns.append((kind, enemy_type, x * cell_width + cell_width // 2, y * cell_height + cell_height // 2))
+    return spawns
+
+def encode_level(level_num, walls, spawns, grid=b"", cols=0, rows=0, cell_width=0, cell_height=0):
+    """Pack a level into the binary format"""
+    if len(grid) != cols * rows:
+        raise LevelFormatError(f"grid has {len(grid)} tiles, expected {cols * rows}")
+    parts = [HEADER.pack(LEVEL_MAGIC, LEVEL_FORMAT_VERSION, level_num, cols, rows,
+                         cell_width, cell_height, len(walls), len(spawns)), bytes(grid)]
+    parts.extend(WALL.pack(*rect) for rect in walls)
+    parts.extend(SPAWN.pack(*spawn) for spawn in spawns)
+    return b"".join(parts)
+
+def encode_pattern(level_num, pattern):
+    """Compile a text pattern (grid, merged walls and spawns) to the binary format"""
+    from maze_designer import MazeDesigner
+    cols, rows, grid = compile_pattern(pattern)
+    cell_width = SCREEN_WIDTH // cols
+    cell_height = SCREEN_HEIGHT // rows
+    walls = [(x * cell_width, y * cell_height, width * cell_width, height * cell_height)
+             for x, y, width, height in MazeDesigner.merge_wall_cells(pattern)]
+    spawns = pattern_spawns(level_num, pattern, cell_width, cell_height)
+    return encode_level(level_num, walls, spawns, grid, cols, rows, cell_width, cell_height)
+
+def encode_built_level(level):
+    """Convert a built Level (walls and entity sprites) to the binary format"""
+    walls = [tuple(wall.rect) for wall in level.walls]
+    spawns = [(SPAWN_PLAYER, RANDOM_TYPE, level.player.pos.x, level.player.pos.y)]
+    for enemy in level.enemies:
+        kind = SPAWN_BOSS if enemy.is_boss else SPAWN_ENEMY
+        spawns.append((kind, ENEMY_TYPES.index(enemy.enemy_type), enemy.pos.x, enemy.pos.y))
+    return encode_level(level.level_num, walls, spawns)
+
+def decode_level(buffer):
+    """Read a level from any buffer (bytes, mmap) with struct-level unpacking"""
+    if len(buffer) < HEADER.size:
+        raise LevelFormatError("file is too short for a level header")
+    magic, version, level_num, cols, rows, cell_width, cell_height, wall_count, spawn_count = \
+        HEADER.unpack_from(buffer, 0)
+    if magic != LEVEL_MAGIC:
+        raise LevelFormatError("not a level file")
+    if version != LEVEL_FORMAT_VERSION:
+        raise LevelFormatError(f"unsupported level format version {version}")
+
+    grid_end = HEADER.size + cols * rows
+    walls_end = grid_end + wall_count * WALL.size
+    spawns_end = walls_end + spawn_count * SPAWN.size
+    if len(buffer) != spawns_end:
+        raise LevelFormatError(f"file has {len(buffer)} bytes, header describes {spawns_end}")
+
+    view = memoryview(buffer)
+    try:
+        grid = bytes(view[HEADER.size:grid_end])
+        walls = list(WALL.iter_unpack(view[grid_end:walls_end]))
+        spawns = list(SPAWN.iter_unpack(view[walls_end:spawns_end]))
+    finally:
+        view.release()
+    return LevelData(level_num, cols, rows, cell_width, cell_height, grid, walls, spawns)
+
+def load_level_file(path):
+    """Memory-map a compiled level file and decode it"""
+    with open(path, "rb") as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            return decode_level(buffer)
+
+# Streamed worlds (see chunk_stream.py) are split into square chunks of
+# tiles so a chunk can be read on its own:
+#   header   magic, format version, level number, grid cols/rows, cell size,
+#            chunk side in tiles, chunk cols/rows, player position
+#   index    byte offset and spawn count of every chunk, row by row
+#   chunks   chunk_tiles * chunk_tiles tile bytes (walls past the grid edge)
+#            followed by the chunk's spawn records
+WORLD_MAGIC = b"MZHW"
+WORLD_FORMAT_VERSION = 1
+WORLD_HEADER = struct.Struct("<4sHHIIHHHHff")
+CHUNK_INDEX = struct.Struct("<IH")
+
+def encode_world(level_num, pattern, cell_size, chunk_tiles=STREAM_CHUNK_TILES):
+    """Compile a (possibly huge) text pattern into the chunked world format"""
+    cols, rows, grid = compile_pattern(pattern)
+    chunk_cols = (cols + chunk_tiles - 1) // chunk_tiles
+    chunk_rows = (rows + chunk_tiles - 1) // chunk_tiles
+    player = grid.index(TILE_PLAYER)
+    half = cell_size // 2
+    boss_type = ENEMY_TYPES.index("circle" if level_num == 3 else "square" if level_num == 6 else "triangle")
+    enemy_kinds = ((TILE_ENEMY, SPAWN_ENEMY, RANDOM_TYPE), (TILE_BOSS, SPAWN_BOSS, boss_type))
+
+    index = []
+    chunks = []
+    offset = WORLD_HEADER.size + chunk_cols * chunk_rows * CHUNK_INDEX.size
+    for cy in range(chunk_rows):
+        for cx in range(chunk_cols):
+            x0, y0 = cx * chunk_tiles, cy * chunk_tiles
+            tiles = bytearray()
+            for y in range(y0, y0 + chunk_tiles):
+                row = grid[y * cols + x0:y * cols + min(x0 + chunk_tiles, cols)] if y < rows else b""
+                tiles += row + bytes([TILE_WALL]) * (chunk_tiles - len(row))
+            spawns = []
+            for tile, kind, enemy_type in enemy_kinds:
+                found = tiles.find(tile)
+                while found >= 0:
+                    x = x0 + found % chunk_tiles
+                    y = y0 + found // chunk_tiles
+                    spawns.append(SPAWN.pack(kind, enemy_type, x * cell_size + half, y * cell_size + half))
+                    found = tiles.find(tile, found + 1)
+            index.append(CHUNK_INDEX.pack(offset, len(spawns)))
+            chunks.append(bytes(tiles))
+            chunks.extend(spawns)
+            offset += len(tiles) + len(spawns) * SPAWN.size
+
+    header = WORLD_HEADER.pack(WORLD_MAGIC, WORLD_FORMAT_VERSION, level_num, cols, rows, cell_size, chunk_tiles,
+                               chunk_cols, chunk_rows, (player % cols) * cell_size + half,
+                               (player // cols) * cell_size + half)
+    return b"".join([header, *index, *chunks])
+
+class WorldFile:
+    """
+    Memory-mapped chunked world. Only the header and the chunk index are
+    decoded up front; read_chunk() slices one chunk out of the mapping.
+    """
+
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        self.buffer = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.buffer) < WORLD_HEADER.size:
+            self.close()
+            raise LevelFormatError("file is too short for a world header")
+        (magic, version, self.level_num, self.cols, self.rows, self.cell_size, self.chunk_tiles,
+         self.chunk_cols, self.chunk_rows, player_x, player_y) = WORLD_HEADER.unpack_from(self.buffer, 0)
+        if magic != WORLD_MAGIC:
+            self.close()
+            raise LevelFormatError("not a world file")
+        if version != WORLD_FORMAT_VERSION:
+            self.close()
+            raise LevelFormatError(f"unsupported world format version {version}")
+        self.player_spawn = (player_x, player_y)
+        self.chunk_pixels = self.chunk_tiles * self.cell_size
+        self.index = list(CHUNK_INDEX.iter_unpack(
+            self.buffer[WORLD_HEADER.size:WORLD_HEADER.size + self.chunk_cols * self.chunk_rows * CHUNK_INDEX.size]))
+
+    def contains(self, key):
+        """True for chunk coordinates inside the world"""
+        return 0 <= key[0] < self.chunk_cols and 0 <= key[1] < self.chunk_rows
+
+    def spawn_count(self, key):
+        """Number of enemies a chunk starts with"""
+        return self.index[key[1] * self.chunk_cols + key[0]][1]
+
+    def read_chunk(self, key):
+        """Tile bytes and spawn records of one chunk"""
+        offset, spawn_count = self.index[key[1] * self.chunk_cols + key[0]]
+        tiles_end = offset + self.chunk_tiles * self.chunk_tiles
+        tiles = self.buffer[offset:tiles_end]
+        spawns = list(SPAWN.iter_unpack(self.buffer[tiles_end:tiles_end + spawn_count * SPAWN.size]))
+        return tiles, spawns
+
+    def close(self):
+        self.buffer.close()
+        self.file.close()
+
+def write_level_file(path, data):
+    """Write encoded level bytes, creating the directory if needed"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "wb") as file:
+        file.write(data)
+
+def export_levels(directory=LEVEL_DATA_DIR, seed=0):
+    """
+    Compile the nine game levels, as Level builds them, plus the designer
+    patterns. Random enemy placement and types are fixed with the seed.
+    """
+    import random
+    from sprites import Level
+    from maze_designer import MazeDesigner
+    random.seed(seed)
+    written = []
+    for level_num in range(1, 10):
+        level = Level(level_num, use_level_file=False)
+        path = level_path(level_num, directory)
+        write_level_file(path, encode_built_level(level))
+        written.append(path)
+    for level_num, pattern in MazeDesigner.PATTERNS.items():
+        path = os.path.join(directory, f"pattern_{level_num}.mzl")
+        write_level_file(path, encode_pattern(level_num, pattern))
+        written.append(path)
+    return written
+
+def export_world(level_num, size, directory=LEVEL_DATA_DIR, seed=0, cell_size=48):
+    """
+    Generate a size x size maze and write it as the streamed world of a
+    level; Level.load() then streams it instead of building the level.
+    """
+    from maze_designer import MazeDesigner
+    pattern = MazeDesigner.generate_pattern(size, size, seed=seed, enemies=size * size // 200)
+    path = world_path(level_num, directory)
+    write_level_file(path, encode_world(level_num, pattern, cell_size))
+    return path
+
+if __name__ == "__main__":
+    import argparse
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    parser = argparse.ArgumentParser(description="Compile the game levels into level files")
+    parser.add_argument("directory", nargs="?", default=LEVEL_DATA_DIR)
+    parser.add_argument("--world", nargs=2, type=int, metavar=("LEVEL", "SIZE"),
+                        help="write a generated SIZE x SIZE streamed world for LEVEL instead")
+    args = parser.parse_args()
+    if args.world:
+        paths = [export_world(*args.world, directory=args.directory)]
+    else:
+        paths = export_levels(args.directory)
+    for path in paths:
+        print(f"Wrote {path} ({os.path.getsize(path)} bytes)")
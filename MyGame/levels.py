@@ -1,13 +1,17 @@
 import pygame
 import sys
 from settings import *
+from dirty_rect import DirtyRectRenderer
 
 class LevelSelection:
-    def __init__(self):
-        pygame.init()
-        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-        pygame.display.set_caption("MAZE HUNT - Select Level")
-        self.clock = pygame.time.Clock()
+    def __init__(self, screen=None, clock=None):
+        # Run standalone with its own window, or share the scene manager's
+        if screen is None:
+            pygame.init()
+            screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+        self.screen = screen
+        self.clock = clock or pygame.time.Clock()
+        self.renderer = DirtyRectRenderer()
         
         # Colors
         self.BLACK = (0, 0, 0)
@@ -96,10 +100,16 @@ class LevelSelection:
             elif event.type == pygame.MOUSEMOTION:
                 # Check level button hover states
                 for i, button in enumerate(self.level_buttons):
-                    self.level_hovers[i] = button.collidepoint(event.pos)
+                    hover = button.collidepoint(event.pos)
+                    if hover != self.level_hovers[i]:
+                        self.renderer.mark(button)
+                    self.level_hovers[i] = hover
                     
                 # Check back button hover
-                self.back_hover = self.back_button.collidepoint(event.pos)
+                back_hover = self.back_button.collidepoint(event.pos)
+                if back_hover != self.back_hover:
+                    self.renderer.mark(self.back_button)
+                self.back_hover = back_hover
                 
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 if event.button == 1:  # Left click
@@ -114,9 +124,42 @@ class LevelSelection:
         
         return True
         
+    def enter(self):
+        """Prepare the scene to be shown again"""
+        pygame.display.set_caption("MAZE HUNT - Select Level")
+        self.renderer.invalidate()
+        
+    def advance(self, frame_time):
+        """Menus have no simulation to advance"""
+        pass
+        
+    def render(self):
+        """Draw the level selection and present it"""
+        # Clear screen
+        self.screen.fill(self.BLACK)
+        
+        # Draw title
+        title_text = "SELECT LEVEL"
+        title_surface = self.title_font.render(title_text, True, self.WHITE)
+        title_rect = title_surface.get_rect(center=(SCREEN_WIDTH//2, 100))
+        self.screen.blit(title_surface, title_rect)
+        
+        # Draw level buttons
+        for i, button in enumerate(self.level_buttons):
+            level_num = i + 1
+            is_boss = self.is_boss_level(i)
+            self.draw_level_button(button, level_num, self.level_hovers[i], is_boss)
+        
+        # Draw back button
+        self.draw_back_button(self.back_button, self.back_hover)
+        
+        # Update display
+        self.renderer.present()
+        
     def run(self):
         """Main level selection loop"""
         running = True
+        self.enter()
         
         while running:
             # Handle events
@@ -129,26 +172,7 @@ class LevelSelection:
             elif result and isinstance(result, str) and result.startswith("level_"):
                 return result
             
-            # Clear screen
-            self.screen.fill(self.BLACK)
-            
-            # Draw title
-            title_text = "SELECT LEVEL"
-            title_surface = self.title_font.render(title_text, True, self.WHITE)
-            title_rect = title_surface.get_rect(center=(SCREEN_WIDTH//2, 100))
-            self.screen.blit(title_surface, title_rect)
-            
-            # Draw level buttons
-            for i, button in enumerate(self.level_buttons):
-                level_num = i + 1
-                is_boss = self.is_boss_level(i)
-                self.draw_level_button(button, level_num, self.level_hovers[i], is_boss)
-            
-            # Draw back button
-            self.draw_back_button(self.back_button, self.back_hover)
-            
-            # Update display
-            pygame.display.flip()
+            self.render()
             self.clock.tick(60)
             
         return False
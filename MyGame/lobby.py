@@ -2,13 +2,17 @@ import pygame
 import sys
 import os
 from settings import *
+from dirty_rect import DirtyRectRenderer
 
 class Lobby:
-    def __init__(self):
-        pygame.init()
-        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-        pygame.display.set_caption("MAZE HUNT")
-        self.clock = pygame.time.Clock()
+    def __init__(self, screen=None, clock=None):
+        # Run standalone with its own window, or share the scene manager's
+        if screen is None:
+            pygame.init()
+            screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+        self.screen = screen
+        self.clock = clock or pygame.time.Clock()
+        self.renderer = DirtyRectRenderer()
         
         # Colors
         self.BLACK = (0, 0, 0)
@@ -70,8 +74,14 @@ class Lobby:
                 
             elif event.type == pygame.MOUSEMOTION:
                 # Check button hover states
-                self.play_hover = self.play_button.collidepoint(event.pos)
-                self.options_hover = self.options_button.collidepoint(event.pos)
+                play_hover = self.play_button.collidepoint(event.pos)
+                options_hover = self.options_button.collidepoint(event.pos)
+                if play_hover != self.play_hover:
+                    self.renderer.mark(self.play_button)
+                if options_hover != self.options_hover:
+                    self.renderer.mark(self.options_button)
+                self.play_hover = play_hover
+                self.options_hover = options_hover
                 
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 if event.button == 1:  # Left click
@@ -82,9 +92,37 @@ class Lobby:
         
         return True
         
+    def enter(self):
+        """Prepare the scene to be shown again"""
+        pygame.display.set_caption("MAZE HUNT")
+        self.renderer.invalidate()
+        
+    def advance(self, frame_time):
+        """Menus have no simulation to advance"""
+        pass
+        
+    def render(self):
+        """Draw the lobby and present it"""
+        # Clear screen
+        self.screen.fill(self.BLACK)
+        
+        # Draw title
+        title_text = "MAZE HUNT"
+        title_surface = self.title_font.render(title_text, True, self.GRAY)
+        title_rect = title_surface.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2 - 100))
+        self.draw_pixelated_text(title_text, self.title_font, self.GRAY, title_rect.x, title_rect.y)
+        
+        # Draw buttons
+        self.draw_button(self.play_button, "PLAY", self.play_hover, self.button_font)
+        self.draw_button(self.options_button, "OPTIONS", self.options_hover, self.button_font)
+        
+        # Update display
+        self.renderer.present()
+        
     def run(self):
         """Main lobby loop"""
         running = True
+        self.enter()
         
         while running:
             # Handle events
@@ -97,21 +135,7 @@ class Lobby:
             elif result == "options":
                 return "options"
             
-            # Clear screen
-            self.screen.fill(self.BLACK)
-            
-            # Draw title
-            title_text = "MAZE HUNT"
-            title_surface = self.title_font.render(title_text, True, self.GRAY)
-            title_rect = title_surface.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2 - 100))
-            self.draw_pixelated_text(title_text, self.title_font, self.GRAY, title_rect.x, title_rect.y)
-            
-            # Draw buttons
-            self.draw_button(self.play_button, "PLAY", self.play_hover, self.button_font)
-            self.draw_button(self.options_button, "OPTIONS", self.options_hover, self.button_font)
-            
-            # Update display
-            pygame.display.flip()
+            self.render()
             self.clock.tick(60)
             
         return False
@@ -4,22 +4,36 @@ import os
 from lobby import Lobby
 from levels import LevelSelection
 from options import Options
-from game_level import GameLevel
+from audio import audio_manager
 from settings import *
 
 class Game:
+    """
+    Scene manager: owns the only display surface and clock and keeps the
+    menu scenes alive between visits, so switching scenes only swaps the
+    active object instead of re-creating windows, fonts and layouts.
+    """
+
     def __init__(self):
-        pygame.init()
+        # Only what the menus need; the mixer starts with the first sound
+        pygame.display.init()
+        pygame.font.init()
         self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
         pygame.display.set_caption("MAZE HUNT")
         self.clock = pygame.time.Clock()
         self.running = True
         
-        # Initialize game states
+        # Initialize game states; menus are built once and stay warm
+        self.scenes = {
+            "lobby": Lobby(self.screen, self.clock),
+            "levels": LevelSelection(self.screen, self.clock),
+            "options": Options(self.screen, self.clock),
+        }
         self.current_state = "lobby"
-        self.lobby = Lobby()
-        self.level_selection = LevelSelection()
-        self.options = Options()
+        self.scene = self.scenes["lobby"]
+        
+        # Missing sound files are synthesized in the background meanwhile
+        audio_manager.prepare()
         
         # Game settings
         self.brightness = 1.0
@@ -27,57 +41,50 @@ class Game:
         self.music_volume = MUSIC_VOLUME
         self.sfx_volume = SFX_VOLUME
         
+    def switch(self, state):
+        """Make another scene the active one"""
+        # Levels are created per visit; let the one being left release its resources
+        if self.current_state.startswith("level_"):
+            self.scene.close()
+        if state.startswith("level_"):
+            level_num = int(state.split("_")[1])
+            self.scene = self.start_level(level_num)
+        else:
+            self.scene = self.scenes[state]
+        self.current_state = state
+        self.scene.enter()
+        
+    def start_level(self, level_num):
+        """Create a game level that draws on the shared screen"""
+        # Levels pull in sprites, navigation and NumPy: import on first play
+        from game_level import GameLevel
+        return GameLevel(level_num, screen=self.screen, clock=self.clock)
+        
     def run(self):
         """Main game loop"""
+        self.scene.enter()
+        frame_time = 0.0
+        
         while self.running:
-            if self.current_state == "lobby":
-                result = self.lobby.run()
-                if result == "levels":
-                    self.current_state = "levels"
-                elif result == "options":
-                    self.current_state = "options"
-                elif result == False:
-                    self.running = False
-                    
-            elif self.current_state == "levels":
-                result = self.level_selection.run()
-                if result == "lobby":
-                    self.current_state = "lobby"
-                elif result and isinstance(result, str) and result.startswith("level_"):
-                    # Start the actual game level
-                    level_num = int(result.split("_")[1])
-                    self.start_level(level_num)
-                elif result == False:
-                    self.running = False
-                    
-            elif self.current_state == "options":
-                result = self.options.run()
-                if result == "lobby":
-                    self.current_state = "lobby"
-                elif result == False:
-                    self.running = False
-                
-            elif self.current_state.startswith("game_level_"):
-                level_num = int(self.current_state.split("_")[2])
-                game_level = GameLevel(level_num)
-                result = game_level.run()
-                if result == "lobby":
-                    self.current_state = "lobby"
-                elif result == False:
-                    self.running = False
+            result = self.scene.handle_events()
+            if result == False:
+                self.running = False
+                break
+            if isinstance(result, str):
+                self.switch(result)
                 
+            self.scene.advance(frame_time)
+            self.scene.render()
+            audio_manager.update()
+            
             # Limit FPS
-            self.clock.tick(FPS)
+            frame_time = self.clock.tick(FPS) / 1000
             
+        if self.current_state.startswith("level_"):
+            self.scene.close()
         pygame.quit()
         sys.exit()
         
-    def start_level(self, level_num):
-        """Start a specific game level"""
-        print(f"Starting level {level_num}")
-        # TODO: Implement actual game level logic
-        self.current_state = f"game_level_{level_num}"
-
 if __name__ == "__main__":
     game = Game()
     game.run()
@@ -1,15 +1,70 @@
 import pygame
 from sprites import Wall, Enemy, Player
 from settings import *
+from level_format import compile_pattern
 import random
+import re
 
 class MazeDesigner:
     """
     Herramienta para diseñar laberintos personalizados
     """
     
+    # Patrones predefinidos para cada nivel
+    PATTERNS = {
+        1: [
+            "###################",
+            "#P........#.......#",
+            "#.#######.#.####..#",
+            "#.#.....#.#.#..#..#",
+            "#.#.###.#.#.#.##..#",
+            "#.#.#...#.#.#..#..#",
+            "#.#.#.###.#.####..#",
+            "#.#.#.....#....#..#",
+            "#.#.#########.##..#",
+            "#.#...........#...#",
+            "#.#############...#",
+            "#.................#",
+            "###################"
+        ],
+        2: [
+            "###################",
+            "#P....#...#.......#",
+            "#.###.#.#.#.####..#",
+            "#...#.#.#.#.#..#..#",
+            "###.#.#.#.#.#.##..#",
+            "#...#.#...#.#..#..#",
+            "#.###.#####.####..#",
+            "#....#.....#....#.#",
+            "####.#.###.#.###..#",
+            "#....#.#...#.#....#",
+            "#.######.#.###.##.#",
+            "#........#.....#E.#",
+            "###################"
+        ],
+        3: [
+            "###################",
+            "#P................#",
+            "#.###############.#",
+            "#.#...........#.#.#",
+            "#.#.#########.#.#.#",
+            "#.#.#.......#.#.#.#",
+            "#.#.#.#####.#.#.#.#",
+            "#.#.#.#...#.#.#.#.#",
+            "#.#.#.#.#.#.#.#.#.#",
+            "#.#.#.#...#.#.#.#.#",
+            "#.#.#.#####.#.#.#.#",
+            "#.#.#.......#.#.#.#",
+            "#.#.#########.#.#.#",
+            "#.#...........#.#.#",
+            "#.###############.#",
+            "#...............B.#",
+            "###################"
+        ]
+    }
+    
     @staticmethod
-    def create_maze_from_pattern(level_num, pattern=None):
+    def create_maze_from_pattern(level_num, pattern=None, cell_size=None):
         """
         Crea un laberinto basado en un patrón de texto
         
@@ -25,79 +80,40 @@ class MazeDesigner:
         enemies = pygame.sprite.Group()
         player = None
         
-        # Patrones predefinidos para cada nivel
-        patterns = {
-            1: [
-                "###################",
-                "#P........#......#",
-                "#.#######.#.####.#",
-                "#.#.....#.#.#..#.#",
-                "#.#.###.#.#.#.##.#",
-                "#.#.#...#.#.#..#.#",
-                "#.#.#.###.#.####.#",
-                "#.#.#.....#....#.#",
-                "#.#.#########.##.#",
-                "#.#...........#.#",
-                "#.#############.#",
-                "#...............#",
-                "###################"
-            ],
-            2: [
-                "###################",
-                "#P....#...#......#",
-                "#.###.#.#.#.####.#",
-                "#...#.#.#.#.#..#.#",
-                "###.#.#.#.#.#.##.#",
-                "#...#.#...#.#..#.#",
-                "#.###.#####.####.#",
-                "#....#.....#....#.",
-                "####.#.###.#.###.#",
-                "#....#.#...#.#...#",
-                "#.######.#.###.###",
-                "#........#.....#E#",
-                "###################"
-            ],
-            3: [
-                "###################",
-                "#P...............#",
-                "#.###############.#",
-                "#.#...........#.#.#",
-                "#.#.#########.#.#.#",
-                "#.#.#.......#.#.#.#",
-                "#.#.#.#####.#.#.#.#",
-                "#.#.#.#...#.#.#.#.#",
-                "#.#.#.#.#.#.#.#.#.#",
-                "#.#.#.#...#.#.#.#.#",
-                "#.#.#.#####.#.#.#.#",
-                "#.#.#.......#.#.#.#",
-                "#.#.#########.#.#.#",
-                "#.#...........#.#.#",
-                "#.###############.#",
-                "#...............B#",
-                "###################"
-            ]
-        }
-        
         if pattern is None:
-            pattern = patterns.get(level_num, patterns[1])
+            pattern = MazeDesigner.PATTERNS.get(level_num)
+        if pattern is None:
+            # Niveles sin patrón propio: laberinto generado con su número como semilla
+            pattern = MazeDesigner.generate_pattern(MAZE_GENERATED_COLS, MAZE_GENERATED_ROWS, seed=level_num,
+                                                    enemies=3 + level_num // 3)
+        
+        # Rechazar patrones mal formados (filas irregulares, caracteres desconocidos)
+        compile_pattern(pattern)
         
         # Dimensiones del patrón
         pattern_height = len(pattern)
         pattern_width = len(pattern[0])
         
-        # Calcular tamaño de cada celda
-        cell_width = SCREEN_WIDTH // pattern_width
-        cell_height = SCREEN_HEIGHT // pattern_height
+        # Calcular tamaño de cada celda (por defecto el patrón ocupa la pantalla)
+        if cell_size:
+            cell_width = cell_height = cell_size
+        else:
+            cell_width = SCREEN_WIDTH // pattern_width
+            cell_height = SCREEN_HEIGHT // pattern_height
         
-        # Crear laberinto basado en el patrón
+        # Paredes: celdas '#' fusionadas en rectángulos
+        for x, y, width, height in MazeDesigner.merge_wall_cells(pattern):
+            walls.add(Wall(x * cell_width, y * cell_height, width * cell_width, height * cell_height))
+        
+        # Crear entidades basadas en el patrón
         for y, row in enumerate(pattern):
+            if not row.strip('#.'):
+                continue  # Fila sin entidades
             for x, cell in enumerate(row):
                 cell_x = x * cell_width
                 cell_y = y * cell_height
                 
-                if cell == '#':  # Pared
-                    walls.add(Wall(cell_x, cell_y, cell_width, cell_height))
-                elif cell == 'P':  # Jugador
+                if cell == 'P':  # Jugador
                     player = Player(cell_x + cell_width//2, cell_y + cell_height//2)
                 elif cell == 'E':  # Enemigo
                     enemy_type = random.choice(["circle", "square", "triangle"])
@@ -110,6 +126,138 @@ class MazeDesigner:
         
         return walls, enemies, player
     
+    @staticmethod
+    def merge_wall_cells(pattern):
+        """
+        Fusiona las celdas '#' del patrón en rectángulos (en unidades de celda)
+        
+        Primero agrupa cada fila en tramos horizontales y luego extiende hacia
+        abajo cada tramo que coincide exactamente con uno de la fila anterior.
+        Devuelve una lista de tuplas (x, y, ancho, alto).
+        """
+        rects = []
+        open_runs = {}  # (inicio, fin) -> [x, y, ancho, alto] aún extensible
+        
+        for y, row in enumerate(pattern):
+            runs = [match.span() for match in re.finditer('#+', row)]
+            
+            next_runs = {}
+            for run in runs:
+                rect = open_runs.pop(run, None)
+                if rect is not None:
+                    rect[3] += 1
+                else:
+                    rect = [run[0], y, run[1] - run[0], 1]
+                    rects.append(rect)
+                next_runs[run] = rect
+            open_runs = next_runs
+        
+        return [tuple(rect) for rect in rects]
+    
+    @staticmethod
+    def generate_pattern(cols, rows, seed=None, enemies=0, boss_type=None):
+        """
+        Genera un patrón de laberinto perfecto con el algoritmo de
+        backtracking recursivo, en versión iterativa (pila explícita, sin
+        límite de recursión) y en tiempo lineal en el número de celdas.
+        
+        Las salas están en las coordenadas impares, así que el tamaño útil
+        es impar; una columna o fila par sobrante queda como pared. El
+        jugador empieza en (1, 1), el jefe en la sala más lejana y los
+        enemigos en callejones sin salida elegidos con la misma semilla.
+        """
+        if cols < 5 or rows < 5:
+            raise ValueError(f"el laberinto necesita al menos 5x5 celdas, no {cols}x{rows}")
+        rng = random.Random(seed)
+        room_cols = (cols - 1) // 2
+        room_rows = (rows - 1) // 2
+        grid = bytearray(b'#') * (cols * rows)
+        
+        # Backtracking con pila explícita; cada sala se visita una vez
+        start = cols + 1
+        grid[start] = ord('.')
+        stack = [start]
+        steps = (2, -2, 2 * cols, -2 * cols)
+        dead_ends = []
+        farthest = (0, start)
+        advanced = False
+        while stack:
+            cell = stack[-1]
+            x = cell % cols
+            y = cell // cols
+            options = []
+            for step in steps:
+                nxt = cell + step
+                if step == 2 and x + 2 > room_cols * 2:
+                    continue
+                if step == -2 and x < 3:
+                    continue
+                if step > 2 and y + 2 > room_rows * 2:
+                    continue
+                if step < -2 and y < 3:
+                    continue
+                if grid[nxt] == 35:  # '#': sala sin visitar
+                    options.append(step)
+            if options:
+                step = options[rng.randrange(len(options))] if len(options) > 1 else options[0]
+                grid[cell + step // 2] = 46  # '.'
+                grid[cell + step] = 46
+                stack.append(cell + step)
+                advanced = True
+            else:
+                if advanced:
+                    # Se retrocede justo después de avanzar: callejón sin salida
+                    dead_ends.append(cell)
+                    if len(stack) > farthest[0]:
+                        farthest = (len(stack), cell)
+                    advanced = False
+                stack.pop()
+        
+        # Entidades: jugador, jefe en la sala más lejana y enemigos en callejones
+        grid[start] = ord('P')
+        taken = {start}
+        if boss_type:
+            grid[farthest[1]] = ord('B')
+            taken.add(farthest[1])
+        candidates = [cell for cell in dead_ends if cell not in taken]
+        for cell in rng.sample(candidates, min(enemies, len(candidates))):
+            grid[cell] = ord('E')
+        
+        text = grid.decode('ascii')
+        return [text[y * cols:(y + 1) * cols] for y in range(rows)]
+    
+    @staticmethod
+    def create_generated_maze(level_num, cols=MAZE_GENERATED_COLS, rows=MAZE_GENERATED_ROWS, seed=None, cell_size=None):
+        """
+        Crea un laberinto procedural reproducible (la semilla por defecto es
+        el número de nivel) con la estructura walls/enemies/player de Level
+        """
+        boss_type = "circle" if level_num == 3 else "square" if level_num == 6 else "triangle"
+        pattern = MazeDesigner.generate_pattern(cols, rows, seed=level_num if seed is None else seed,
+                                                enemies=3 + level_num // 3,
+                                                boss_type=boss_type if level_num in (3, 6, 9) else None)
+        return MazeDesigner.create_maze_from_pattern(level_num, pattern, cell_size)
+    
+    @staticmethod
+    def wall_cells(pattern):
+        """Devuelve el conjunto de celdas (x, y) marcadas con '#'"""
+        return {(x, y) for y, row in enumerate(pattern) for x, cell in enumerate(row) if cell == '#'}
+    
+    @staticmethod
+    def verify_merged_walls(pattern, rects):
+        """
+        Comprueba que los rectángulos cubren exactamente las celdas '#'
+        sin solaparse, por lo que la geometría de colisión es idéntica
+        """
+        covered = set()
+        for x, y, width, height in rects:
+            for cx in range(x, x + width):
+                for cy in range(y, y + height):
+                    if (cx, cy) in covered:
+                        return False
+                    covered.add((cx, cy))
+        return covered == MazeDesigner.wall_cells(pattern)
+    
     @staticmethod
     def create_custom_maze(level_num):
         """
@@ -241,4 +389,4 @@ def create_custom_level(level_num):
     elif level_num <= 6:
         return MazeDesigner.create_maze_from_pattern(level_num)
     else:
-        return MazeDesigner.create_spiral_maze(level_num)
+        return MazeDesigner.create_generated_maze(level_num)
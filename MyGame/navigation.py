@@ -0,0 +1,266 @@
+from collections import OrderedDict
+from math import gcd
+import heapq
+import math
+import random
+import pygame
+from settings import *
+from flow_field import rasterize_walls
+
+class NavGraph:
+    """
+    Navigation graph extracted from a level's walls.
+
+    Every node is a free rectangle of the level. Pattern levels, whose walls
+    sit on a uniform grid, get one node per free grid cell. Hand-made levels
+    are rasterized on the navigation grid (walls grown by the enemy
+    clearance) and their free space is merged into rectangles. Edges join
+    rectangles that share a border and store the midpoint of that border
+    as the waypoint to cross it.
+    """
+
+    def __init__(self, walls, width=SCREEN_WIDTH, height=SCREEN_HEIGHT):
+        self.width = width
+        self.height = height
+        self.version = 0
+        self.rebuild(walls)
+
+    def rebuild(self, walls):
+        """Extract the graph again (call when the layout changes)"""
+        walls = list(walls)
+        cell_width, cell_height = self.pattern_cell_size(walls)
+        if cell_width:
+            self.kind = "grid"
+            clearance = 0
+        else:
+            self.kind = "rects"
+            cell_width = cell_height = NAV_CELL_SIZE
+            clearance = ENEMY_CIRCLE_SIZE // 2 + 1
+
+        self.cell_width = cell_width
+        self.cell_height = cell_height
+        self.cols = (self.width + cell_width - 1) // cell_width
+        self.rows = (self.height + cell_height - 1) // cell_height
+        blocked = rasterize_walls(walls, cell_width, cell_height, self.cols, self.rows, clearance)
+
+        if self.kind == "grid":
+            cell_rects = [(index % self.cols, index // self.cols, 1, 1)
+                          for index, cell in enumerate(blocked) if not cell]
+        else:
+            cell_rects = self.merge_free_cells(blocked)
+        self.build_nodes(cell_rects)
+        self.version += 1
+
+    def pattern_cell_size(self, walls):
+        """
+        Grid size shared by every wall edge, or (0, 0) when the walls do
+        not sit on a grid coarse enough to navigate cell by cell.
+        """
+        cell_width = cell_height = 0
+        for wall in walls:
+            cell_width = gcd(gcd(cell_width, wall.rect.x), wall.rect.width)
+            cell_height = gcd(gcd(cell_height, wall.rect.y), wall.rect.height)
+        if cell_width >= NAV_CELL_SIZE and cell_height >= NAV_CELL_SIZE:
+            return cell_width, cell_height
+        return 0, 0
+
+    def merge_free_cells(self, blocked):
+        """Merge free cells into rectangles: row runs, then vertical merging"""
+        cols = self.cols
+        rects = []
+        open_runs = {}
+        for y in range(self.rows):
+            next_runs = {}
+            x = 0
+            while x < cols:
+                if blocked[y * cols + x]:
+                    x += 1
+                    continue
+                start = x
+                while x < cols and not blocked[y * cols + x]:
+                    x += 1
+                rect = open_runs.pop((start, x), None)
+                if rect is not None:
+                    rect[3] += 1
+                else:
+                    rect = [start, y, x - start, 1]
+                    rects.append(rect)
+                next_runs[(start, x)] = rect
+            open_runs = next_runs
+        return rects
+
+    def build_nodes(self, cell_rects):
+        """Create node rects, the cell-to-node lookup and the edges"""
+        cols = self.cols
+        self.nodes = []
+        self.owner = [-1] * (cols * self.rows)
+        for node, (x, y, w, h) in enumerate(cell_rects):
+            self.nodes.append(pygame.Rect(x * self.cell_width, y * self.cell_height,
+                                          w * self.cell_width, h * self.cell_height))
+            for cy in range(y, y + h):
+                for cx in range(x, x + w):
+                    self.owner[cy * cols + cx] = node
+
+        # Neighbouring nodes and the portal waypoint on their shared border
+        self.edges = [dict() for _ in self.nodes]
+        for node, (x, y, w, h) in enumerate(cell_rects):
+            borders = {}
+            for cy in range(y, y + h):
+                for side in (x - 1, x + w):
+                    if 0 <= side < cols:
+                        other = self.owner[cy * cols + side]
+                        if other >= 0:
+                            borders.setdefault(other, []).append((side, cy))
+            for cx in range(x, x + w):
+                for side in (y - 1, y + h):
+                    if 0 <= side < self.rows:
+                        other = self.owner[side * cols + cx]
+                        if other >= 0:
+                            borders.setdefault(other, []).append((cx, side))
+            for other, cells in borders.items():
+                # Midpoint of the border, on this node's side of it
+                xs = [cx for cx, _ in cells]
+                ys = [cy for _, cy in cells]
+                portal_x = (min(xs) + max(xs) + 1) * self.cell_width / 2
+                portal_y = (min(ys) + max(ys) + 1) * self.cell_height / 2
+                rect = self.nodes[node]
+                portal_x = max(rect.left, min(portal_x, rect.right))
+                portal_y = max(rect.top, min(portal_y, rect.bottom))
+                center = self.nodes[other].center
+                cost = math.dist(rect.center, (portal_x, portal_y)) + math.dist((portal_x, portal_y), center)
+                self.edges[node][other] = ((portal_x, portal_y), cost)
+
+    def node_at(self, x, y):
+        """Node containing a pixel position, or None"""
+        cx = int(x) // self.cell_width
+        cy = int(y) // self.cell_height
+        if 0 <= cx < self.cols and 0 <= cy < self.rows:
+            node = self.owner[cy * self.cols + cx]
+            if node >= 0:
+                return node
+        return None
+
+    def __len__(self):
+        return len(self.nodes)
+
+class PathService:
+    """
+    A* over a NavGraph with a shared path cache and a per-frame budget.
+
+    Paths are cached by (start node, goal node) so enemies in the same area
+    going to the same place share one search. The cache is dropped when the
+    graph is rebuilt. Each frame may expand at most `budget` nodes: a search
+    that runs out keeps its open set, find_path() returns None, and the
+    search resumes when the same path is asked for on a later frame.
+    """
+
+    def __init__(self, graph, budget=NAV_SEARCH_BUDGET, cache_size=NAV_PATH_CACHE_SIZE):
+        self.graph = graph
+        self.budget = budget
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.searching = OrderedDict()  # (start, goal) -> unfinished A* state
+        self.graph_version = graph.version
+        self.expansions_left = budget
+
+        # Statistics
+        self.searches = 0
+        self.cache_hits = 0
+        self.deferred = 0
+        self.max_frame_expansions = 0
+
+    def begin_frame(self):
+        """Refill the search budget (call once per simulation step)"""
+        self.max_frame_expansions = max(self.max_frame_expansions, self.budget - self.expansions_left)
+        self.expansions_left = self.budget
+        if self.graph.version != self.graph_version:
+            self.cache.clear()
+            self.searching.clear()
+            self.graph_version = self.graph.version
+
+    def random_goal(self, rng=random):
+        """Center of a random node, as a wander destination"""
+        return self.graph.nodes[rng.randrange(len(self.graph.nodes))].center
+
+    def node_path(self, start, goal, budget=math.inf):
+        """
+        A* from node to node expanding at most `budget` nodes. Returns the
+        node list, [] when the goal is unreachable, or None when the budget
+        ran out; the next call for the same nodes continues that search.
+        """
+        graph = self.graph
+        goal_center = graph.nodes[goal].center
+        key = (start, goal)
+        search = self.searching.pop(key, None)
+        if search is None:
+            search = ([(0.0, 0.0, start)], {start: None}, {start: 0.0})
+        open_heap, came_from, cost_so_far = search
+        expanded = 0
+
+        while open_heap:
+            if expanded >= budget:
+                self.expansions_left -= expanded
+                self.searching[key] = search
+                if len(self.searching) > self.cache_size:
+                    self.searching.popitem(last=False)
+                return None
+            _, cost, node = heapq.heappop(open_heap)
+            if cost > cost_so_far[node]:
+                continue
+            expanded += 1
+            if node == goal:
+                break
+            for other, (_, edge_cost) in graph.edges[node].items():
+                new_cost = cost + edge_cost
+                if new_cost < cost_so_far.get(other, math.inf):
+                    cost_so_far[other] = new_cost
+                    came_from[other] = node
+                    estimate = new_cost + math.dist(graph.nodes[other].center, goal_center)
+                    heapq.heappush(open_heap, (estimate, new_cost, other))
+
+        self.expansions_left -= expanded
+        if goal not in came_from:
+            return []
+        path = []
+        node = goal
+        while node is not None:
+            path.append(node)
+            node = came_from[node]
+        path.reverse()
+        return path
+
+    def find_path(self, start, goal):
+        """
+        Waypoints from the start pixel position to the goal position.
+        Returns [] when there is no path and None when the search has to
+        wait for next frame's budget.
+        """
+        graph = self.graph
+        start_node = graph.node_at(*start)
+        goal_node = graph.node_at(*goal)
+        if start_node is None or goal_node is None:
+            return []
+
+        key = (start_node, goal_node)
+        nodes = self.cache.get(key)
+        if nodes is not None:
+            self.cache.move_to_end(key)
+            self.cache_hits += 1
+        else:
+            if self.expansions_left <= 0:
+                self.deferred += 1
+                return None
+            nodes = self.node_path(start_node, goal_node, self.expansions_left)
+            if nodes is None:
+                self.deferred += 1
+                return None
+            self.searches += 1
+            self.cache[key] = nodes
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+
+        if not nodes:
+            return []
+        waypoints = [graph.edges[a][b][0] for a, b in zip(nodes, nodes[1:])]
+        waypoints.append(goal)
+        return waypoints
@@ -1,14 +1,18 @@
 import pygame
 import sys
 from settings import *
+from dirty_rect import DirtyRectRenderer
 from audio import audio_manager
 
 class Options:
-    def __init__(self):
-        pygame.init()
-        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-        pygame.display.set_caption("MAZE HUNT - Options")
-        self.clock = pygame.time.Clock()
+    def __init__(self, screen=None, clock=None):
+        # Run standalone with its own window, or share the scene manager's
+        if screen is None:
+            pygame.init()
+            screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+        self.screen = screen
+        self.clock = clock or pygame.time.Clock()
+        self.renderer = DirtyRectRenderer()
         
         # Colors
         self.BLACK = (0, 0, 0)
@@ -104,6 +108,9 @@ class Options:
         handle_rect.x = slider_rect.x + int(value * slider_rect.width) - 10
         handle_rect.x = max(slider_rect.x - 10, min(handle_rect.x, slider_rect.x + slider_rect.width - 10))
         
+        # Label, bar, handle and value text all change with the slider
+        self.renderer.mark((slider_rect.x - 150, slider_rect.y - 10, slider_rect.width + 230, slider_rect.height + 20))
+        
     def handle_events(self):
         """Handle pygame events"""
         for event in pygame.event.get():
@@ -112,8 +119,14 @@ class Options:
                 
             elif event.type == pygame.MOUSEMOTION:
                 # Check button hover states
-                self.back_hover = self.back_button.collidepoint(event.pos)
-                self.reset_hover = self.reset_button.collidepoint(event.pos)
+                back_hover = self.back_button.collidepoint(event.pos)
+                reset_hover = self.reset_button.collidepoint(event.pos)
+                if back_hover != self.back_hover:
+                    self.renderer.mark(self.back_button)
+                if reset_hover != self.reset_hover:
+                    self.renderer.mark(self.reset_button)
+                self.back_hover = back_hover
+                self.reset_hover = reset_hover
                 
                 # Handle slider dragging
                 if self.dragging_master:
@@ -180,9 +193,43 @@ class Options:
         self.update_handle_position(self.sfx_handle, self.sfx_slider, self.sfx_volume)
         self.update_handle_position(self.brightness_handle, self.brightness_slider, self.brightness)
         
+    def enter(self):
+        """Prepare the scene to be shown again"""
+        pygame.display.set_caption("MAZE HUNT - Options")
+        self.renderer.invalidate()
+        
+    def advance(self, frame_time):
+        """Menus have no simulation to advance"""
+        pass
+        
+    def render(self):
+        """Draw the options screen and present it"""
+        # Clear screen
+        self.screen.fill(self.BLACK)
+        
+        # Draw title
+        title_text = "OPTIONS"
+        title_surface = self.title_font.render(title_text, True, self.WHITE)
+        title_rect = title_surface.get_rect(center=(SCREEN_WIDTH//2, 100))
+        self.screen.blit(title_surface, title_rect)
+        
+        # Draw sliders
+        self.draw_slider(self.master_slider, self.master_handle, self.master_volume, "Master Volume")
+        self.draw_slider(self.music_slider, self.music_handle, self.music_volume, "Music Volume")
+        self.draw_slider(self.sfx_slider, self.sfx_handle, self.sfx_volume, "SFX Volume")
+        self.draw_slider(self.brightness_slider, self.brightness_handle, self.brightness, "Brightness")
+        
+        # Draw buttons
+        self.draw_button(self.back_button, "BACK", self.back_hover, self.label_font)
+        self.draw_button(self.reset_button, "RESET TO DEFAULTS", self.reset_hover, self.label_font)
+        
+        # Update display
+        self.renderer.present()
+        
     def run(self):
         """Main options loop"""
         running = True
+        self.enter()
         
         while running:
             # Handle events
@@ -193,27 +240,7 @@ class Options:
             elif result == "lobby":
                 return "lobby"
             
-            # Clear screen
-            self.screen.fill(self.BLACK)
-            
-            # Draw title
-            title_text = "OPTIONS"
-            title_surface = self.title_font.render(title_text, True, self.WHITE)
-            title_rect = title_surface.get_rect(center=(SCREEN_WIDTH//2, 100))
-            self.screen.blit(title_surface, title_rect)
-            
-            # Draw sliders
-            self.draw_slider(self.master_slider, self.master_handle, self.master_volume, "Master Volume")
-            self.draw_slider(self.music_slider, self.music_handle, self.music_volume, "Music Volume")
-            self.draw_slider(self.sfx_slider, self.sfx_handle, self.sfx_volume, "SFX Volume")
-            self.draw_slider(self.brightness_slider, self.brightness_handle, self.brightness, "Brightness")
-            
-            # Draw buttons
-            self.draw_button(self.back_button, "BACK", self.back_hover, self.label_font)
-            self.draw_button(self.reset_button, "RESET TO DEFAULTS", self.reset_hover, self.label_font)
-            
-            # Update display
-            pygame.display.flip()
+            self.render()
             self.clock.tick(60)
             
         return False
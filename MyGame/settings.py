@@ -1,7 +1,9 @@
 # Game Settings
 SCREEN_WIDTH = 1024
 SCREEN_HEIGHT = 768
-FPS = 60
+FPS = 60  # Render frame cap
+SIMULATION_HZ = 60  # Fixed simulation steps per second
+MAX_FRAME_TIME = 0.25  # Seconds of lag the simulation will catch up at most
 
 # Colors
 BLACK = (0, 0, 0)
@@ -29,6 +31,8 @@ ENEMY_SPEED = 2
 ENEMY_CIRCLE_COLOR = RED
 ENEMY_SQUARE_COLOR = GREEN
 ENEMY_TRIANGLE_COLOR = YELLOW
+ENEMY_ENGINE = "sprites"  # "sprites" (per-enemy update) or "numpy" (vectorized)
+ENEMY_AI = "wander"  # "wander" (random directions) or "patrol" (A* through the maze)
 
 # Boss settings
 BOSS_SIZE = 30
@@ -47,14 +51,57 @@ HUNT_MODE_ENEMY_SPEED_MULTIPLIER = 0.5
 LEVEL_SIZE = 800
 LEVEL_MARGIN = 50
 WALL_THICKNESS = 5
+SPATIAL_HASH_CELL_SIZE = 64  # pixels per collision grid cell
+NAV_CELL_SIZE = 16  # pixels per navigation grid cell (enemy flow fields)
+FLOW_FIELD_CACHE_SIZE = 32  # Flow fields kept per level (one per target cell)
+NAV_SEARCH_BUDGET = 500  # A* node expansions allowed per simulation step
+NAV_PATH_CACHE_SIZE = 256  # Paths kept by the A* service
+LEVEL_DATA_DIR = "assets/levels"  # Compiled level files (see level_format.py)
+MAZE_GENERATED_COLS = 21  # Tile grid of procedurally generated levels (odd sizes)
+MAZE_GENERATED_ROWS = 15
+
+# Rendering settings
+DIRTY_RECT_RENDERING = False  # Push only changed regions instead of flipping
+DIRTY_RECT_MAX_AREA = 0.5  # Fraction of the screen above which we flip anyway
+CHUNK_SIZE = 256  # Pixels per side of a pre-rendered world chunk (scrolling levels)
+CHUNK_CACHE_SIZE = 48  # Chunk surfaces kept in memory (LRU)
+STREAM_CHUNK_TILES = 32  # Tiles per side of a streamed world chunk
+STREAM_RADIUS = 1  # Chunks kept loaded around the player's chunk
+STREAM_MAX_INTEGRATIONS = 1  # Loaded chunks turned into sprites per simulation step
+
+# Sprite settings
+SPRITE_ATLAS_WIDTH = 512  # Minimum width of the packed sprite atlas
+SPRITE_ATLAS_CACHE = "assets/cache/sprite_atlas.bin"  # Decoded atlas reused across startups
+SPRITE_VARIANT_BUDGET = 16 * 2 ** 20  # Bytes of scaled/tinted sprite variants kept (LRU)
 
 # Audio settings
 MASTER_VOLUME = 0.7
 MUSIC_VOLUME = 0.5
 SFX_VOLUME = 0.8
+MIXER_PROFILES = {  # Mixer formats; smaller buffers cut delay but wake the audio thread more often
+    'low_latency': {'frequency': 44100, 'size': -16, 'channels': 2, 'buffer': 256},
+    'balanced': {'frequency': 44100, 'size': -16, 'channels': 2, 'buffer': 512},
+    'power_saving': {'frequency': 44100, 'size': -16, 'channels': 2, 'buffer': 2048},
+}
+MIXER_PROFILE = 'balanced'  # Profile the mixer starts with; low_latency underruns now and then (audio_latency.py)
+MUSIC_CROSSFADE_MS = 400  # Crossfade between preloaded music tracks
+MUSIC_CHANNELS = 2  # Mixer channels reserved for music (outgoing and incoming track)
+MUSIC_SEGMENT_SECONDS = 1.0  # Music is queued in segments; also the resume granularity
+AUDIO_CACHE_DIR = "assets/cache/audio"  # Synthesized stand-ins for missing sound files
+SFX_CHANNELS = 8  # Mixer channels shared by sound effects
+SFX_MAX_VOICES = 2  # Copies of one sound that may play at once, unless listed below
+SFX_VOICE_LIMITS = {'enemy_death': 3, 'footstep': 1, 'button_click': 1}
+SFX_PRIORITIES = {  # Higher priority sounds may steal channels from lower ones
+    'level_complete': 3, 'game_over': 3, 'boss_spawn': 3,
+    'player_hit': 2, 'hunt_mode_start': 2, 'hunt_mode_end': 2,
+    'power_up': 1, 'button_click': 1, 'enemy_death': 1,
+    'footstep': 0,
+}
 
 # UI settings
 BUTTON_WIDTH = 200
 BUTTON_HEIGHT = 50
 LEVEL_BUTTON_SIZE = 80
 LEVEL_BUTTON_MARGIN = 20
+HUD_PANEL_HEIGHT = 130  # Top strip holding the in-game HUD text
+TEXT_CACHE_SIZE = 256  # Rendered text surfaces kept by text_cache
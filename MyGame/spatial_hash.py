@@ -0,0 +1,96 @@
+import pygame
+from settings import *
+
+class SpatialHash:
+    """
+    Uniform grid that buckets static wall rects by cell so movers only
+    test the walls around them instead of every wall in the level.
+    """
+
+    def __init__(self, walls=None, cell_size=SPATIAL_HASH_CELL_SIZE):
+        self.cell_size = cell_size
+        self.buckets = {}
+        self.walls = {}  # Insertion-ordered set of the indexed walls
+        if walls is not None:
+            self.rebuild(walls)
+
+    def cell_range(self, rect):
+        """Return the cell coordinate span covered by a rect"""
+        size = self.cell_size
+        x0 = rect.left // size
+        y0 = rect.top // size
+        x1 = (rect.right - 1) // size
+        y1 = (rect.bottom - 1) // size
+        return x0, y0, x1, y1
+
+    def insert(self, wall):
+        """Add a single wall sprite to every bucket its rect overlaps"""
+        self.walls[wall] = None
+        x0, y0, x1, y1 = self.cell_range(wall.rect)
+        buckets = self.buckets
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                bucket = buckets.get((cx, cy))
+                if bucket is None:
+                    buckets[(cx, cy)] = [wall]
+                else:
+                    bucket.append(wall)
+
+    def remove(self, wall):
+        """Take a single wall sprite out of the index"""
+        del self.walls[wall]
+        x0, y0, x1, y1 = self.cell_range(wall.rect)
+        buckets = self.buckets
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                bucket = buckets.get((cx, cy))
+                if bucket:
+                    bucket.remove(wall)
+                    if not bucket:
+                        del buckets[(cx, cy)]
+
+    def rebuild(self, walls):
+        """Rebuild the index from scratch (call when the layout changes)"""
+        self.buckets = {}
+        self.walls = {}
+        for wall in walls:
+            self.insert(wall)
+
+    def query(self, rect):
+        """Return the unique walls whose rect collides with the given rect"""
+        found = []
+        seen = set()
+        x0, y0, x1, y1 = self.cell_range(rect)
+        buckets = self.buckets
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                bucket = buckets.get((cx, cy))
+                if not bucket:
+                    continue
+                for wall in bucket:
+                    if id(wall) not in seen and rect.colliderect(wall.rect):
+                        seen.add(id(wall))
+                        found.append(wall)
+        return found
+
+    def collides(self, rect):
+        """Return True if the rect overlaps any indexed wall"""
+        x0, y0, x1, y1 = self.cell_range(rect)
+        buckets = self.buckets
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                bucket = buckets.get((cx, cy))
+                if bucket:
+                    for wall in bucket:
+                        if rect.colliderect(wall.rect):
+                            return True
+        return False
+
+    def __len__(self):
+        return len(self.walls)
+
+def hits_wall(sprite, walls):
+    """Check a sprite against walls, using the spatial index when available"""
+    if isinstance(walls, SpatialHash):
+        return walls.collides(sprite.rect)
+    return pygame.sprite.spritecollideany(sprite, walls) is not None
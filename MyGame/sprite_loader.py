@@ -1,66 +1,310 @@
+from collections import OrderedDict
 import pygame
 import os
+import struct
+import hashlib
 from settings import *
 
+# Caché en disco del atlas: cabecera (firma, versión, clave de las fuentes,
+# número de atlas) y por cada atlas su tamaño, sus entradas (nombre y
+# rectángulo) y los píxeles en bruto, para no decodificar ni escalar
+ATLAS_MAGIC = b"MZHA"
+ATLAS_VERSION = 1
+ATLAS_HEADER = struct.Struct("<4sH20sB")
+ATLAS_SIZE = struct.Struct("<HHHB")
+ATLAS_ENTRY = struct.Struct("<HHHH")
+
+def pack_atlas(images, min_width=SPRITE_ATLAS_WIDTH):
+    """Empaqueta imágenes (nombre -> Surface) en estantes; devuelve (tamaño, rects)"""
+    width = max([min_width] + [image.get_width() for image in images.values()])
+    x = y = shelf_height = 0
+    rects = {}
+    for name, image in sorted(images.items(), key=lambda item: -item[1].get_height()):
+        w, h = image.get_size()
+        if x + w > width:
+            x = 0
+            y += shelf_height
+            shelf_height = 0
+        rects[name] = pygame.Rect(x, y, w, h)
+        x += w
+        shelf_height = max(shelf_height, h)
+    return (width, max(1, y + shelf_height)), rects
+
+class SpriteVariantCache:
+    """
+    Variantes de sprites (escaladas, tintadas o rotadas) compartidas.
+
+    Cada variante se crea una sola vez por (nombre, tamaño, tinte, ángulo)
+    y la reutilizan todos los que la piden, así las paredes del mismo tamaño
+    comparten una superficie. Las menos usadas se descartan cuando se supera
+    el presupuesto de memoria.
+    """
+    
+    def __init__(self, budget=SPRITE_VARIANT_BUDGET):
+        self.budget = budget
+        self.variants = OrderedDict()
+        self.bytes = 0
+        
+        # Estadísticas
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, key, create):
+        """Variante guardada para la clave, o la crea con create()"""
+        surface = self.variants.get(key)
+        if surface is not None:
+            self.variants.move_to_end(key)
+            self.hits += 1
+            return surface
+        self.misses += 1
+        surface = create()
+        size = surface_bytes(surface)
+        if size > self.budget:
+            return surface  # Demasiado grande para guardarla
+        self.variants[key] = surface
+        self.bytes += size
+        while self.bytes > self.budget:
+            _, evicted = self.variants.popitem(last=False)
+            self.bytes -= surface_bytes(evicted)
+            self.evictions += 1
+        return surface
+    
+    def hit_rate(self):
+        """Fracción de peticiones servidas desde la caché"""
+        requests = self.hits + self.misses
+        return self.hits / requests if requests else 0.0
+    
+    def clear(self):
+        """Descarta todas las variantes (p. ej. al cambiar el formato de pantalla)"""
+        self.variants.clear()
+        self.bytes = 0
+
+def surface_bytes(surface):
+    """Memoria de los píxeles de una superficie"""
+    return surface.get_bytesize() * surface.get_width() * surface.get_height()
+
 class SpriteLoader:
     """
-    Sistema para cargar y manejar sprites personalizados
+    Sistema para cargar y manejar sprites personalizados.
+    
+    Funciona como un registro perezoso: no toca el disco hasta que se pide
+    el primer sprite, y cada sprite (cargado o por defecto) se guarda la
+    primera vez, así que las siguientes peticiones no crean nada.
     """
     
-    def __init__(self):
+    # Archivos posibles de cada sprite, en orden de preferencia
+    SPRITE_FILES = {
+        'player': ['player.png', 'player.jpg', 'jugador.png'],
+        'enemy_circle': ['enemy_circle.png', 'enemigo_circulo.png', 'circulo.png'],
+        'enemy_square': ['enemy_square.png', 'enemigo_cuadrado.png', 'cuadrado.png'],
+        'enemy_triangle': ['enemy_triangle.png', 'enemigo_triangulo.png', 'triangulo.png'],
+        'boss_circle': ['boss_circle.png', 'jefe_circulo.png'],
+        'boss_square': ['boss_square.png', 'jefe_cuadrado.png'],
+        'boss_triangle': ['boss_triangle.png', 'jefe_triangulo.png'],
+        'wall': ['wall.png', 'pared.png', 'muro.png'],
+        'background': ['background.png', 'fondo.png']
+    }
+    
+    def __init__(self, images_path="assets/Imagen", cache_path=SPRITE_ATLAS_CACHE):
         self.sprites = {}
-        self.images_path = "assets/Imagen"
-        self.load_sprites()
+        self.missing = set()  # Sprites que usan la imagen por defecto
+        self.images_path = images_path
+        self.cache_path = cache_path
+        self.files = None  # Nombre -> ruta, se busca en la primera petición
+        
+        # Atlas (con y sin transparencia) y rectángulo de cada sprite en él
+        self.atlases = {}
+        self.atlas_rects = {}
+        self.alpha_names = set()
+        self.converted = False  # Atlas ya convertidos al formato de la pantalla
+        self.loaded_from_cache = False
+        self.variants = SpriteVariantCache()
+        
+        # Estadísticas
+        self.loads = 0  # Sprites cargados desde archivo
+        self.misses = 0  # Peticiones de sprites que aún no estaban en el registro
+        self.placeholders = 0  # Sprites por defecto creados
+    
+    def find_sprite_files(self):
+        """Devuelve nombre -> ruta del primer archivo existente de cada sprite"""
+        found = {}
+        for sprite_name, possible_files in self.SPRITE_FILES.items():
+            for filename in possible_files:
+                filepath = os.path.join(self.images_path, filename)
+                if os.path.exists(filepath):
+                    found[sprite_name] = filepath
+                    break
+        return found
+    
+    def target_size(self, sprite_name):
+        """Tamaño al que se escala cada tipo de sprite (None = tamaño original)"""
+        if 'player' in sprite_name:
+            return (PLAYER_SIZE, PLAYER_SIZE)
+        elif 'boss' in sprite_name:
+            return (BOSS_SIZE, BOSS_SIZE)
+        elif 'enemy' in sprite_name:
+            return (ENEMY_CIRCLE_SIZE, ENEMY_CIRCLE_SIZE)
+        elif 'wall' in sprite_name:
+            return (WALL_THICKNESS, WALL_THICKNESS)
+        return None
+    
+    def cache_key(self, files):
+        """Huella de las fuentes: ruta, fecha de modificación, tamaño y escala"""
+        digest = hashlib.sha1()
+        for sprite_name, filepath in sorted(files.items()):
+            stat = os.stat(filepath)
+            digest.update(f"{sprite_name}|{filepath}|{stat.st_mtime_ns}|{stat.st_size}|"
+                          f"{self.target_size(sprite_name)}\n".encode())
+        return digest.digest()
     
     def load_sprites(self):
-        """Carga todos los sprites desde la carpeta de imágenes"""
+        """Carga los sprites de la carpeta de imágenes (una sola vez)"""
+        if self.files is not None:
+            return
         # Crear directorio si no existe
         if not os.path.exists(self.images_path):
             os.makedirs(self.images_path)
             print(f"Directorio {self.images_path} creado. Coloca tus sprites aquí.")
         
-        # Cargar sprites específicos
-        sprite_files = {
-            'player': ['player.png', 'player.jpg', 'jugador.png'],
-            'enemy_circle': ['enemy_circle.png', 'enemigo_circulo.png', 'circulo.png'],
-            'enemy_square': ['enemy_square.png', 'enemigo_cuadrado.png', 'cuadrado.png'],
-            'enemy_triangle': ['enemy_triangle.png', 'enemigo_triangulo.png', 'triangulo.png'],
-            'boss_circle': ['boss_circle.png', 'jefe_circulo.png'],
-            'boss_square': ['boss_square.png', 'jefe_cuadrado.png'],
-            'boss_triangle': ['boss_triangle.png', 'jefe_triangulo.png'],
-            'wall': ['wall.png', 'pared.png', 'muro.png'],
-            'background': ['background.png', 'fondo.png']
-        }
+        self.files = self.find_sprite_files()
+        if self.files:
+            key = self.cache_key(self.files)
+            if not self.load_atlas_cache(key):
+                self.build_atlases(self.files)
+                self.save_atlas_cache(key)
+            if self.converted:
+                self.convert_atlases()
+            for name, rect in self.atlas_rects.items():
+                self.sprites[name] = self.atlases[self.atlas_of(name)].subsurface(rect)
+            self.loads += len(self.atlas_rects)
+    
+    def resolve(self, sprite_name):
+        """Primera petición de un sprite: lo carga o crea y guarda el de por defecto"""
+        self.misses += 1
+        self.load_sprites()
+        sprite = self.sprites.get(sprite_name)
+        if sprite is None:
+            print(f"Sprite no encontrado para: {sprite_name}")
+            self.missing.add(sprite_name)
+            # Crear sprite por defecto
+            sprite = self.create_default_sprite(sprite_name)
+            if self.converted:
+                sprite = sprite.convert()
+            self.sprites[sprite_name] = sprite
+            self.placeholders += 1
+        return sprite
+    
+    def atlas_of(self, sprite_name):
+        """Atlas en el que está un sprite ('alpha' u 'opaque')"""
+        return 'alpha' if sprite_name in self.alpha_names else 'opaque'
+    
+    def build_atlases(self, files):
+        """Decodifica y escala cada imagen y las empaqueta en dos atlas"""
+        images = {'alpha': {}, 'opaque': {}}
+        for sprite_name, filepath in files.items():
+            try:
+                image = pygame.image.load(filepath)
+            except pygame.error as e:
+                print(f"Error cargando {filepath}: {e}")
+                continue
+            size = self.target_size(sprite_name)
+            if size:
+                image = pygame.transform.scale(image, size)
+            has_alpha = bool(image.get_flags() & pygame.SRCALPHA)
+            images['alpha' if has_alpha else 'opaque'][sprite_name] = image
+            print(f"Sprite cargado: {sprite_name} desde {os.path.basename(filepath)}")
         
-        for sprite_name, possible_files in sprite_files.items():
-            sprite_loaded = False
-            for filename in possible_files:
-                filepath = os.path.join(self.images_path, filename)
-                if os.path.exists(filepath):
-                    try:
-                        image = pygame.image.load(filepath)
-                        # Redimensionar según el tipo de sprite
-                        if 'player' in sprite_name:
-                            image = pygame.transform.scale(image, (PLAYER_SIZE, PLAYER_SIZE))
-                        elif 'enemy' in sprite_name or 'boss' in sprite_name:
-                            if 'boss' in sprite_name:
-                                image = pygame.transform.scale(image, (BOSS_SIZE, BOSS_SIZE))
-                            else:
-                                image = pygame.transform.scale(image, (ENEMY_CIRCLE_SIZE, ENEMY_CIRCLE_SIZE))
-                        elif 'wall' in sprite_name:
-                            image = pygame.transform.scale(image, (WALL_THICKNESS, WALL_THICKNESS))
-                        
-                        self.sprites[sprite_name] = image
-                        sprite_loaded = True
-                        print(f"Sprite cargado: {sprite_name} desde {filename}")
-                        break
-                    except pygame.error as e:
-                        print(f"Error cargando {filename}: {e}")
-            
-            if not sprite_loaded:
-                print(f"Sprite no encontrado para: {sprite_name}")
-                # Crear sprite por defecto
-                self.sprites[sprite_name] = self.create_default_sprite(sprite_name)
+        self.alpha_names = set(images['alpha'])
+        for kind, group in images.items():
+            if not group:
+                continue
+            size, rects = pack_atlas(group)
+            flags = pygame.SRCALPHA if kind == 'alpha' else 0
+            atlas = pygame.Surface(size, flags, 32)
+            for sprite_name, image in group.items():
+                # En el atlas alfa se copian los píxeles tal cual, sin mezclar
+                atlas.blit(image, rects[sprite_name], special_flags=pygame.BLEND_RGBA_MAX if flags else 0)
+            self.atlases[kind] = atlas
+            self.atlas_rects.update(rects)
+    
+    def load_atlas_cache(self, key):
+        """Carga los atlas desde la caché si la clave coincide"""
+        self.alpha_names = set()
+        try:
+            with open(self.cache_path, "rb") as file:
+                data = file.read()
+        except OSError:
+            return False
+        try:
+            magic, version, cached_key, count = ATLAS_HEADER.unpack_from(data, 0)
+            if magic != ATLAS_MAGIC or version != ATLAS_VERSION or cached_key != key:
+                return False
+            offset = ATLAS_HEADER.size
+            atlases, rects = {}, {}
+            for _ in range(count):
+                width, height, entries, has_alpha = ATLAS_SIZE.unpack_from(data, offset)
+                offset += ATLAS_SIZE.size
+                kind = 'alpha' if has_alpha else 'opaque'
+                for _ in range(entries):
+                    name_length = data[offset]
+                    sprite_name = data[offset + 1:offset + 1 + name_length].decode()
+                    offset += 1 + name_length
+                    rects[sprite_name] = pygame.Rect(ATLAS_ENTRY.unpack_from(data, offset))
+                    offset += ATLAS_ENTRY.size
+                    if has_alpha:
+                        self.alpha_names.add(sprite_name)
+                pixel_format = "RGBA" if has_alpha else "RGBX"
+                length = width * height * 4
+                atlases[kind] = pygame.image.frombuffer(data[offset:offset + length], (width, height),
+                                                        pixel_format).copy()
+                offset += length
+        except (struct.error, ValueError, pygame.error):
+            return False
+        self.atlases = atlases
+        self.atlas_rects = rects
+        self.loaded_from_cache = True
+        print(f"Atlas de sprites cargado desde caché ({len(rects)} sprites)")
+        return True
+    
+    def save_atlas_cache(self, key):
+        """Guarda los atlas con la clave de sus fuentes"""
+        parts = [ATLAS_HEADER.pack(ATLAS_MAGIC, ATLAS_VERSION, key, len(self.atlases))]
+        for kind, atlas in self.atlases.items():
+            names = [name for name in self.atlas_rects if self.atlas_of(name) == kind]
+            parts.append(ATLAS_SIZE.pack(atlas.get_width(), atlas.get_height(), len(names), kind == 'alpha'))
+            for sprite_name in names:
+                encoded = sprite_name.encode()
+                parts.append(bytes([len(encoded)]) + encoded + ATLAS_ENTRY.pack(*self.atlas_rects[sprite_name]))
+            parts.append(pygame.image.tobytes(atlas, "RGBA" if kind == 'alpha' else "RGBX"))
+        try:
+            os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+            with open(self.cache_path, "wb") as file:
+                file.write(b"".join(parts))
+        except OSError as e:
+            print(f"No se pudo guardar la caché de sprites: {e}")
+    
+    def convert_atlases(self):
+        """Pasa los atlas al formato de la pantalla"""
+        for kind, atlas in self.atlases.items():
+            self.atlases[kind] = atlas.convert_alpha() if kind == 'alpha' else atlas.convert()
+    
+    def convert_for_display(self):
+        """
+        Convierte los atlas al formato de la pantalla una sola vez (cuando ya
+        existe una) y vuelve a crear los sprites como subsuperficies
+        """
+        if self.converted or pygame.display.get_surface() is None:
+            return
+        self.convert_atlases()
+        for sprite_name, sprite in self.sprites.items():
+            if sprite_name in self.atlas_rects:
+                self.sprites[sprite_name] = self.atlases[self.atlas_of(sprite_name)].subsurface(
+                    self.atlas_rects[sprite_name])
+            else:
+                self.sprites[sprite_name] = sprite.convert()
+        self.variants.clear()
+        self.converted = True
     
     def create_default_sprite(self, sprite_name):
         """Crea un sprite por defecto si no se encuentra el archivo"""
@@ -88,9 +332,41 @@ class SpriteLoader:
         
         return surface
     
+    def has_sprite(self, sprite_name):
+        """Indica si el sprite se cargó desde un archivo"""
+        self.load_sprites()
+        return sprite_name in self.atlas_rects
+    
     def get_sprite(self, sprite_name):
         """Obtiene un sprite por nombre"""
-        return self.sprites.get(sprite_name, self.create_default_sprite(sprite_name))
+        if not self.converted:
+            self.convert_for_display()
+        sprite = self.sprites.get(sprite_name)
+        if sprite is None:
+            sprite = self.resolve(sprite_name)
+        return sprite
+    
+    def get_scaled_sprite(self, sprite_name, size, tint=None, angle=0):
+        """
+        Sprite escalado a `size` (y opcionalmente tintado y rotado), compartido
+        por todos los que piden la misma variante. No se debe modificar.
+        """
+        size = (int(size[0]), int(size[1]))
+        
+        def create():
+            surface = self.get_sprite(sprite_name)
+            if surface.get_size() != size:
+                surface = pygame.transform.scale(surface, size)
+            if angle:
+                surface = pygame.transform.rotate(surface, angle)
+            if tint is not None:
+                surface = surface.copy()
+                surface.fill(tint, special_flags=pygame.BLEND_RGBA_MULT)
+            return surface
+        
+        if not self.converted:
+            self.convert_for_display()
+        return self.variants.get((sprite_name, size, tint, angle), create)
     
     def get_player_sprite(self):
         """Obtiene el sprite del jugador"""
@@ -103,8 +379,10 @@ class SpriteLoader:
         else:
             return self.get_sprite(f'enemy_{enemy_type}')
     
-    def get_wall_sprite(self):
-        """Obtiene el sprite de una pared"""
+    def get_wall_sprite(self, size=None):
+        """Obtiene el sprite de una pared, escalado si se indica el tamaño"""
+        if size is not None:
+            return self.get_scaled_sprite('wall', size)
         return self.get_sprite('wall')
     
     def get_background_sprite(self):
@@ -1,7 +1,13 @@
+import os
 import pygame
 import math
 import random
 from settings import *
+from level_format import (level_path, world_path, load_level_file, ENEMY_TYPES, RANDOM_TYPE,
+                          SPAWN_PLAYER, SPAWN_BOSS)
+from spatial_hash import SpatialHash, hits_wall
+from flow_field import FlowField
+from navigation import NavGraph
 try:
     from maze_designer import create_custom_level
 except ImportError:
@@ -12,7 +18,40 @@ try:
 except ImportError:
     sprite_loader = None
 
-class Player(pygame.sprite.Sprite):
+class Mover(pygame.sprite.Sprite):
+    """Sprite with a sub-pixel position that can be interpolated when drawn"""
+    
+    bounds = pygame.Rect(0, 0, SCREEN_WIDTH, SCREEN_HEIGHT)  # World area movers stay in
+    
+    def set_position(self, x, y):
+        """Place the sprite, resetting the interpolation history"""
+        self.pos = pygame.math.Vector2(x, y)
+        self.prev_pos = pygame.math.Vector2(self.pos)
+        self.sync_rect()
+        
+    def sync_rect(self):
+        """Snap the collision rect to the float position"""
+        self.rect.x = round(self.pos.x)
+        self.rect.y = round(self.pos.y)
+        
+    def save_position(self):
+        """Remember the position at the start of a simulation step"""
+        self.prev_pos.update(self.pos)
+        
+    def snapshot(self):
+        """State needed to put the sprite back where it started"""
+        return (self.pos.x, self.pos.y)
+        
+    def restore(self, state):
+        """Return to a state taken with snapshot()"""
+        self.set_position(*state[:2])
+        
+    def interpolated_rect(self, alpha):
+        """Rect between the previous and current step, for rendering"""
+        pos = self.prev_pos.lerp(self.pos, alpha)
+        return pygame.Rect(round(pos.x), round(pos.y), self.rect.width, self.rect.height)
+
+class Player(Mover):
     def __init__(self, x, y):
         super().__init__()
         # Usar sprite personalizado si está disponible
@@ -22,8 +61,7 @@ class Player(pygame.sprite.Sprite):
             self.image = pygame.Surface((PLAYER_SIZE, PLAYER_SIZE))
             self.image.fill(PLAYER_COLOR)
         self.rect = self.image.get_rect()
-        self.rect.x = x
-        self.rect.y = y
+        self.set_position(x, y)
         self.speed = PLAYER_SPEED
         
     def update(self, keys, walls):
@@ -41,19 +79,22 @@ class Player(pygame.sprite.Sprite):
             dy = self.speed
             
         # Move and check collisions
-        self.rect.x += dx
-        if pygame.sprite.spritecollide(self, walls, False):
-            self.rect.x -= dx
+        self.pos.x += dx
+        self.sync_rect()
+        if hits_wall(self, walls):
+            self.pos.x -= dx
             
-        self.rect.y += dy
-        if pygame.sprite.spritecollide(self, walls, False):
-            self.rect.y -= dy
+        self.pos.y += dy
+        self.sync_rect()
+        if hits_wall(self, walls):
+            self.pos.y -= dy
             
-        # Keep player on screen
-        self.rect.x = max(0, min(self.rect.x, SCREEN_WIDTH - PLAYER_SIZE))
-        self.rect.y = max(0, min(self.rect.y, SCREEN_HEIGHT - PLAYER_SIZE))
+        # Keep player inside the world
+        self.pos.x = max(self.bounds.left, min(self.pos.x, self.bounds.right - PLAYER_SIZE))
+        self.pos.y = max(self.bounds.top, min(self.pos.y, self.bounds.bottom - PLAYER_SIZE))
+        self.sync_rect()
 
-class Enemy(pygame.sprite.Sprite):
+class Enemy(Mover):
     def __init__(self, x, y, enemy_type):
         super().__init__()
         self.enemy_type = enemy_type
@@ -82,18 +123,34 @@ class Enemy(pygame.sprite.Sprite):
             self.color = ENEMY_TRIANGLE_COLOR
             
         self.rect = self.image.get_rect()
-        self.rect.x = x
-        self.rect.y = y
+        self.set_position(x, y)
         
         # AI behavior
         self.direction = random.uniform(0, 2 * math.pi)
         self.change_direction_timer = 0
-        self.change_direction_interval = random.randint(60, 180)  # frames
+        self.change_direction_interval = random.randint(60, 180)  # simulation ticks
+        self.path = None  # Waypoints when patrolling with a navigator
+        self.patrol_goal = None  # Destination whose path search is still running
         
         # Hunt mode behavior
         self.is_in_hunt_mode = False
         self.gathering_timer = 0
-        self.gathering_duration = 30  # frames
+        self.gathering_duration = 30  # simulation ticks
+        
+    def snapshot(self):
+        """Position plus the AI state that changes while playing"""
+        return (self.pos.x, self.pos.y, self.direction, self.change_direction_interval)
+        
+    def restore(self, state):
+        """Return to a state taken with snapshot()"""
+        super().restore(state)
+        self.direction = state[2]
+        self.change_direction_interval = state[3]
+        self.change_direction_timer = 0
+        self.path = None
+        self.patrol_goal = None
+        self.is_in_hunt_mode = False
+        self.gathering_timer = 0
         
     def make_boss(self):
         """Convert this enemy to a boss"""
@@ -122,8 +179,38 @@ class Enemy(pygame.sprite.Sprite):
             
         self.rect = self.image.get_rect()
         self.rect.center = old_center
+        self.set_position(self.rect.x, self.rect.y)
+        
+    def patrol(self, navigator, speed):
+        """
+        Walk the maze along A* paths to random destinations instead of
+        wandering blindly. Returns False when there is no path to follow
+        this tick (e.g. the search budget is spent).
+        """
+        if self.path is None or self.change_direction_timer >= self.change_direction_interval:
+            # Keep asking for the same destination until its search finishes
+            if self.patrol_goal is None:
+                self.patrol_goal = navigator.random_goal()
+            path = navigator.find_path(self.rect.center, self.patrol_goal)
+            if path is None:
+                return False
+            self.path = path
+            self.patrol_goal = None
+            self.change_direction_timer = 0
+            self.change_direction_interval = random.randint(60, 180)
+            
+        # Drop the waypoints already reached
+        while self.path and math.dist(self.rect.center, self.path[0]) <= speed:
+            self.path.pop(0)
+        if not self.path:
+            self.path = None
+            return False
+            
+        target = self.path[0]
+        self.direction = math.atan2(target[1] - self.rect.centery, target[0] - self.rect.centerx)
+        return True
         
-    def update(self, player, walls, hunt_mode, gather_point=None):
+    def update(self, player, walls, hunt_mode, gather_point=None, flow_field=None, navigator=None):
         """Update enemy position and behavior"""
         current_speed = self.hunt_mode_speed if hunt_mode else self.speed
         
@@ -135,23 +222,40 @@ class Enemy(pygame.sprite.Sprite):
                 dy = gather_point[1] - self.rect.centery
                 distance = math.sqrt(dx*dx + dy*dy)
                 
-                if distance > 0:
+                # Follow the flow field around walls when there is one
+                flow = flow_field.direction(self.rect.center, gather_point) if flow_field else None
+                if distance > 0 and flow:
+                    self.pos.x += flow[0] * current_speed
+                    self.sync_rect()
+                    if hits_wall(self, walls):
+                        self.pos.x -= flow[0] * current_speed
+                        
+                    self.pos.y += flow[1] * current_speed
+                    self.sync_rect()
+                    if hits_wall(self, walls):
+                        self.pos.y -= flow[1] * current_speed
+                    self.sync_rect()
+                elif distance > 0:
                     dx = (dx / distance) * current_speed
                     dy = (dy / distance) * current_speed
                     
-                    self.rect.x += dx
-                    self.rect.y += dy
+                    self.pos.x += dx
+                    self.pos.y += dy
+                    self.sync_rect()
                     
                     # Check wall collisions
-                    if pygame.sprite.spritecollide(self, walls, False):
-                        self.rect.x -= dx
-                        self.rect.y -= dy
+                    if hits_wall(self, walls):
+                        self.pos.x -= dx
+                        self.pos.y -= dy
+                        self.sync_rect()
         else:
             self.is_in_hunt_mode = False
             # Normal AI behavior
             self.change_direction_timer += 1
             
-            if self.change_direction_timer >= self.change_direction_interval:
+            if navigator and self.patrol(navigator, current_speed):
+                pass  # Direction set towards the next waypoint
+            elif self.change_direction_timer >= self.change_direction_interval:
                 self.direction = random.uniform(0, 2 * math.pi)
                 self.change_direction_timer = 0
                 self.change_direction_interval = random.randint(60, 180)
@@ -160,26 +264,29 @@ class Enemy(pygame.sprite.Sprite):
             dx = math.cos(self.direction) * current_speed
             dy = math.sin(self.direction) * current_speed
             
-            self.rect.x += dx
-            self.rect.y += dy
+            self.pos.x += dx
+            self.pos.y += dy
+            self.sync_rect()
             
             # Check wall collisions and bounce
-            if pygame.sprite.spritecollide(self, walls, False):
-                self.rect.x -= dx
-                self.rect.y -= dy
+            if hits_wall(self, walls):
+                self.pos.x -= dx
+                self.pos.y -= dy
                 self.direction = random.uniform(0, 2 * math.pi)
+                self.path = None
             
-            # Keep enemy on screen
-            self.rect.x = max(0, min(self.rect.x, SCREEN_WIDTH - self.rect.width))
-            self.rect.y = max(0, min(self.rect.y, SCREEN_HEIGHT - self.rect.height))
+            # Keep enemy inside the world
+            self.pos.x = max(self.bounds.left, min(self.pos.x, self.bounds.right - self.rect.width))
+            self.pos.y = max(self.bounds.top, min(self.pos.y, self.bounds.bottom - self.rect.height))
+            self.sync_rect()
 
 class Wall(pygame.sprite.Sprite):
     def __init__(self, x, y, width, height):
         super().__init__()
         # Usar sprite personalizado si está disponible
         if sprite_loader:
-            self.image = sprite_loader.get_wall_sprite()
-            self.image = pygame.transform.scale(self.image, (width, height))
+            # Walls of the same size share one cached surface
+            self.image = sprite_loader.get_wall_sprite((width, height))
         else:
             self.image = pygame.Surface((width, height))
             self.image.fill(GRAY)
@@ -188,20 +295,103 @@ class Wall(pygame.sprite.Sprite):
         self.rect.y = y
 
 class Level:
-    def __init__(self, level_num):
+    templates = {}  # Built levels by number, reused by Level.load()
+    streamer = None  # Chunk streamer of streamed levels (see chunk_stream.py)
+    
+    @classmethod
+    def load(cls, level_num):
+        """
+        Level for this number, built the first time and afterwards reset to
+        its starting state instead of rebuilding walls and navigation data.
+        Levels with a world file are streamed and opened fresh every time.
+        """
+        path = world_path(level_num)
+        if os.path.exists(path):
+            from chunk_stream import StreamedLevel
+            return StreamedLevel(path)
+        level = cls.templates.get(level_num)
+        if level is None:
+            level = cls.templates[level_num] = cls(level_num)
+        else:
+            level.reset()
+        return level
+        
+    def __init__(self, level_num, use_level_file=True, layout=None):
         self.level_num = level_num
+        self.use_level_file = use_level_file
         self.walls = pygame.sprite.Group()
         self.enemies = pygame.sprite.Group()
         self.player = None
         self.is_boss_level = level_num in [3, 6, 9]
+        self.layout_version = 0  # Bumped whenever the walls change
+        
+        # Create level layout (or take a ready-made walls/enemies/player tuple)
+        if layout:
+            self.walls, self.enemies, self.player = layout
+        else:
+            self.create_level_layout()
+            
+        self.world_rect = self.world_bounds()
+        for mover in [self.player, *self.enemies]:
+            mover.bounds = self.world_rect
+        
+        # Spatial index for wall collisions (walls never move)
+        self.wall_grid = SpatialHash(self.walls)
+        
+        self.gather_point = (self.world_rect.right - 100, self.world_rect.bottom - 100)
+        self.build_navigation()
+        
+        # Starting state of every entity, restored by reset()
+        self.initial_enemies = [(enemy, enemy.snapshot()) for enemy in self.enemies]
+        self.initial_player = self.player.snapshot()
+        
+    def world_bounds(self):
+        """World area: the screen, grown to fit mazes larger than it"""
+        return pygame.Rect(0, 0, SCREEN_WIDTH, SCREEN_HEIGHT).unionall([wall.rect for wall in self.walls])
         
-        # Create level layout
-        self.create_level_layout()
+    def build_navigation(self):
+        """Navigation grid for hunt-mode flow fields and graph for A*"""
+        self.flow_field = FlowField(self.walls, width=self.world_rect.right, height=self.world_rect.bottom)
+        self.nav_graph = NavGraph(self.walls, width=self.world_rect.right, height=self.world_rect.bottom)
+        self.prepare_flow_field()
+        
+    def reset(self):
+        """Put the player and every enemy (killed ones too) back at the start"""
+        self.enemies.empty()
+        for enemy, state in self.initial_enemies:
+            enemy.restore(state)
+            self.enemies.add(enemy)
+        self.player.restore(self.initial_player)
+        
+    def enemies_left(self):
+        """Enemies still alive, including any not resident while streaming"""
+        if self.streamer:
+            return len(self.enemies) + self.streamer.dormant_enemies()
+        return len(self.enemies)
+        
+    def close(self):
+        """Release what the level holds open (only streamed levels do)"""
+        
+    def mark_layout_changed(self):
+        """Refresh derived wall data after walls are added or removed"""
+        self.wall_grid.rebuild(self.walls)
+        self.flow_field.rebuild(self.walls)
+        self.nav_graph.rebuild(self.walls)
+        self.prepare_flow_field()
+        self.layout_version += 1
+        
+    def prepare_flow_field(self):
+        """Compute the hunt-mode field now instead of on the first hunt-mode step"""
+        self.flow_field.field(self.gather_point)
         
     def create_level_layout(self):
         """Create the maze layout for this level"""
+        # Compiled level files are the fastest source
+        path = level_path(self.level_num)
+        if self.use_level_file and os.path.exists(path):
+            self.build_from_data(load_level_file(path))
         # Use the new custom level designer if available
-        if create_custom_level:
+        elif create_custom_level:
             self.walls, self.enemies, self.player = create_custom_level(self.level_num)
         else:
             # Fallback to original method
@@ -211,9 +401,31 @@ class Level:
                 self.create_level_2()
             elif self.level_num == 3:
                 self.create_boss_level("circle")
+            elif self.level_num >= 7:
+                # Late levels are procedural mazes seeded by their number
+                from maze_designer import MazeDesigner
+                self.walls, self.enemies, self.player = MazeDesigner.create_generated_maze(self.level_num)
             else:
                 self.create_level_1()  # Default
             
+    def build_from_data(self, data):
+        """Create walls and entities from decoded level data"""
+        for x, y, width, height in data.walls:
+            self.walls.add(Wall(x, y, width, height))
+        for kind, enemy_type, x, y in data.spawns:
+            if kind == SPAWN_PLAYER:
+                self.player = Player(x, y)
+                continue
+            if enemy_type == RANDOM_TYPE:
+                enemy_type = random.choice(ENEMY_TYPES)
+            else:
+                enemy_type = ENEMY_TYPES[enemy_type]
+            enemy = Enemy(x, y, enemy_type)
+            if kind == SPAWN_BOSS:
+                enemy.make_boss()
+                enemy.set_position(x, y)
+            self.enemies.add(enemy)
+            
     def create_level_1(self):
         """Create level 1 layout"""
         # Simple maze with basic enemies